@@ -1,7 +1,17 @@
 from .sudoku import Sudoku
+from .sudoku import check_grids
 from .solve import solve
+from .solve import count_solutions
+from .solve import has_unique_solution
+from .solve import SearchStats
+from .solve import iter_solutions
+from .batch import solve_batch
+from .canonical import canonicalize
+from .generate import generate
+from .rating import rate
 from .transformer import switch_column_blocks
 from .transformer import switch_row_blocks
 from .transformer import switch_rows
 from .transformer import switch_columns
 from .transformer import switch_numbers
+from .transformer import Transform
@@ -0,0 +1,151 @@
+"""Command line interface, run with `python -m sudoku`.
+
+    python -m sudoku solve INPUT -o OUTPUT --jobs N --engine dlx --limit 2
+
+solves the puzzles of INPUT, a file in the line format of `sudoku.io` or "-"
+for standard input, on N worker processes. A line is written to OUTPUT for
+each puzzle, in input order, as soon as its chunk is solved: the first
+solution found, or a line of "." when there is none. Progress is shown on
+standard error, followed by the number of puzzles solved, unsolvable, with
+multiple solutions and timed out.
+"""
+from sudoku.batch import MULTIPLE_SOLUTIONS, SOLVED, TIMED_OUT, UNSOLVABLE
+from sudoku.io import format_lines, iter_puzzles
+from sudoku.parallel import solve_stream
+from sudoku.solve import ENGINES
+from typing import *
+import argparse
+import sys
+import time
+
+_STATUS_NAMES = {
+    SOLVED: "solved",
+    UNSOLVABLE: "unsolvable",
+    MULTIPLE_SOLUTIONS: "multiple solutions",
+    TIMED_OUT: "timed out",
+}
+
+# Seconds between progress updates.
+_PROGRESS_INTERVAL = 0.5
+
+
+class _Progress:
+    """Counts results by status and reports the rate on a stream."""
+
+    def __init__(self, stream: Optional[TextIO]):
+        self.stream = stream
+        self.counts = {status: 0 for status in _STATUS_NAMES}
+        self.start = time.perf_counter()
+        self._reported = self.start
+        # Whether a progress line is on the stream.
+        self.shown = False
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def rate(self, now: float) -> float:
+        elapsed = now - self.start
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+    def add(self, status: int):
+        self.counts[status] += 1
+        now = time.perf_counter()
+        if self.stream is not None and now - self._reported >= _PROGRESS_INTERVAL:
+            self._reported = now
+            self.shown = True
+            self.stream.write(f"\r{self.total} puzzles, {self.rate(now):.1f} puzzles/s")
+            self.stream.flush()
+
+    def summary(self) -> str:
+        now = time.perf_counter()
+        counts = ", ".join(
+            f"{name}: {self.counts[status]}" for status, name in _STATUS_NAMES.items()
+        )
+        return (
+            f"{self.total} puzzles in {now - self.start:.2f}s "
+            f"({self.rate(now):.1f} puzzles/s), {counts}"
+        )
+
+
+def _solve(args: argparse.Namespace) -> int:
+    output = args.output
+    progress = _Progress(None if args.quiet else sys.stderr)
+    try:
+        results = solve_stream(
+            iter_puzzles(args.input),
+            jobs=args.jobs,
+            chunk_size=args.chunk_size,
+            timeout=args.timeout,
+            engine=args.engine,
+            limit=args.limit,
+        )
+        for solution, status in results:
+            output.write(format_lines(solution))
+            progress.add(status)
+    except ValueError as error:
+        # A malformed line of input, named by the message.
+        if progress.shown:
+            sys.stderr.write("\n")
+        print(f"{args.input.name}: {error}", file=sys.stderr)
+        return 1
+    finally:
+        # Standard input and output are left open.
+        for file in (args.input, output):
+            if file in (sys.stdin.buffer, sys.stdout.buffer):
+                file.flush()
+            else:
+                file.close()
+
+    if progress.shown:
+        sys.stderr.write("\n")
+    print(progress.summary(), file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sudoku", description=__doc__.split("\n")[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve = commands.add_parser(
+        "solve",
+        help="solve a file of puzzles",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    solve.add_argument(
+        "input",
+        type=argparse.FileType("rb"),
+        help="file of puzzles, - for standard input",
+    )
+    solve.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("wb"),
+        default="-",
+        help="file for the solutions (default: -)",
+    )
+    solve.add_argument("--jobs", type=int, help="default: the number of CPUs")
+    solve.add_argument("--engine", choices=ENGINES, default="dlx")
+    solve.add_argument(
+        "--limit",
+        type=int,
+        default=2,
+        help="solutions to search each puzzle for, 2 or more finds the puzzles "
+        "with multiple solutions (default: 2)",
+    )
+    solve.add_argument("--timeout", type=float, help="seconds allowed per puzzle")
+    solve.add_argument("--chunk-size", type=int, default=64)
+    solve.add_argument("-q", "--quiet", action="store_true", help="no progress")
+    solve.set_defaults(run=_solve)
+
+    args = parser.parse_args(argv)
+    if args.limit < 1:
+        parser.error(f"--limit must be positive, got {args.limit}")
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+from sudoku import Sudoku
+from sudoku.solve import solve
+from typing import *
+import numpy as np
+
+UNSOLVABLE = 0
+SOLVED = 1
+TIMED_OUT = 2
+# Solved, and known to have other solutions.
+MULTIPLE_SOLUTIONS = 3
+
+_DIGITS = np.arange(1, 10, dtype=np.uint8)
+
+
+def _block_view(candidates: np.ndarray) -> np.ndarray:
+    """View [N,9,9,9] candidates as [N, block row, row, block column, column, digit]."""
+    return candidates.reshape(len(candidates), 3, 3, 3, 3, 9)
+
+
+def _propagate(grids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Apply naked and hidden singles to a batch of grids until nothing changes.
+
+    Args:
+        grids: np.ndarray, an [N,9,9] array of puzzles with 0 for an empty cell.
+
+    Returns:
+        An [N,9,9,9] boolean candidate tensor, where candidates[n, row, column, d]
+        is True when d+1 can be placed at (row, column), and an [N] boolean
+        array that is True for puzzles found to have no solution.
+    """
+    candidates = (grids[..., None] == _DIGITS) | (grids == 0)[..., None]
+    contradiction = np.zeros(len(grids), dtype=bool)
+
+    while True:
+        previous = candidates.copy()
+
+        # Naked singles: a cell with one candidate removes it from its peers.
+        fixed = candidates & (candidates.sum(axis=3) == 1)[..., None]
+        row_fixed = fixed.sum(axis=2)
+        column_fixed = fixed.sum(axis=1)
+        block_fixed = _block_view(fixed).sum(axis=(2, 4))
+        contradiction |= (
+            (row_fixed > 1).any(axis=(1, 2))
+            | (column_fixed > 1).any(axis=(1, 2))
+            | (block_fixed > 1).any(axis=(1, 2, 3))
+        )
+        peers = (row_fixed > 0)[:, :, None, :] | (column_fixed > 0)[:, None, :, :]
+        peers = _block_view(peers) | (block_fixed > 0)[:, :, None, :, None, :]
+        candidates &= fixed | ~peers.reshape(candidates.shape)
+
+        # Hidden singles: a digit with one place left in a unit must go there.
+        row_count = candidates.sum(axis=2)
+        column_count = candidates.sum(axis=1)
+        block_count = _block_view(candidates).sum(axis=(2, 4))
+        contradiction |= (
+            (row_count == 0).any(axis=(1, 2))
+            | (column_count == 0).any(axis=(1, 2))
+            | (block_count == 0).any(axis=(1, 2, 3))
+        )
+        hidden = (row_count == 1)[:, :, None, :] | (column_count == 1)[:, None, :, :]
+        hidden = _block_view(hidden) | (block_count == 1)[:, :, None, :, None, :]
+        hidden = candidates & hidden.reshape(candidates.shape)
+        hidden_count = hidden.sum(axis=3)
+        contradiction |= (hidden_count > 1).any(axis=(1, 2))
+        candidates = np.where((hidden_count == 1)[..., None], hidden, candidates)
+
+        contradiction |= (candidates.sum(axis=3) == 0).any(axis=(1, 2))
+        candidates[contradiction] = False
+
+        if np.array_equal(candidates, previous):
+            return candidates, contradiction
+
+
+def solve_batch(
+    grids: np.ndarray, engine: str = "dlx", chunk_size: int = 4096
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve a batch of puzzles.
+
+    Constraint propagation runs vectorized across each chunk of the batch and
+    only the puzzles it leaves ambiguous are searched individually.
+
+    Args:
+        grids: np.ndarray, an [N,9,9] array of puzzles with 0 for an empty cell.
+        engine: str (default="dlx") the `solve` engine used for ambiguous puzzles.
+        chunk_size: int (default=4096) the number of puzzles propagated together.
+
+    Returns:
+        An [N,9,9] uint8 array of solutions, all zeros where a puzzle has no
+        solution, and an [N] uint8 array of statuses, SOLVED or UNSOLVABLE.
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    assert (
+        grids.ndim == 3 and grids.shape[1:] == (9, 9)
+    ), f"grids of shape {grids.shape} must have shape [N,9,9]"
+    assert chunk_size > 0, f"chunk_size '{chunk_size}' must be positive"
+
+    solutions = np.zeros_like(grids)
+    status = np.full(len(grids), UNSOLVABLE, dtype=np.uint8)
+
+    for start in range(0, len(grids), chunk_size):
+        stop = start + chunk_size
+        candidates, contradiction = _propagate(grids[start:stop])
+        count = candidates.sum(axis=3)
+        partial = np.where(count == 1, candidates.argmax(axis=3) + 1, 0)
+
+        solved = ~contradiction & (count == 1).all(axis=(1, 2))
+        solutions[start:stop][solved] = partial[solved]
+        status[start:stop][solved] = SOLVED
+
+        for index in np.flatnonzero(~contradiction & ~solved):
+            found = solve(Sudoku.from_array(partial[index]), engine=engine)
+            if found:
+                solutions[start + index] = found[0].grid
+                status[start + index] = SOLVED
+
+    return solutions, status
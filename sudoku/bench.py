@@ -0,0 +1,228 @@
+"""Benchmarks of the solvers and the Sudoku operations on bundled corpora.
+
+Run with `python -m sudoku.bench`. Each benchmark is run on each corpus and
+reports puzzles per second and the median and 99th percentile latency per
+puzzle. Results can be written as JSON and compared against a baseline run,
+in which case any benchmark that got slower by more than the tolerance is
+reported and the exit status is 1.
+
+The corpora are files in the line format of `sudoku.io`:
+
+- easy: puzzles solved by naked and hidden singles.
+- 17-clue: puzzles with the minimum number of clues.
+- hard: well known hard puzzles and generated puzzles that need a search.
+"""
+from pathlib import Path
+from sudoku import Sudoku, solve_batch
+from sudoku.canonical import SolutionCache
+from sudoku.generate import random_transform
+from sudoku.io import read_puzzles
+from sudoku.solve import solve
+from typing import *
+import argparse
+import json
+import numpy as np
+import platform
+import sys
+import time
+
+CORPORA = ("easy", "17-clue", "hard")
+
+_CORPUS_DIRECTORY = Path(__file__).parent / "corpora"
+
+
+def load_corpus(name: str) -> np.ndarray:
+    """The [N,9,9] puzzles of a bundled corpus."""
+    assert name in CORPORA, f"corpus '{name}' must be one of {CORPORA}"
+    return read_puzzles(_CORPUS_DIRECTORY / f"{name}.txt")
+
+
+def _timed(action: Callable[[Sudoku], Any]) -> Callable[[np.ndarray], List[float]]:
+    """A benchmark timing action on each puzzle separately."""
+
+    def benchmark(grids: np.ndarray) -> List[float]:
+        latencies = []
+        for grid in grids:
+            s = Sudoku.from_array(grid)
+            start = time.perf_counter()
+            action(s)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    return benchmark
+
+
+def _batch(grids: np.ndarray) -> List[float]:
+    # The puzzles are solved together, so each gets an equal share of the time.
+    start = time.perf_counter()
+    solve_batch(grids)
+    return [(time.perf_counter() - start) / len(grids)] * len(grids)
+
+
+def _possible_entries(s: Sudoku):
+    for row in range(9):
+        for column in range(9):
+            s.possible_entries(row, column)
+
+
+_TRANSFORM = random_transform(np.random.default_rng(0))
+
+
+def _cache_hit(grids: np.ndarray) -> List[float]:
+    # The cache holds each puzzle and its transpose, so each transformed puzzle
+    # shares an invariant with a cached one and is put in canonical form.
+    cache = SolutionCache(maxsize=2 * len(grids))
+    for grid in grids:
+        cache.solve(Sudoku.from_array(grid))
+        cache.solve(Sudoku.from_array(grid.T))
+    return _timed(cache.solve)(_TRANSFORM.apply(grids))
+
+
+# Benchmark name to a function from puzzles to the seconds taken per puzzle.
+BENCHMARKS: Dict[str, Callable[[np.ndarray], List[float]]] = {
+    "solve-backtrack": _timed(lambda s: solve(s, engine="backtrack")),
+    "solve-dlx": _timed(lambda s: solve(s, engine="dlx")),
+    "solve-batch": _batch,
+    "possible-entries": _timed(_possible_entries),
+    "check": _timed(lambda s: s.check()),
+    "transform": _timed(_TRANSFORM),
+    "cache-miss": _timed(lambda s: SolutionCache().solve(s)),
+    "cache-hit": _cache_hit,
+}
+
+
+def run(
+    corpora: Sequence[str] = CORPORA,
+    benchmarks: Sequence[str] = tuple(BENCHMARKS),
+    repeat: int = 1,
+) -> List[Dict[str, Any]]:
+    """Run benchmarks on corpora.
+
+    Args:
+        corpora: Sequence of str (default=CORPORA) the corpora to run on.
+        benchmarks: Sequence of str (default=all) names from BENCHMARKS.
+        repeat: int (default=1) the number of times to run each benchmark,
+            latencies from all runs are combined.
+
+    Returns:
+        A result per corpus and benchmark, with the number of puzzles, the
+        puzzles per second and the p50 and p99 latency in milliseconds.
+    """
+    assert repeat > 0, f"repeat '{repeat}' must be positive"
+    for name in benchmarks:
+        assert (
+            name in BENCHMARKS
+        ), f"benchmark '{name}' must be one of {tuple(BENCHMARKS)}"
+
+    results = []
+    for corpus in corpora:
+        grids = load_corpus(corpus)
+        for name in benchmarks:
+            latencies = np.array(
+                [t for _ in range(repeat) for t in BENCHMARKS[name](grids)]
+            )
+            results.append(
+                {
+                    "corpus": corpus,
+                    "benchmark": name,
+                    "puzzles": len(grids),
+                    "puzzles_per_second": len(latencies) / latencies.sum(),
+                    "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+                    "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+                }
+            )
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    tolerance: float = 0.2,
+) -> List[str]:
+    """Find the benchmarks slower than in a baseline.
+
+    Args:
+        results: the results of `run`.
+        baseline: earlier results of `run`. Benchmarks missing from either are
+            not compared.
+        tolerance: float (default=0.2) the fraction by which throughput may
+            drop before it is a regression.
+
+    Returns:
+        A message for each regression, empty if there are none.
+    """
+    previous = {(r["corpus"], r["benchmark"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        key = (result["corpus"], result["benchmark"])
+        if key not in previous:
+            continue
+        before = previous[key]["puzzles_per_second"]
+        after = result["puzzles_per_second"]
+        if after < before * (1 - tolerance):
+            regressions.append(
+                f"{key[1]} on {key[0]}: {after:.1f} puzzles/s, "
+                f"was {before:.1f} ({after / before - 1:+.0%})"
+            )
+    return regressions
+
+
+def _report(results: List[Dict[str, Any]]) -> str:
+    lines = [
+        f"{'corpus':<8} {'benchmark':<17} {'puzzles':>7} {'puzzles/s':>10} "
+        f"{'p50 ms':>8} {'p99 ms':>8}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r['corpus']:<8} {r['benchmark']:<17} {r['puzzles']:>7} "
+            f"{r['puzzles_per_second']:>10.1f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sudoku.bench", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument(
+        "--corpus", action="append", choices=CORPORA, help="default: all"
+    )
+    parser.add_argument(
+        "--benchmark", action="append", choices=tuple(BENCHMARKS), help="default: all"
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed drop in puzzles per second (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.corpus or CORPORA, args.benchmark or tuple(BENCHMARKS), args.repeat
+    )
+    print(_report(results))
+
+    if args.output:
+        document = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(document, indent=2) + "\n")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
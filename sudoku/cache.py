@@ -0,0 +1,176 @@
+"""A persistent cache of solutions in an SQLite file.
+
+Each entry maps the bytes of a puzzle grid to the bytes of its first solution,
+or to nothing when it has no solution, along with whether the solution is
+unique. Pass a DiskCache to `solve` to answer repeated puzzles without
+searching, across runs and across processes:
+
+    cache = DiskCache("solutions.db")
+    solve(s, cache=cache)
+
+The file is opened in write-ahead-log mode, so any number of processes can
+read it while one writes, and writers wait for each other rather than fail.
+The number of entries is capped, and the least recently used are evicted
+first. A hit only records its use, which takes the write lock, when the last
+one recorded is older than a refresh interval, so most reads do not write.
+"""
+from os import PathLike
+from sudoku import Sudoku
+from typing import *
+import numpy as np
+import os
+import sqlite3
+import time
+
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS solutions (
+    puzzle BLOB PRIMARY KEY,
+    solution BLOB,
+    is_unique INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used);
+CREATE TABLE IF NOT EXISTS size (entries INTEGER NOT NULL);
+INSERT INTO size SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM size);
+CREATE TRIGGER IF NOT EXISTS solutions_inserted AFTER INSERT ON solutions
+BEGIN
+    UPDATE size SET entries = entries + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS solutions_deleted AFTER DELETE ON solutions
+BEGIN
+    UPDATE size SET entries = entries - 1;
+END;
+COMMIT;
+"""
+
+Path = Union[str, PathLike]
+
+
+def _key(s: Union[Sudoku, np.ndarray]) -> bytes:
+    grid = s.grid if isinstance(s, Sudoku) else s
+    return np.asarray(grid, dtype=np.uint8).tobytes()
+
+
+class DiskCache:
+    """Solutions of puzzles stored in an SQLite file at path.
+
+    Pickling a cache only pickles its path and settings, and each process
+    opens its own connection, so a cache can be passed to worker processes.
+
+    Args:
+        path: str or path of the file, created if it does not exist.
+        max_entries: int (default=1000000) the most puzzles kept. Storing more
+            evicts the least recently used.
+        timeout: float (default=30.0) seconds to wait for another process
+            writing to the file.
+        refresh: float (default=60.0) seconds after which a hit records its use
+            again. Uses within refresh seconds of each other count as one for
+            eviction.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 1000000,
+        timeout: float = 30.0,
+        refresh: float = 60.0,
+    ):
+        assert max_entries > 0, f"max_entries '{max_entries}' must be positive"
+        assert refresh >= 0, f"refresh '{refresh}' must not be negative"
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.refresh = refresh
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._connect()
+
+    def __reduce__(self):
+        return DiskCache, (self.path, self.max_entries, self.timeout, self.refresh)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be used by a process forked after it was made.
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __len__(self):
+        (entries,) = self._connect().execute("SELECT entries FROM size").fetchone()
+        return entries
+
+    def get(
+        self, s: Union[Sudoku, np.ndarray]
+    ) -> Optional[Tuple[Optional[np.ndarray], bool]]:
+        """Look up a puzzle.
+
+        Args:
+            s: Sudoku or grid, the puzzle.
+
+        Returns:
+            None if the puzzle is not in the cache, otherwise its first solution
+            as a grid, None if it has no solution, and whether that solution is
+            unique.
+        """
+        key = _key(s)
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT solution, is_unique, used FROM solutions WHERE puzzle = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        solution, unique, used = row
+        now = time.time()
+        if now - used >= self.refresh:
+            connection.execute(
+                "UPDATE solutions SET used = ? WHERE puzzle = ?", (now, key)
+            )
+        if solution is None:
+            return None, False
+        size = int(round(len(solution) ** 0.5))
+        grid = np.frombuffer(solution, dtype=np.uint8).reshape(size, size)
+        return grid, bool(unique)
+
+    def put(
+        self,
+        s: Union[Sudoku, np.ndarray],
+        solution: Optional[Union[Sudoku, np.ndarray]],
+        unique: bool,
+    ):
+        """Store the first solution of a puzzle, None if it has none, and whether
+        it is unique. Evicts the least recently used puzzles when full."""
+        solution = None if solution is None else _key(solution)
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT INTO solutions VALUES (?, ?, ?, ?) ON CONFLICT (puzzle) "
+                "DO UPDATE SET solution = excluded.solution, "
+                "is_unique = excluded.is_unique, used = excluded.used",
+                (_key(s), solution, int(unique), time.time()),
+            )
+            (entries,) = connection.execute("SELECT entries FROM size").fetchone()
+            if entries > self.max_entries:
+                connection.execute(
+                    "DELETE FROM solutions WHERE puzzle IN "
+                    "(SELECT puzzle FROM solutions ORDER BY used, rowid LIMIT ?)",
+                    (entries - self.max_entries,),
+                )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def clear(self):
+        self._connect().execute("DELETE FROM solutions")
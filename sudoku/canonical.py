@@ -0,0 +1,417 @@
+from collections import OrderedDict
+from itertools import permutations
+from sudoku import Sudoku
+from sudoku.solve import SearchStats, solve
+from sudoku.transformer import Transform
+from typing import *
+import numpy as np
+
+
+def _line_permutations() -> np.ndarray:
+    """The 1296 orderings of 9 lines that keep the lines of each block together."""
+    orders = []
+    for blocks in permutations(range(3)):
+        for first in permutations(range(3)):
+            for second in permutations(range(3)):
+                for third in permutations(range(3)):
+                    within = (first, second, third)
+                    orders.append(
+                        [
+                            block * 3 + within[i][j]
+                            for i, block in enumerate(blocks)
+                            for j in range(3)
+                        ]
+                    )
+    return np.array(orders, dtype=np.intp)
+
+
+_LINE_PERMUTATIONS = _line_permutations()
+
+_LINES = np.arange(9)
+_BLOCK_OF_LINE = _LINES // 3
+_DIGITS = np.arange(1, 10)
+
+# The most pairs of row and column orders tried one by one, rather than by the
+# incremental search of `_minimal_transform`.
+_MAX_TRIED = 256
+
+
+def _line_signatures(grid: np.ndarray) -> np.ndarray:
+    """A number for each row of grid that no transform changes.
+
+    It packs the number of clues in the row, the sorted numbers of its clues in
+    each column block and the sorted numbers of times its digits appear in the
+    grid, none of which depend on the order of the lines or the labels of the
+    digits.
+    """
+    filled = grid != 0
+    counts = np.bincount(grid.ravel(), minlength=10)
+    counts[0] = 0
+    parts = np.concatenate(
+        [
+            filled.sum(axis=1, keepdims=True),
+            np.sort(filled.reshape(9, 3, 3).sum(axis=2), axis=1),
+            np.sort(counts[grid], axis=1),
+        ],
+        axis=1,
+    ).astype(np.int64)
+    # Each part is at most 9, so fits in 4 bits.
+    return (parts << (4 * np.arange(parts.shape[1] - 1, -1, -1))).sum(axis=1)
+
+
+def _allowed_lines(grid: np.ndarray) -> np.ndarray:
+    """Which row of grid may be placed at each position of a canonical grid.
+
+    allowed[i, r] is True when row r can be row i of a grid whose row blocks
+    and the rows within each block are in increasing order of signature.
+    """
+    _, ranks = np.unique(_line_signatures(grid), return_inverse=True)
+    within = np.sort(ranks.reshape(3, 3), axis=1)
+    blocks = within @ np.array([81, 9, 1])
+    return (
+        blocks[_BLOCK_OF_LINE][None, :] == np.sort(blocks)[_BLOCK_OF_LINE][:, None]
+    ) & (ranks[None, :] == within[_BLOCK_OF_LINE[None, :], _LINES[:, None] % 3])
+
+
+def _orders(allowed: np.ndarray, limit: int) -> Optional[np.ndarray]:
+    """The line orders permitted by allowed, as rows of line indices.
+
+    Returns:
+        The orders, None if there are more than limit of them.
+    """
+    allowed = allowed.tolist()
+    orders: List[List[int]] = []
+    order: List[int] = []
+
+    def extend() -> bool:
+        i = len(order)
+        if i == 9:
+            orders.append(list(order))
+            return len(orders) <= limit
+        if i % 3 == 0:
+            # A block starts with any line of a block not used yet.
+            used = {line // 3 for line in order}
+            lines = [line for line in range(9) if line // 3 not in used]
+        else:
+            block = order[-1] // 3
+            lines = range(block * 3, block * 3 + 3)
+        for line in lines:
+            if allowed[i][line] and line not in order:
+                order.append(line)
+                complete = extend()
+                order.pop()
+                if not complete:
+                    return False
+        return True
+
+    if not extend():
+        return None
+    return np.array(orders, dtype=np.intp)
+
+
+def _invariant(grid: np.ndarray) -> bytes:
+    """A key that is the same for equivalent grids, cheap next to `canonicalize`.
+
+    Grids with different invariants are never equivalent, while grids with the
+    same invariant usually are.
+    """
+    grid = grid.astype(np.intp)
+    rows = np.sort(_line_signatures(grid)).tobytes()
+    columns = np.sort(_line_signatures(grid.T)).tobytes()
+    return min(rows, columns) + max(rows, columns)
+
+
+def _relabel(values: np.ndarray, labels: np.ndarray, next_label: np.ndarray):
+    """Relabel each row of values, numbering digits in order of first appearance.
+
+    labels[i, d] is the label already given to digit d in state i, 0 if none,
+    and next_label[i] the label the next new digit gets. Both are updated.
+    """
+    states = np.arange(len(values))
+    relabelled = np.zeros_like(values)
+    for j in range(values.shape[1]):
+        digits = values[:, j]
+        new = (digits != 0) & (labels[states, digits] == 0)
+        labels[states[new], digits[new]] = next_label[new]
+        next_label += new
+        relabelled[:, j] = labels[states, digits]
+    return relabelled
+
+
+def _relabelled(grids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Number the digits of each of the [N,81] grids in order of first appearance.
+
+    Returns:
+        The relabelled grids and the [N,10] labels given to 0-9 in each.
+    """
+    appears = grids[:, :, None] == _DIGITS
+    first = np.where(appears.any(axis=1), appears.argmax(axis=1), grids.shape[1])
+    # Digits absent from a grid come last, in increasing order.
+    order = np.argsort(first, axis=1, kind="stable")
+    grid_index = np.arange(len(grids))[:, None]
+    labels = np.zeros((len(grids), 10), dtype=np.intp)
+    labels[grid_index, order + 1] = _DIGITS
+    return labels[grid_index, grids], labels
+
+
+def _smallest_of(
+    grid: np.ndarray, rows: np.ndarray, columns: np.ndarray, transpose: bool
+) -> Transform:
+    """The transform giving the smallest grid among the given line orders."""
+    grids = grid[rows[:, None, :, None], columns[None, :, None, :]]
+    grids, labels = _relabelled(grids.reshape(-1, 81))
+    best = np.lexsort(grids.T[::-1])[0]
+    row, column = divmod(best, len(columns))
+    return Transform(rows[row], columns[column], labels[best], transpose)
+
+
+def _minimal_transform(
+    grid: np.ndarray, allowed_rows: np.ndarray, allowed_columns: np.ndarray
+) -> Transform:
+    """The transform, without transposition, giving the smallest grid whose
+    lines are in the order allowed by `_allowed_lines`.
+
+    The search builds the transformed grid one row at a time, keeping only the
+    partial transforms that give the smallest rows so far.
+    """
+    grid = grid.astype(np.intp)
+
+    # Each state is a column ordering, the rows chosen so far and a partial
+    # digit relabelling.
+    columns = np.flatnonzero(allowed_columns[_LINES, _LINE_PERMUTATIONS].all(axis=1))
+    rows = np.zeros((len(columns), 0), dtype=np.intp)
+    labels = np.zeros((len(columns), 10), dtype=np.intp)
+    next_label = np.ones(len(columns), dtype=np.intp)
+
+    for i in range(9):
+        # Extend every state by each row that may come next.
+        candidate = np.tile(np.arange(9), len(columns))
+        state = np.repeat(np.arange(len(columns)), 9)
+        valid = ~(rows[state] == candidate[:, None]).any(axis=1)
+        if i % 3 == 0:
+            used_blocks = rows[state] // 3
+            valid &= ~(used_blocks == (candidate // 3)[:, None]).any(axis=1)
+        else:
+            valid &= rows[state, i - 1] // 3 == candidate // 3
+        valid &= allowed_rows[i, candidate]
+        state, candidate = state[valid], candidate[valid]
+
+        columns = columns[state]
+        rows = np.concatenate([rows[state], candidate[:, None]], axis=1)
+        labels = labels[state]
+        next_label = next_label[state]
+
+        values = grid[candidate[:, None], _LINE_PERMUTATIONS[columns]]
+        key = _relabel(values, labels, next_label)
+
+        # Keep only the states giving the smallest row.
+        keep = np.ones(len(key), dtype=bool)
+        for j in range(9):
+            keep &= key[:, j] == key[keep, j].min()
+        columns, rows = columns[keep], rows[keep]
+        labels, next_label = labels[keep], next_label[keep]
+
+        # States that have used the same rows, end in the same row block and
+        # see the same remaining grid under the same labels lead to the same
+        # rows from here on, so only one of them is kept. This stops sparse
+        # grids with many symmetries from growing the search.
+        used = np.zeros((len(rows), 9), dtype=bool)
+        used[np.arange(len(rows))[:, None], rows] = True
+        remaining = grid[:, _LINE_PERMUTATIONS[columns]].transpose(1, 0, 2)
+        remaining = np.where(used[:, :, None], 0, remaining)
+        future = np.concatenate(
+            [used, rows[:, -1:] // 3, labels, remaining.reshape(len(rows), 81)], axis=1
+        ).astype(np.uint8)
+        future = future.view(np.dtype((np.void, future.shape[1]))).ravel()
+        _, unique = np.unique(future, return_index=True)
+        unique.sort()
+        columns, rows = columns[unique], rows[unique]
+        labels, next_label = labels[unique], next_label[unique]
+
+    rows = rows[0]
+    columns = _LINE_PERMUTATIONS[columns[0]]
+    digits = labels[0].copy()
+    # Digits absent from the grid get the remaining labels.
+    missing = np.flatnonzero(digits[1:] == 0) + 1
+    digits[missing] = np.arange(next_label[0], next_label[0] + len(missing))
+
+    return Transform(rows, columns, digits)
+
+
+def canonicalize(s: Sudoku) -> Tuple[Sudoku, Transform]:
+    """Map a Sudoku to the minimal representative of its equivalence class.
+
+    Two Sudoku are equivalent when one can be turned into the other by a
+    `Transform`: reordering rows within a row block, reordering row blocks, the
+    same for columns, relabelling digits and transposing. The representative is
+    the smallest, read row by row with empty cells as 0, of the equivalent grids
+    whose lines are in order of a signature that no transform changes: the row
+    blocks and the rows within each block, and the same for columns. For most
+    puzzles only a few equivalent grids are in that order.
+
+    Args:
+        s: Sudoku, the sudoku to canonicalize.
+
+    Returns:
+        The canonical Sudoku and the transform that maps s to it.
+    """
+    canonical, transform = _canonical_grid(s.grid)
+    return Sudoku.from_array(canonical), transform
+
+
+def _canonical_grid(grid: np.ndarray) -> Tuple[np.ndarray, Transform]:
+    allowed_rows = _allowed_lines(grid.astype(np.intp))
+    allowed_columns = _allowed_lines(grid.T.astype(np.intp))
+
+    # Most puzzles allow few line orders, and every pair of them is tried.
+    rows = _orders(allowed_rows, _MAX_TRIED)
+    columns = None
+    if rows is not None:
+        columns = _orders(allowed_columns, _MAX_TRIED // len(rows))
+    if columns is not None:
+        transforms = [
+            _smallest_of(grid, rows, columns, False),
+            _smallest_of(grid.T, columns, rows, True),
+        ]
+    else:
+        transforms = []
+        for transpose in (False, True):
+            if transpose:
+                found = _minimal_transform(grid.T, allowed_columns, allowed_rows)
+            else:
+                found = _minimal_transform(grid, allowed_rows, allowed_columns)
+            transforms.append(
+                Transform(found.rows, found.columns, found.digits, transpose)
+            )
+
+    best = None
+    for transform in transforms:
+        canonical = transform.apply(grid)
+        if best is None or canonical.tobytes() < best[0].tobytes():
+            best = (canonical, transform)
+    return best
+
+
+class SolutionCache:
+    """A least-recently-used cache of solutions keyed by canonical form.
+
+    A puzzle equivalent to one already solved is answered by transforming the
+    cached solution back, without searching.
+
+    Canonical forms cost more to find than many puzzles take to solve, so a
+    puzzle is first looked up by `_invariant`, which is cheap. A puzzle whose
+    invariant is new cannot be equivalent to any in the cache and is solved
+    directly. It is only put in canonical form once another puzzle with the same
+    invariant arrives, unless that puzzle is the same one.
+
+    Answering an equivalent puzzle takes about 0.3 ms, about as long as the
+    compiled backtrack engine takes to solve a 9x9 puzzle, so the cache pays
+    off for the dlx engine, the backtrack engine without numba and puzzles
+    that take longer to solve.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        assert maxsize > 0, f"maxsize '{maxsize}' must be positive"
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # Canonical grid bytes to canonical solution bytes, None if unsolvable.
+        self._solutions: "OrderedDict[bytes, Optional[bytes]]" = OrderedDict()
+        # The number of entries of _solutions with each invariant.
+        self._invariants: Dict[bytes, int] = {}
+        # Invariant to the grid bytes and solution bytes of the only puzzle
+        # solved with that invariant, not yet in canonical form.
+        self._unique: "OrderedDict[bytes, Tuple[bytes, Optional[bytes]]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self):
+        return len(self._solutions) + len(self._unique)
+
+    def solve(
+        self, s: Sudoku, engine: str = "backtrack", stats: Optional[SearchStats] = None
+    ) -> List[Sudoku]:
+        """Solve s like `solve(s, engine=engine)`, using the cache when possible.
+
+        Hits and misses are also counted in stats if it is given.
+        """
+        grid = s.grid.tobytes()
+        invariant = _invariant(s.grid)
+
+        entry = self._unique.pop(invariant, None)
+        if entry is not None:
+            if entry[0] == grid:
+                self._count(True, stats)
+                self._unique[invariant] = entry
+                return self._solution(entry[1], None)
+            self._add_canonical(invariant, *entry)
+
+        if not self._invariants.get(invariant):
+            self._count(False, stats)
+            found = solve(s, engine=engine, stats=stats)
+            self._unique[invariant] = (grid, found[0].grid.tobytes() if found else None)
+            self._evict()
+            return found
+
+        canonical, transform = _canonical_grid(s.grid)
+        key = canonical.tobytes()
+        if key in self._solutions:
+            self._count(True, stats)
+            self._solutions.move_to_end(key)
+            solution = self._solutions[key]
+        else:
+            self._count(False, stats)
+            found = solve(Sudoku.from_array(canonical), engine=engine, stats=stats)
+            solution = found[0].grid.tobytes() if found else None
+            self._add(invariant, key, solution)
+        return self._solution(solution, transform)
+
+    def _count(self, hit: bool, stats: Optional[SearchStats]):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if stats is not None:
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+
+    @staticmethod
+    def _solution(
+        solution: Optional[bytes], transform: Optional[Transform]
+    ) -> List[Sudoku]:
+        """The solution bytes as a list of Sudoku, mapped back by the inverse of
+        transform if it is given."""
+        if solution is None:
+            return []
+        solution = np.frombuffer(solution, dtype=np.uint8).reshape(9, 9)
+        if transform is not None:
+            solution = transform.inverse().apply(solution)
+        return [Sudoku.from_array(solution)]
+
+    def _add_canonical(self, invariant: bytes, grid: bytes, solution: Optional[bytes]):
+        """Add a puzzle and its solution in canonical form."""
+        grid = np.frombuffer(grid, dtype=np.uint8).reshape(9, 9)
+        canonical, transform = _canonical_grid(grid)
+        if solution is not None:
+            solution = np.frombuffer(solution, dtype=np.uint8).reshape(9, 9)
+            solution = transform.apply(solution).tobytes()
+        self._add(invariant, canonical.tobytes(), solution)
+
+    def _add(self, invariant: bytes, key: bytes, solution: Optional[bytes]):
+        if key not in self._solutions:
+            self._invariants[invariant] = self._invariants.get(invariant, 0) + 1
+        self._solutions[key] = solution
+        self._evict()
+
+    def _evict(self):
+        while len(self) > self.maxsize:
+            if self._unique:
+                self._unique.popitem(last=False)
+                continue
+            key, _ = self._solutions.popitem(last=False)
+            invariant = _invariant(np.frombuffer(key, dtype=np.uint8).reshape(9, 9))
+            self._invariants[invariant] -= 1
+            if not self._invariants[invariant]:
+                del self._invariants[invariant]
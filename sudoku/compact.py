@@ -0,0 +1,97 @@
+from sudoku import Sudoku
+from sudoku.sudoku import ALL_CANDIDATES, _MASK_ENTRIES, _PEERS, _UNITS
+from typing import *
+import numpy as np
+
+
+class CompactSudoku:
+    """A Sudoku stored as 81 bytes, one per cell in row-major order.
+
+    Supports the indexing, checking and candidate API of Sudoku at a fraction of
+    the memory, for holding large numbers of grids at once. Candidates are
+    computed on demand from the 20 peers of a cell rather than stored.
+    """
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: Optional[bytes] = None):
+        if cells is None:
+            self.cells = bytearray(81)
+        else:
+            assert len(cells) == 81, f"cells of length {len(cells)} must have 81 cells"
+            self.cells = bytearray(cells)
+
+    @staticmethod
+    def from_sudoku(s: Sudoku) -> "CompactSudoku":
+        return CompactSudoku(s.grid.tobytes())
+
+    def to_sudoku(self) -> Sudoku:
+        return Sudoku.from_array(
+            np.frombuffer(self.cells, dtype=np.uint8).reshape(9, 9)
+        )
+
+    def __bytes__(self):
+        return bytes(self.cells)
+
+    def __hash__(self):
+        return hash(bytes(self.cells))
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactSudoku):
+            return NotImplemented
+        return self.cells == other.cells
+
+    def __repr__(self):
+        return repr(self.to_sudoku())
+
+    def clone(self) -> "CompactSudoku":
+        return CompactSudoku(self.cells)
+
+    def __getitem__(self, row_column):
+        row, column = row_column
+        assert row >= 0 and row < 9
+        assert column >= 0 and column < 9
+        return self.cells[row * 9 + column]
+
+    def __setitem__(self, row_column, value):
+        row, column = row_column
+        assert row >= 0 and row < 9
+        assert column >= 0 and column < 9
+        self.cells[row * 9 + column] = value
+
+    def candidate_mask(self, row: int, column: int) -> int:
+        cells = self.cells
+        cell = row * 9 + column
+        if cells[cell] != 0:
+            return 1 << (cells[cell] - 1)
+        used = 0
+        for peer in _PEERS[cell]:
+            if cells[peer] != 0:
+                used |= 1 << (cells[peer] - 1)
+        return ALL_CANDIDATES & ~used
+
+    def possible_entries(self, row: int, column: int) -> List[int]:
+        return list(_MASK_ENTRIES[self.candidate_mask(row, column)])
+
+    def check(self) -> bool:
+        cells = self.cells
+        for unit in _UNITS:
+            seen = 0
+            for cell in unit:
+                number = cells[cell]
+                if number > 9:
+                    return False
+                if number != 0:
+                    bit = 1 << number
+                    if seen & bit:
+                        return False
+                    seen |= bit
+        return True
+
+    @property
+    def ok(self):
+        return self.check()
+
+    @property
+    def completed(self):
+        return 0 not in self.cells and self.ok
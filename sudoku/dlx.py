@@ -0,0 +1,257 @@
+"""Exact-cover solver for Sudoku using Knuth's Algorithm X with Dancing Links.
+
+A Sudoku of size n (9 for the usual grid) is an exact-cover problem with 4n²
+constraints (each cell filled, each digit once per row, column and block) and
+n³ candidates (a digit in a cell), each of which satisfies exactly four
+constraints. For 9x9 that is 324 constraints and 729 candidates.
+
+The links are held in flat integer lists rather than node objects. Node 0 is
+the root, nodes 1 to 4n² are the column headers and the remaining nodes belong
+to candidates, four per candidate.
+"""
+from functools import lru_cache
+from sudoku import Sudoku
+from sudoku.sudoku import block_index
+from typing import *
+
+if TYPE_CHECKING:
+    from sudoku.solve import SearchStats
+
+
+def _constraints(
+    row: int, column: int, digit: int, box_size: int = 3
+) -> Tuple[int, int, int, int]:
+    """Column headers satisfied by placing digit (0-based) at (row, column)."""
+    size = box_size * box_size
+    cells = size * size
+    return (
+        1 + row * size + column,
+        1 + cells + row * size + digit,
+        1 + 2 * cells + column * size + digit,
+        1 + 3 * cells + block_index(row, column, box_size) * size + digit,
+    )
+
+
+@lru_cache(maxsize=None)
+def _links(box_size: int):
+    """The links of the empty grid and the first node of each candidate."""
+    size = box_size * box_size
+    n_constraints = 4 * size * size
+    n_candidates = size**3
+    nodes = 1 + n_constraints + 4 * n_candidates
+    left = list(range(-1, nodes - 1))
+    right = list(range(1, nodes + 1))
+    up = list(range(nodes))
+    down = list(range(nodes))
+    header = list(range(nodes))
+    candidate = [-1] * nodes
+    count = [0] * (1 + n_constraints)
+
+    left[0] = n_constraints
+    right[n_constraints] = 0
+
+    node = 1 + n_constraints
+    for index in range(n_candidates):
+        row, rest = divmod(index, size * size)
+        column, digit = divmod(rest, size)
+        first = node
+        for h in _constraints(row, column, digit, box_size):
+            up[node] = up[h]
+            down[node] = h
+            down[up[h]] = node
+            up[h] = node
+            header[node] = h
+            candidate[node] = index
+            count[h] += 1
+            left[node] = node - 1
+            right[node] = node + 1
+            node += 1
+        left[first] = node - 1
+        right[node - 1] = first
+
+    # First node of each candidate, used to select the clues of a puzzle.
+    candidate_nodes = list(range(1 + n_constraints, nodes, 4))
+    return (left, right, up, down, header, candidate, count), candidate_nodes
+
+
+class _ExactCover:
+    def __init__(self, s: Sudoku):
+        links, candidate_nodes = _links(s.box_size)
+        left, right, up, down, header, candidate, count = links
+        # Covering rewrites the links and counts, so they are copied, while
+        # the header and candidate of each node never change and are shared.
+        self.left = left.copy()
+        self.right = right.copy()
+        self.up = up.copy()
+        self.down = down.copy()
+        self.count = count.copy()
+        self.header = header
+        self.candidate = candidate
+        self.consistent = True
+
+        size = s.size
+        covered = [False] * len(count)
+        for row, line in enumerate(s.grid.tolist()):
+            for column, number in enumerate(line):
+                if number == 0:
+                    continue
+                node = candidate_nodes[(row * size + column) * size + number - 1]
+                for h in _constraints(row, column, number - 1, s.box_size):
+                    if covered[h]:
+                        self.consistent = False
+                        return
+                    covered[h] = True
+                self._select(node)
+
+    def _cover(self, c: int):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        header, count = self.header, self.count
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                count[header[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, c: int):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        header, count = self.header, self.count
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                count[header[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[c]] = c
+        left[right[c]] = c
+
+    def _select(self, node: int):
+        self._cover(self.header[node])
+        j = self.right[node]
+        while j != node:
+            self._cover(self.header[j])
+            j = self.right[j]
+
+    def search(
+        self,
+        on_solution: Callable[[List[int]], bool],
+        stats: Optional["SearchStats"] = None,
+        stop: Optional[Callable[[], bool]] = None,
+    ):
+        """Call on_solution with the chosen candidates of every solution.
+
+        The search stops as soon as on_solution returns True, or stop, which is
+        called at every node, does. The work done is added to stats, a
+        `SearchStats`, if it is given.
+        """
+        if self.consistent:
+            self._search([], on_solution, stats, stop)
+
+    def _search(
+        self,
+        chosen: List[int],
+        on_solution: Callable[[List[int]], bool],
+        stats: Optional["SearchStats"],
+        stop: Optional[Callable[[], bool]],
+    ) -> bool:
+        right, down, count = self.right, self.down, self.count
+        if stop is not None and stop():
+            return True
+        if stats is not None:
+            stats.visit(len(chosen))
+        if right[0] == 0:
+            if stats is not None:
+                stats.solution(len(chosen))
+            return on_solution(chosen)
+
+        # Branch on the constraint with the fewest remaining candidates.
+        c = right[0]
+        best = c
+        while c != 0:
+            if count[c] < count[best]:
+                best = c
+                if count[c] <= 1:
+                    break
+            c = right[c]
+        if count[best] == 0:
+            return False
+
+        c = best
+        done = False
+        if stats is not None:
+            stats.branch(len(chosen), count[c])
+        self._cover(c)
+        i = down[c]
+        while i != c:
+            chosen.append(self.candidate[i])
+            j = right[i]
+            while j != i:
+                self._cover(self.header[j])
+                j = right[j]
+            done = self._search(chosen, on_solution, stats, stop)
+            j = self.left[i]
+            while j != i:
+                self._uncover(self.header[j])
+                j = self.left[j]
+            chosen.pop()
+            if stats is not None:
+                stats.backtrack(len(chosen) + 1)
+            if done:
+                break
+            i = down[i]
+        self._uncover(c)
+        return done
+
+
+def _fill(s: Sudoku, chosen: List[int]) -> Sudoku:
+    solution = s.clone()
+    size = s.size
+    for index in chosen:
+        row, rest = divmod(index, size * size)
+        column, digit = divmod(rest, size)
+        solution[row, column] = digit + 1
+    return solution
+
+
+def solve(
+    s: Sudoku,
+    limit: Optional[int] = None,
+    stats: Optional["SearchStats"] = None,
+    stop: Optional[Callable[[], bool]] = None,
+) -> List[Sudoku]:
+    """Find the solutions of s, stopping after limit solutions if it is given
+    or as soon as stop returns True.
+
+    The work done is added to stats, a `SearchStats`, if it is given.
+    """
+    solutions: List[Sudoku] = []
+
+    def on_solution(chosen: List[int]) -> bool:
+        solutions.append(_fill(s, chosen))
+        if stats is not None:
+            stats.clones += 1
+        return limit is not None and len(solutions) >= limit
+
+    _ExactCover(s).search(on_solution, stats, stop)
+    return solutions
+
+
+def count_solutions(s: Sudoku, limit: Optional[int] = None) -> int:
+    """Count the solutions of s without building them, stopping at limit."""
+    count = 0
+
+    def on_solution(chosen: List[int]) -> bool:
+        nonlocal count
+        count += 1
+        return limit is not None and count >= limit
+
+    _ExactCover(s).search(on_solution)
+    return count
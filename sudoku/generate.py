@@ -0,0 +1,209 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sudoku import Sudoku
+from sudoku.propagation import STRATEGIES, propagate
+from sudoku.rating import LEVELS, SEARCH, rate
+from sudoku.solve import has_unique_solution, solve
+from sudoku.transformer import Transform
+from typing import *
+import numpy as np
+
+# easy puzzles are solved by singles alone, medium ones by all the propagation
+# strategies and hard ones need a search.
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# The hardest rung of the `sudoku.rating` ladder each difficulty may need, as an
+# index in LEVELS.
+_HARDEST_LEVEL = {
+    "easy": LEVELS.index("hidden_singles"),
+    "medium": LEVELS.index(SEARCH) - 1,
+    "hard": LEVELS.index(SEARCH),
+}
+
+# Grids tried for one puzzle before giving up on the clues and difficulty. A
+# hard puzzle usually takes a few, while some combinations, such as hard
+# puzzles with many clues, are never found.
+_MAX_ATTEMPTS = 100
+
+
+def random_transform(rng: np.random.Generator) -> Transform:
+    """A transform drawn uniformly from all the transforms of a Sudoku."""
+
+    def lines():
+        return np.concatenate(
+            [block * 3 + rng.permutation(3) for block in rng.permutation(3)]
+        )
+
+    digits = np.concatenate([[0], rng.permutation(9) + 1])
+    return Transform(lines(), lines(), digits, bool(rng.integers(2)))
+
+
+def random_grid(rng: Optional[np.random.Generator] = None) -> Sudoku:
+    """A random completed grid.
+
+    The three blocks on the diagonal share no row or column, so they are filled
+    with independent random permutations and the rest of the grid is found by
+    search. A random transform of the result varies the grid further.
+    """
+    rng = rng or np.random.default_rng()
+    s = Sudoku()
+    for block in range(3):
+        offset = block * 3
+        s.grid[offset : offset + 3, offset : offset + 3] = (
+            rng.permutation(9).reshape(3, 3) + 1
+        )
+    s._update_masks()
+    return random_transform(rng)(solve(s, engine="dlx")[0])
+
+
+def _solved_by(s: Sudoku, strategies) -> bool:
+    s = s.clone()
+    return propagate(s, strategies) and s.completed
+
+
+def _difficulty(s: Sudoku) -> str:
+    level = rate(s).level
+    return next(d for d in DIFFICULTIES if level <= _HARDEST_LEVEL[d])
+
+
+def make_puzzle(
+    solution: Sudoku,
+    clues: Optional[int] = None,
+    difficulty: Optional[str] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> Sudoku:
+    """Remove clues from a completed grid, keeping the solution unique.
+
+    Cells are tried in random order and a clue is only removed if the puzzle
+    still has a unique solution and, for "easy" and "medium", can still be
+    solved at that difficulty.
+
+    Args:
+        solution: Sudoku, the completed grid.
+        clues: int (default=None) stop removing at this many clues, remove as
+            many as possible if None.
+        difficulty: str (default=None) one of DIFFICULTIES, the hardest the
+            puzzle may become. A "hard" puzzle is not guaranteed.
+        rng: np.random.Generator (default=None) the source of randomness.
+
+    Returns:
+        The puzzle.
+    """
+    assert (
+        difficulty is None or difficulty in DIFFICULTIES
+    ), f"difficulty '{difficulty}' must be one of {DIFFICULTIES}"
+    assert clues is None or 0 <= clues <= 81, f"clues '{clues}' must be in [0,81]"
+
+    rng = rng or np.random.default_rng()
+    strategies = None
+    if difficulty in ("easy", "medium"):
+        strategies = STRATEGIES[: _HARDEST_LEVEL[difficulty] + 1]
+
+    puzzle = solution.clone()
+    remaining = 81
+    for cell in rng.permutation(81):
+        if clues is not None and remaining <= clues:
+            break
+        row, column = divmod(int(cell), 9)
+        number = puzzle[row, column]
+        puzzle[row, column] = 0
+        if strategies is not None:
+            keep = _solved_by(puzzle, strategies)
+        else:
+            keep = has_unique_solution(puzzle)
+        if keep:
+            remaining -= 1
+        else:
+            puzzle[row, column] = number
+    return puzzle
+
+
+def _generate_one(
+    rng: np.random.Generator, clues: Optional[int], difficulty: Optional[str]
+) -> Sudoku:
+    for _ in range(_MAX_ATTEMPTS):
+        puzzle = make_puzzle(random_grid(rng), clues, difficulty, rng)
+        if difficulty is None or _difficulty(puzzle) == difficulty:
+            return puzzle
+    raise ValueError(
+        f"no {difficulty} puzzle with {clues} clues found in {_MAX_ATTEMPTS} attempts"
+    )
+
+
+def _generate_chunk(
+    seed: np.random.SeedSequence,
+    size: int,
+    clues: Optional[int],
+    difficulty: Optional[str],
+) -> bytes:
+    rng = np.random.default_rng(seed)
+    return b"".join(
+        _generate_one(rng, clues, difficulty).grid.tobytes() for _ in range(size)
+    )
+
+
+def generate(
+    count: Optional[int] = None,
+    clues: Optional[int] = None,
+    difficulty: Optional[str] = None,
+    seed: Optional[int] = None,
+    jobs: int = 1,
+    chunk_size: int = 16,
+) -> Iterator[Sudoku]:
+    """Generate puzzles with unique solutions.
+
+    Args:
+        count: int (default=None) the number of puzzles, unlimited if None.
+        clues: int (default=None) the number of clues to aim for, as few as
+            possible if None. Puzzles can have more clues when no more can be
+            removed.
+        difficulty: str (default=None) one of DIFFICULTIES, the difficulty every
+            puzzle must have, any if None.
+        seed: int (default=None) seed for reproducible puzzles.
+        jobs: int (default=1) the number of worker processes. Puzzles are
+            generated in this process when 1.
+        chunk_size: int (default=16) the number of puzzles a worker makes at once.
+
+    Yields:
+        The puzzles. The same seed gives the same puzzles for any jobs.
+
+    Raises:
+        ValueError: if no puzzle with the clues and difficulty is found after
+            many attempts.
+    """
+    assert (
+        difficulty is None or difficulty in DIFFICULTIES
+    ), f"difficulty '{difficulty}' must be one of {DIFFICULTIES}"
+    assert jobs > 0, f"jobs '{jobs}' must be positive"
+    assert chunk_size > 0, f"chunk_size '{chunk_size}' must be positive"
+
+    seeds = np.random.SeedSequence(seed)
+
+    def chunks() -> Iterator[Tuple[np.random.SeedSequence, int]]:
+        left = count
+        while left is None or left > 0:
+            size = chunk_size if left is None else min(chunk_size, left)
+            yield seeds.spawn(1)[0], size
+            if left is not None:
+                left -= size
+
+    def decode(chunk: bytes) -> Iterator[Sudoku]:
+        grids = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, 9, 9)
+        return (Sudoku.from_array(grid) for grid in grids)
+
+    if jobs == 1:
+        for seed_sequence, size in chunks():
+            yield from decode(_generate_chunk(seed_sequence, size, clues, difficulty))
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for seed_sequence, size in chunks():
+            pending.append(
+                executor.submit(_generate_chunk, seed_sequence, size, clues, difficulty)
+            )
+            if len(pending) < 2 * jobs:
+                continue
+            yield from decode(pending.popleft().result())
+        while pending:
+            yield from decode(pending.popleft().result())
@@ -0,0 +1,172 @@
+"""Reading and writing puzzles in the line format, one puzzle per line.
+
+Each line holds the 81 cells of a puzzle in row-major order, with "." or "0"
+for an empty cell. Lines may end in "\\n" or "\\r\\n" and empty lines are
+skipped. Files are parsed in chunks straight into [N,9,9] uint8 arrays, so
+they can be passed to `solve_batch`, `solve_parallel` or `solve_stream`.
+"""
+from os import PathLike
+from sudoku import Sudoku
+from typing import *
+import numpy as np
+
+# Byte value to cell value, 255 for bytes that are not allowed in a cell.
+_CELL_VALUES = np.full(256, 255, dtype=np.uint8)
+_CELL_VALUES[ord(".")] = 0
+_CELL_VALUES[ord("0") : ord("9") + 1] = np.arange(10)
+
+_NEWLINE = ord("\n")
+_RETURN = ord("\r")
+_LINE_LENGTH = 81
+
+File = Union[str, PathLike, BinaryIO]
+
+
+def _line_name(first_line: Optional[int], index: int) -> str:
+    return "a line" if first_line is None else f"line {first_line + index}"
+
+
+def parse_lines(data: bytes, first_line: Optional[int] = None) -> np.ndarray:
+    """Parse whole lines of puzzles.
+
+    Args:
+        data: bytes, lines in the line format. The last line may omit its
+            line ending.
+        first_line: int (default=None) the number of the first line of data,
+            used to name a malformed line in the ValueError raised for it.
+
+    Returns:
+        An [N,9,9] uint8 array of puzzles with 0 for an empty cell.
+    """
+    characters = np.frombuffer(data, dtype=np.uint8)
+    stride = _LINE_LENGTH + 1
+    if (
+        len(characters) % stride == 0
+        and (characters[stride - 1 :: stride] == _NEWLINE).all()
+    ):
+        # The common case of "\n" endings and no empty lines needs no search.
+        cells = characters.reshape(-1, stride)[:, :_LINE_LENGTH]
+        lines = None
+    else:
+        ends = np.flatnonzero(characters == _NEWLINE)
+        if len(characters) and characters[-1] != _NEWLINE:
+            ends = np.append(ends, len(characters))
+        starts = np.concatenate([[0], ends[:-1] + 1])
+        carriage_return = characters[np.maximum(ends - 1, 0)] == _RETURN
+        ends = ends - (carriage_return & (ends > starts))
+        lengths = ends - starts
+        wrong = np.flatnonzero((lengths != 0) & (lengths != _LINE_LENGTH))
+        if len(wrong):
+            raise ValueError(
+                f"{_line_name(first_line, wrong[0])} has {lengths[wrong[0]]} "
+                f"cells, expected {_LINE_LENGTH}"
+            )
+        lines = np.flatnonzero(lengths != 0)
+        starts = starts[lines]
+        cells = characters[starts[:, None] + np.arange(_LINE_LENGTH)]
+
+    grids = _CELL_VALUES[cells]
+    if (grids == 255).any():
+        wrong = np.flatnonzero((grids == 255).any(axis=1))[0]
+        line = _line_name(first_line, wrong if lines is None else lines[wrong])
+        raise ValueError(f"{line} has a cell that is not '.' or 0-9")
+    return grids.reshape(-1, 9, 9)
+
+
+def format_lines(grids: Union[Sudoku, np.ndarray], blank: str = ".") -> bytes:
+    """Format puzzles as lines.
+
+    Args:
+        grids: Sudoku, 9x9 or [N,9,9] array, the puzzles to format.
+        blank: str (default=".") the character written for an empty cell.
+
+    Returns:
+        One "\\n" terminated line per puzzle.
+    """
+    assert blank in (".", "0"), f"blank '{blank}' must be '.' or '0'"
+    if isinstance(grids, Sudoku):
+        grids = grids.grid
+    grids = np.asarray(grids, dtype=np.uint8).reshape(-1, _LINE_LENGTH)
+    lines = np.empty((len(grids), _LINE_LENGTH + 1), dtype=np.uint8)
+    lines[:, :_LINE_LENGTH] = np.where(grids == 0, ord(blank), grids + ord("0"))
+    lines[:, _LINE_LENGTH] = _NEWLINE
+    return lines.tobytes()
+
+
+def _open(file: File, mode: str) -> Tuple[BinaryIO, bool]:
+    if isinstance(file, (str, PathLike)):
+        return open(file, mode), True
+    return file, False
+
+
+def read_chunks(file: File, chunk_size: int = 65536) -> Iterator[np.ndarray]:
+    """Read a file of puzzles a chunk at a time.
+
+    Args:
+        file: str, path or binary file object to read from.
+        chunk_size: int (default=65536) roughly the number of puzzles per chunk.
+
+    Yields:
+        [N,9,9] uint8 arrays of puzzles, in the order they appear in the file.
+
+    Raises:
+        ValueError: at a malformed line, naming its number in the file.
+    """
+    assert chunk_size > 0, f"chunk_size '{chunk_size}' must be positive"
+    f, close = _open(file, "rb")
+    try:
+        rest = b""
+        line = 1
+        while True:
+            data = f.read(chunk_size * (_LINE_LENGTH + 1))
+            if not data:
+                break
+            data = rest + data
+            end = data.rfind(b"\n") + 1
+            rest = data[end:]
+            if end:
+                yield parse_lines(data[:end], line)
+                line += data.count(b"\n", 0, end)
+        if rest:
+            yield parse_lines(rest, line)
+    finally:
+        if close:
+            f.close()
+
+
+def read_puzzles(file: File) -> np.ndarray:
+    """Read a whole file of puzzles into an [N,9,9] uint8 array."""
+    chunks = list(read_chunks(file))
+    if not chunks:
+        return np.zeros((0, 9, 9), dtype=np.uint8)
+    return np.concatenate(chunks)
+
+
+def iter_puzzles(file: File, chunk_size: int = 65536) -> Iterator[np.ndarray]:
+    """Read a file of puzzles one 9x9 array at a time, for `solve_stream`."""
+    for chunk in read_chunks(file, chunk_size):
+        yield from chunk
+
+
+def write_puzzles(
+    file: File,
+    grids: Union[np.ndarray, Iterable[Union[Sudoku, np.ndarray]]],
+    blank: str = ".",
+):
+    """Write puzzles to a file, one line each.
+
+    Args:
+        file: str, path or binary file object to write to.
+        grids: an [N,9,9] array, or an iterable of Sudoku, 9x9 or [N,9,9]
+            arrays such as the chunks of `read_chunks`.
+        blank: str (default=".") the character written for an empty cell.
+    """
+    if isinstance(grids, np.ndarray) and grids.ndim == 3:
+        grids = [grids]
+    f, close = _open(file, "wb")
+    try:
+        for grid in grids:
+            f.write(format_lines(grid, blank))
+    finally:
+        if close:
+            f.close()
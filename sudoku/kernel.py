@@ -0,0 +1,440 @@
+"""A compiled backtrack solver for 9x9 grids held in a flat uint8 buffer.
+
+The kernel is the backtrack engine of `sudoku.solve` written over NumPy arrays
+of candidate masks, with the same strategies applied in the same order and
+the same choice of branch cell, so it finds the same solutions in the same
+order. When numba is installed the functions are compiled with `numba.njit`
+and `solve` uses the kernel for 9x9 grids. Without numba they remain plain
+Python, which is correct but slower than the list based search, so `solve`
+keeps using that instead.
+"""
+from sudoku.sudoku import _LAYOUT
+from typing import Callable, Optional
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# True when the kernel is compiled and `solve` should use it.
+AVAILABLE = numba is not None
+
+
+def _jit(function):
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+_ALL = _LAYOUT.all_candidates
+_POPCOUNT = np.array(_LAYOUT.popcount, dtype=np.int64)
+_PEERS = np.array(_LAYOUT.peers, dtype=np.int64)
+_ROWS = np.array(_LAYOUT.rows, dtype=np.int64)
+_COLUMNS = np.array(_LAYOUT.columns, dtype=np.int64)
+_BLOCKS = np.array(_LAYOUT.blocks, dtype=np.int64)
+_UNITS = np.array(_LAYOUT.units, dtype=np.int64)
+_ROW_OF = np.array(_LAYOUT.row_of, dtype=np.int64)
+_COLUMN_OF = np.array(_LAYOUT.column_of, dtype=np.int64)
+_BLOCK_OF = np.array(_LAYOUT.block_of, dtype=np.int64)
+
+# The nodes searched between calls to the stop callback of `solve_cells`, and a
+# budget no search reaches, for when there is no callback.
+_STOP_INTERVAL = 256
+_UNBOUNDED = 2**62
+
+# The solutions `solve_cells` makes room for at first, doubled whenever full, so
+# a large limit costs nothing until that many solutions are found.
+_FIRST_SOLUTIONS = 16
+
+
+@_jit
+def _next_combination(indices, n):
+    """Advance indices to the next combination of range(n) in the order of
+    `itertools.combinations`, False when there is none."""
+    size = len(indices)
+    i = size - 1
+    while i >= 0 and indices[i] == i + n - size:
+        i -= 1
+    if i < 0:
+        return False
+    indices[i] += 1
+    for j in range(i + 1, size):
+        indices[j] = indices[j - 1] + 1
+    return True
+
+
+@_jit
+def _naked_singles(masks, peers, popcount):
+    changed = False
+    for cell in range(len(masks)):
+        mask = masks[cell]
+        if popcount[mask] != 1:
+            continue
+        for peer in peers[cell]:
+            if masks[peer] & mask:
+                masks[peer] &= ~mask
+                changed = True
+    return changed
+
+
+@_jit
+def _hidden_singles(masks, units):
+    changed = False
+    for unit in units:
+        for digit in range(len(unit)):
+            bit = 1 << digit
+            only = -1
+            count = 0
+            for cell in unit:
+                if masks[cell] & bit:
+                    count += 1
+                    if count > 1:
+                        break
+                    only = cell
+            if count == 1 and masks[only] != bit:
+                masks[only] = bit
+                changed = True
+    return changed
+
+
+@_jit
+def _naked_subsets(masks, units, popcount, size):
+    changed = False
+    unsolved = np.empty(units.shape[1], dtype=np.int64)
+    small = np.empty(units.shape[1], dtype=np.int64)
+    indices = np.empty(size, dtype=np.int64)
+    for unit in units:
+        n_unsolved = 0
+        for cell in unit:
+            if popcount[masks[cell]] > 1:
+                unsolved[n_unsolved] = cell
+                n_unsolved += 1
+        if n_unsolved <= size:
+            continue
+        n_small = 0
+        for i in range(n_unsolved):
+            if popcount[masks[unsolved[i]]] <= size:
+                small[n_small] = unsolved[i]
+                n_small += 1
+        if n_small < size:
+            continue
+        for i in range(size):
+            indices[i] = i
+        while True:
+            digits = 0
+            for i in indices:
+                digits |= masks[small[i]]
+            if popcount[digits] == size:
+                for i in range(n_unsolved):
+                    cell = unsolved[i]
+                    grouped = False
+                    for j in indices:
+                        if small[j] == cell:
+                            grouped = True
+                    if not grouped and masks[cell] & digits:
+                        masks[cell] &= ~digits
+                        changed = True
+            if not _next_combination(indices, n_small):
+                break
+    return changed
+
+
+@_jit
+def _hidden_subsets(masks, units, popcount, size):
+    changed = False
+    # The digits with 2 to size places in a unit, and those places as a mask of
+    # positions in the unit.
+    digits = np.empty(units.shape[1], dtype=np.int64)
+    places = np.empty(units.shape[1], dtype=np.int64)
+    indices = np.empty(size, dtype=np.int64)
+    for unit in units:
+        n_digits = 0
+        for digit in range(len(unit)):
+            bit = 1 << digit
+            positions = 0
+            for position in range(len(unit)):
+                if masks[unit[position]] & bit:
+                    positions |= 1 << position
+            if 1 < popcount[positions] <= size:
+                digits[n_digits] = bit
+                places[n_digits] = positions
+                n_digits += 1
+        if n_digits < size:
+            continue
+        for i in range(size):
+            indices[i] = i
+        while True:
+            positions = 0
+            bits = 0
+            for i in indices:
+                positions |= places[i]
+                bits |= digits[i]
+            if popcount[positions] == size:
+                for position in range(len(unit)):
+                    cell = unit[position]
+                    if positions >> position & 1 and masks[cell] & ~bits:
+                        masks[cell] &= bits
+                        changed = True
+            if not _next_combination(indices, n_digits):
+                break
+    return changed
+
+
+@_jit
+def _restrict_to_one_unit(masks, units, unit_of, others, own_unit_of):
+    changed = False
+    for index in range(len(units)):
+        unit = units[index]
+        for digit in range(len(unit)):
+            bit = 1 << digit
+            other = -1
+            count = 0
+            for cell in unit:
+                if masks[cell] & bit:
+                    if count == 0:
+                        other = unit_of[cell]
+                    elif unit_of[cell] != other:
+                        other = -1
+                    count += 1
+            if count < 2 or other < 0:
+                continue
+            for cell in others[other]:
+                if own_unit_of[cell] != index and masks[cell] & bit:
+                    masks[cell] &= ~bit
+                    changed = True
+    return changed
+
+
+@_jit
+def _consistent(masks, units, all_candidates):
+    for mask in masks:
+        if mask == 0:
+            return False
+    for unit in units:
+        digits = 0
+        for cell in unit:
+            digits |= masks[cell]
+        if digits != all_candidates:
+            return False
+    return True
+
+
+@_jit
+def _propagate(
+    masks,
+    peers,
+    rows,
+    columns,
+    blocks,
+    units,
+    row_of,
+    column_of,
+    block_of,
+    popcount,
+    all_candidates,
+):
+    """Apply the strategies of `sudoku.propagation.STRATEGIES`, restarting
+    from the first after every change, until none applies."""
+    while _consistent(masks, units, all_candidates):
+        if _naked_singles(masks, peers, popcount):
+            continue
+        if _hidden_singles(masks, units):
+            continue
+        by_row = _restrict_to_one_unit(masks, blocks, row_of, rows, block_of)
+        by_column = _restrict_to_one_unit(masks, blocks, column_of, columns, block_of)
+        if by_row or by_column:
+            continue
+        by_row = _restrict_to_one_unit(masks, rows, block_of, blocks, row_of)
+        by_column = _restrict_to_one_unit(masks, columns, block_of, blocks, column_of)
+        if by_row or by_column:
+            continue
+        if _naked_subsets(masks, units, popcount, 2):
+            continue
+        if _hidden_subsets(masks, units, popcount, 2):
+            continue
+        if _naked_subsets(masks, units, popcount, 3):
+            continue
+        if _hidden_subsets(masks, units, popcount, 3):
+            continue
+        return True
+    return False
+
+
+@_jit
+def _fewest_candidates(masks, popcount):
+    best = -1
+    best_count = len(masks)
+    for cell in range(len(masks)):
+        count = popcount[masks[cell]]
+        if 1 < count < best_count:
+            best = cell
+            best_count = count
+            if count == 2:
+                break
+    return best
+
+
+@_jit
+def _start(cells, nodes, peers, all_candidates):
+    """Fill row 0 of nodes with the candidate masks of cells."""
+    for cell in range(len(cells)):
+        if cells[cell] != 0:
+            nodes[0, cell] = 1 << (np.int64(cells[cell]) - 1)
+            continue
+        used = 0
+        for peer in peers[cell]:
+            if cells[peer] != 0:
+                used |= 1 << (np.int64(cells[peer]) - 1)
+        nodes[0, cell] = all_candidates & ~used
+
+
+@_jit
+def _search(
+    nodes,
+    branch,
+    untried,
+    state,
+    solutions,
+    budget,
+    peers,
+    rows,
+    columns,
+    blocks,
+    units,
+    row_of,
+    column_of,
+    block_of,
+    popcount,
+    all_candidates,
+):
+    """Continue the search for at most budget nodes or until solutions is full,
+    True once it has finished.
+
+    Node d of the current path keeps its propagated masks in row d of nodes,
+    and the branch cell and untried candidates of that node in branch and
+    untried. state holds the depth of the next node to visit and the number
+    of solutions written to solutions so far, so a search that runs out of
+    budget or room carries on from there when called again.
+    """
+    n_cells = nodes.shape[1]
+    depth = state[0]
+    found = state[1]
+    for _ in range(budget):
+        masks = nodes[depth]
+        if _propagate(
+            masks,
+            peers,
+            rows,
+            columns,
+            blocks,
+            units,
+            row_of,
+            column_of,
+            block_of,
+            popcount,
+            all_candidates,
+        ):
+            cell = _fewest_candidates(masks, popcount)
+            if cell < 0:
+                for solved in range(n_cells):
+                    mask = masks[solved]
+                    digit = 0
+                    while mask:
+                        mask >>= 1
+                        digit += 1
+                    solutions[found, solved] = digit
+                found += 1
+            else:
+                branch[depth] = cell
+                untried[depth] = masks[cell]
+                depth += 1
+
+        # Make the next guess of the deepest node with guesses left.
+        while depth > 0:
+            parent = depth - 1
+            if untried[parent] == 0:
+                depth -= 1
+                continue
+            bit = untried[parent] & -untried[parent]
+            untried[parent] &= ~bit
+            cell = branch[parent]
+            nodes[depth] = nodes[parent]
+            nodes[depth, cell] = bit
+            for peer in peers[cell]:
+                nodes[depth, peer] &= ~bit
+            break
+        else:
+            state[1] = found
+            return True
+        if found == len(solutions):
+            break
+    state[0] = depth
+    state[1] = found
+    return False
+
+
+def _valid(cells: np.ndarray) -> bool:
+    for unit in _UNITS:
+        values = cells[unit]
+        values = values[values != 0]
+        if len(np.unique(values)) != len(values):
+            return False
+    return bool((cells <= 9).all())
+
+
+def solve_cells(
+    cells: np.ndarray, limit: int = 1, stop: Optional[Callable[[], bool]] = None
+) -> np.ndarray:
+    """Solve a 9x9 puzzle held as 81 cells in row-major order.
+
+    Args:
+        cells: np.ndarray, 81 numbers or a 9x9 array, 0 for an empty cell.
+        limit: int (default=1) the number of solutions at which to stop.
+        stop: (default=None) called every _STOP_INTERVAL nodes, the search
+            ends early once it returns True.
+
+    Returns:
+        A [k,81] uint8 array of the first k <= limit solutions, in the order
+        `solve` finds them.
+    """
+    assert limit > 0, f"limit '{limit}' must be positive"
+    cells = np.ascontiguousarray(cells, dtype=np.uint8).reshape(-1)
+    assert len(cells) == 81, f"cells of length {len(cells)} must have 81 cells"
+    solutions = np.zeros((min(limit, _FIRST_SOLUTIONS), 81), dtype=np.uint8)
+    if not _valid(cells):
+        return solutions[:0]
+    nodes = np.empty((82, 81), dtype=np.int64)
+    branch = np.empty(82, dtype=np.int64)
+    untried = np.empty(82, dtype=np.int64)
+    state = np.zeros(2, dtype=np.int64)
+    _start(cells, nodes, _PEERS, _ALL)
+    budget = _UNBOUNDED if stop is None else _STOP_INTERVAL
+    while not _search(
+        nodes,
+        branch,
+        untried,
+        state,
+        solutions,
+        budget,
+        _PEERS,
+        _ROWS,
+        _COLUMNS,
+        _BLOCKS,
+        _UNITS,
+        _ROW_OF,
+        _COLUMN_OF,
+        _BLOCK_OF,
+        _POPCOUNT,
+        _ALL,
+    ):
+        if state[1] < len(solutions):
+            if stop():
+                break
+        elif len(solutions) == limit:
+            break
+        else:
+            grown = np.zeros((min(2 * len(solutions), limit), 81), dtype=np.uint8)
+            grown[: len(solutions)] = solutions
+            solutions = grown
+    return solutions[: state[1]]
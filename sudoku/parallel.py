@@ -0,0 +1,255 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sudoku import Sudoku
+from sudoku.batch import MULTIPLE_SOLUTIONS, SOLVED, TIMED_OUT, UNSOLVABLE
+from sudoku.propagation import propagate
+from sudoku.solve import solve, _branch_cell
+from time import perf_counter
+from typing import *
+import multiprocessing
+import numpy as np
+import os
+
+_GRID_SIZE = 81
+
+# Solutions found so far by all workers of a split search, see _init_split_worker.
+_found_solutions = None
+
+
+def _encode(puzzle: Union[Sudoku, np.ndarray]) -> bytes:
+    if isinstance(puzzle, Sudoku):
+        puzzle = puzzle.grid
+    encoded = np.asarray(puzzle, dtype=np.uint8).tobytes()
+    assert (
+        len(encoded) == _GRID_SIZE
+    ), f"puzzle of {len(encoded)} cells must have {_GRID_SIZE} cells"
+    return encoded
+
+
+def _solve_one(
+    grid: np.ndarray, engine: str, timeout: Optional[float], limit: int = 1
+) -> Tuple[Optional[np.ndarray], int]:
+    s = Sudoku.from_array(grid)
+    if timeout is None:
+        found = solve(s, exhaustive=True, engine=engine, limit=limit)
+    else:
+        deadline = perf_counter() + timeout
+        timed_out = False
+
+        def stop() -> bool:
+            nonlocal timed_out
+            timed_out = perf_counter() > deadline
+            return timed_out
+
+        found = solve(s, exhaustive=True, engine=engine, limit=limit, stop=stop)
+        if timed_out:
+            return None, TIMED_OUT
+    if not found:
+        return None, UNSOLVABLE
+    if len(found) > 1:
+        return found[0].grid, MULTIPLE_SOLUTIONS
+    return found[0].grid, SOLVED
+
+
+def _solve_chunk(
+    chunk: bytes, engine: str, timeout: Optional[float], limit: int = 1
+) -> Tuple[bytes, bytes]:
+    grids = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, 9, 9)
+    solutions = np.zeros_like(grids)
+    status = np.zeros(len(grids), dtype=np.uint8)
+    for index, grid in enumerate(grids):
+        solution, status[index] = _solve_one(grid, engine, timeout, limit)
+        if solution is not None:
+            solutions[index] = solution
+    return solutions.tobytes(), status.tobytes()
+
+
+def _chunks(puzzles: Iterable, chunk_size: int) -> Iterator[bytes]:
+    chunk = []
+    for puzzle in puzzles:
+        chunk.append(_encode(puzzle))
+        if len(chunk) == chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+def solve_stream(
+    puzzles: Iterable[Union[Sudoku, np.ndarray]],
+    jobs: Optional[int] = None,
+    chunk_size: int = 64,
+    timeout: Optional[float] = None,
+    engine: str = "dlx",
+    limit: int = 1,
+) -> Iterator[Tuple[np.ndarray, int]]:
+    """Solve a stream of puzzles on a pool of worker processes.
+
+    Puzzles are sent to the workers as chunks of 81-byte grids and results are
+    yielded in the order the puzzles were supplied. Only a bounded number of
+    chunks is in flight at once, so the input can be an unbounded iterator.
+
+    Args:
+        puzzles: Iterable of Sudoku or 9x9 arrays, the puzzles to solve.
+        jobs: int (default=None) the number of worker processes, the number of
+            CPUs when None.
+        chunk_size: int (default=64) the number of puzzles sent to a worker at once.
+        timeout: float (default=None) seconds allowed for each puzzle.
+        engine: str (default="dlx") the `solve` engine run by the workers.
+        limit: int (default=1) the number of solutions to search each puzzle
+            for, 2 or more to find the puzzles with several solutions.
+
+    Yields:
+        A 9x9 uint8 solution, all zeros if none was found, and a status, one of
+        SOLVED, MULTIPLE_SOLUTIONS, UNSOLVABLE or TIMED_OUT. The solution is
+        the first one found.
+    """
+    assert chunk_size > 0, f"chunk_size '{chunk_size}' must be positive"
+    assert limit > 0, f"limit '{limit}' must be positive"
+    jobs = jobs or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        chunks = _chunks(puzzles, chunk_size)
+        for chunk in chunks:
+            pending.append(executor.submit(_solve_chunk, chunk, engine, timeout, limit))
+            if len(pending) >= 2 * jobs:
+                break
+
+        while pending:
+            solutions, status = pending.popleft().result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(
+                    executor.submit(_solve_chunk, chunk, engine, timeout, limit)
+                )
+            solutions = np.frombuffer(solutions, dtype=np.uint8).reshape(-1, 9, 9)
+            for solution, code in zip(solutions, status):
+                yield solution, code
+
+
+def solve_parallel(
+    grids: np.ndarray,
+    jobs: Optional[int] = None,
+    chunk_size: int = 64,
+    timeout: Optional[float] = None,
+    engine: str = "dlx",
+    limit: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve an [N,9,9] array of puzzles on a pool of worker processes.
+
+    Takes the same arguments as `solve_stream` and returns the same arrays as
+    `solve_batch`.
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    solutions = np.zeros_like(grids)
+    status = np.zeros(len(grids), dtype=np.uint8)
+    results = solve_stream(grids, jobs, chunk_size, timeout, engine, limit)
+    for index, (solution, code) in enumerate(results):
+        solutions[index] = solution
+        status[index] = code
+    return solutions, status
+
+
+def _split(s: Sudoku, depth: int) -> Tuple[List[Sudoku], List[Sudoku]]:
+    """Expand the first depth levels of the search tree of s.
+
+    Returns:
+        The solutions found while expanding and the unsolved subproblems. The
+        subproblems differ in at least one cell, so no two share a solution.
+    """
+    solutions: List[Sudoku] = []
+    subproblems = [s.clone()]
+    for _ in range(depth):
+        expanded = []
+        for subproblem in subproblems:
+            if not propagate(subproblem):
+                continue
+            branch = _branch_cell(subproblem)
+            if branch is None:
+                if subproblem.completed:
+                    solutions.append(subproblem)
+                continue
+            row, column, entries = branch
+            for entry in entries:
+                child = subproblem.clone()
+                child[row, column] = entry
+                expanded.append(child)
+        subproblems = expanded
+    return solutions, subproblems
+
+
+def _init_split_worker(found_solutions):
+    global _found_solutions
+    _found_solutions = found_solutions
+
+
+def _solve_subproblem(grid: bytes, engine: str, limit: Optional[int]) -> List[bytes]:
+    """Search one subproblem until it is exhausted or limit solutions have been
+    found by all workers together, checking the shared count as the search
+    goes rather than only before starting."""
+
+    def found_enough() -> bool:
+        return limit is not None and _found_solutions.value >= limit
+
+    if found_enough():
+        return []
+    s = Sudoku.from_array(np.frombuffer(grid, dtype=np.uint8).reshape(9, 9))
+    found = solve(s, exhaustive=True, engine=engine, limit=limit, stop=found_enough)
+    with _found_solutions.get_lock():
+        _found_solutions.value += len(found)
+    return [solution.grid.tobytes() for solution in found]
+
+
+def solve_split(
+    s: Sudoku,
+    limit: Optional[int] = None,
+    depth: int = 2,
+    jobs: Optional[int] = None,
+    engine: str = "dlx",
+) -> List[Sudoku]:
+    """Exhaustively solve a Sudoku by searching independent branches in parallel.
+
+    The first depth levels of the search tree are expanded in this process and
+    the resulting subproblems are solved on a pool of worker processes. Once
+    limit solutions have been found workers stop the subproblems they are
+    searching and skip the rest.
+
+    Args:
+        s: Sudoku, the sudoku to solve.
+        limit: int (default=None) stop after this many solutions, find all if None.
+        depth: int (default=2) the number of branching levels to expand.
+        jobs: int (default=None) the number of worker processes, the number of
+            CPUs when None.
+        engine: str (default="dlx") the `solve` engine run by the workers.
+
+    Returns:
+        The solutions found, at most limit of them.
+    """
+    assert limit is None or limit > 0, f"limit '{limit}' must be positive"
+    assert depth >= 0, f"depth '{depth}' must not be negative"
+
+    solutions, subproblems = _split(s, depth)
+    if limit is not None and len(solutions) >= limit:
+        return solutions[:limit]
+
+    found_solutions = multiprocessing.Value("i", len(solutions))
+    with ProcessPoolExecutor(
+        max_workers=jobs or os.cpu_count() or 1,
+        initializer=_init_split_worker,
+        initargs=(found_solutions,),
+    ) as executor:
+        futures = [
+            executor.submit(_solve_subproblem, subproblem.grid.tobytes(), engine, limit)
+            for subproblem in subproblems
+        ]
+        for future in futures:
+            for grid in future.result():
+                grid = np.frombuffer(grid, dtype=np.uint8).reshape(9, 9)
+                solutions.append(Sudoku.from_array(grid))
+            if limit is not None and len(solutions) >= limit:
+                for pending in futures:
+                    pending.cancel()
+                break
+
+    return solutions[:limit]
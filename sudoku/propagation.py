@@ -0,0 +1,261 @@
+"""Constraint propagation strategies run by the solver before it branches.
+
+A strategy takes the candidate masks of the cells, in row-major order, and
+removes candidates that cannot be part of a solution. It returns True if it
+changed any mask. A mask with a single bit set is a solved cell. The size of
+the grid follows from the number of masks, 81 for a 9x9 grid.
+"""
+from itertools import combinations
+from sudoku import Sudoku
+from sudoku.sudoku import _layout_of
+from typing import *
+
+Strategy = Callable[[List[int]], bool]
+
+
+def naked_singles(candidates: List[int]) -> bool:
+    """Remove the digit of every solved cell from its peers."""
+    layout = _layout_of(candidates)
+    popcount, peers = layout.popcount, layout.peers
+    changed = False
+    for cell, mask in enumerate(candidates):
+        if popcount[mask] != 1:
+            continue
+        for peer in peers[cell]:
+            if candidates[peer] & mask:
+                candidates[peer] &= ~mask
+                changed = True
+    return changed
+
+
+def hidden_singles(candidates: List[int]) -> bool:
+    """Solve a cell that is the only place left for a digit in a unit."""
+    layout = _layout_of(candidates)
+    changed = False
+    for unit in layout.units:
+        for bit in layout.bits:
+            only = None
+            for cell in unit:
+                if candidates[cell] & bit:
+                    if only is not None:
+                        break
+                    only = cell
+            else:
+                if only is not None and candidates[only] != bit:
+                    candidates[only] = bit
+                    changed = True
+    return changed
+
+
+def _naked_subsets(candidates: List[int], size: int) -> bool:
+    """Remove the digits of size cells with only size candidates between them
+    from the rest of their unit."""
+    layout = _layout_of(candidates)
+    popcount = layout.popcount
+    changed = False
+    for unit in layout.units:
+        unsolved = [cell for cell in unit if popcount[candidates[cell]] > 1]
+        if len(unsolved) <= size:
+            continue
+        small = [cell for cell in unsolved if popcount[candidates[cell]] <= size]
+        for group in combinations(small, size):
+            digits = 0
+            for cell in group:
+                digits |= candidates[cell]
+            if popcount[digits] != size:
+                continue
+            for cell in unsolved:
+                if cell not in group and candidates[cell] & digits:
+                    candidates[cell] &= ~digits
+                    changed = True
+    return changed
+
+
+def _hidden_subsets(candidates: List[int], size: int) -> bool:
+    """Remove other candidates from size cells that are the only places left
+    for size digits in a unit."""
+    layout = _layout_of(candidates)
+    changed = False
+    for unit in layout.units:
+        places = {}
+        for bit in layout.bits:
+            cells = [cell for cell in unit if candidates[cell] & bit]
+            if 1 < len(cells) <= size:
+                places[bit] = cells
+        if len(places) < size:
+            continue
+        for bits in combinations(places, size):
+            cells = set()
+            for bit in bits:
+                cells.update(places[bit])
+            if len(cells) != size:
+                continue
+            digits = sum(bits)
+            for cell in cells:
+                if candidates[cell] & ~digits:
+                    candidates[cell] &= digits
+                    changed = True
+    return changed
+
+
+def naked_pairs(candidates: List[int]) -> bool:
+    return _naked_subsets(candidates, 2)
+
+
+def hidden_pairs(candidates: List[int]) -> bool:
+    return _hidden_subsets(candidates, 2)
+
+
+def naked_triples(candidates: List[int]) -> bool:
+    return _naked_subsets(candidates, 3)
+
+
+def hidden_triples(candidates: List[int]) -> bool:
+    return _hidden_subsets(candidates, 3)
+
+
+def _restrict_to_one_unit(
+    candidates: List[int],
+    units: Sequence[Sequence[int]],
+    unit_of: Sequence[int],
+    others: Sequence[Sequence[int]],
+    bits: Sequence[int],
+) -> bool:
+    """Where a digit's places in a unit all lie in one unit of others, remove the
+    digit from the rest of that other unit."""
+    changed = False
+    for unit in units:
+        for bit in bits:
+            cells = [cell for cell in unit if candidates[cell] & bit]
+            if len(cells) < 2:
+                continue
+            other = unit_of[cells[0]]
+            if any(unit_of[cell] != other for cell in cells):
+                continue
+            for cell in others[other]:
+                if cell not in unit and candidates[cell] & bit:
+                    candidates[cell] &= ~bit
+                    changed = True
+    return changed
+
+
+def pointing(candidates: List[int]) -> bool:
+    """Remove a digit confined to one row or column of a block from the rest of
+    that row or column."""
+    layout = _layout_of(candidates)
+    blocks, bits = layout.blocks, layout.bits
+    by_row = _restrict_to_one_unit(candidates, blocks, layout.row_of, layout.rows, bits)
+    by_column = _restrict_to_one_unit(
+        candidates, blocks, layout.column_of, layout.columns, bits
+    )
+    return by_row or by_column
+
+
+def claiming(candidates: List[int]) -> bool:
+    """Remove a digit confined to one block of a row or column from the rest of
+    that block."""
+    layout = _layout_of(candidates)
+    block_of, blocks, bits = layout.block_of, layout.blocks, layout.bits
+    rows = _restrict_to_one_unit(candidates, layout.rows, block_of, blocks, bits)
+    columns = _restrict_to_one_unit(candidates, layout.columns, block_of, blocks, bits)
+    return rows or columns
+
+
+# Cheapest first. Each time a strategy changes the candidates the search for
+# the next change restarts from the beginning of the list.
+STRATEGIES: Tuple[Strategy, ...] = (
+    naked_singles,
+    hidden_singles,
+    pointing,
+    claiming,
+    naked_pairs,
+    hidden_pairs,
+    naked_triples,
+    hidden_triples,
+)
+
+
+def _consistent(candidates: List[int]) -> bool:
+    if 0 in candidates:
+        return False
+    layout = _layout_of(candidates)
+    for unit in layout.units:
+        digits = 0
+        for cell in unit:
+            digits |= candidates[cell]
+        if digits != layout.all_candidates:
+            return False
+    return True
+
+
+def propagate(
+    s: Sudoku,
+    strategies: Sequence[Strategy] = STRATEGIES,
+    fired: Optional[Dict[str, int]] = None,
+    filled: Optional[List[Tuple[int, int]]] = None,
+) -> bool:
+    """Apply strategies until none of them changes the candidates.
+
+    Every cell left with a single candidate is filled in s. If a contradiction
+    is found s may be left partially filled.
+
+    Args:
+        s: Sudoku, the sudoku to fill in.
+        strategies: Sequence of strategies (default=STRATEGIES) applied in order.
+        fired: dict (default=None) if given, the number of times each strategy
+            changed the candidates is added to it, keyed by strategy name.
+        filled: list (default=None) if given, the (row, column) of every cell
+            filled in is appended to it, so that they can be cleared again.
+
+    Returns:
+        False if s has been found to have no solution, True otherwise.
+    """
+    if not s.ok:
+        return False
+
+    candidates = [
+        s.candidate_mask(row, column)
+        for row in range(s.size)
+        for column in range(s.size)
+    ]
+    if not propagate_masks(candidates, strategies, fired):
+        return False
+    popcount = _layout_of(candidates).popcount
+    for cell, mask in enumerate(candidates):
+        row, column = divmod(cell, s.size)
+        if s[row, column] == 0 and popcount[mask] == 1:
+            s[row, column] = mask.bit_length()
+            if filled is not None:
+                filled.append((row, column))
+    return s.ok
+
+
+def propagate_masks(
+    candidates: List[int],
+    strategies: Sequence[Strategy],
+    fired: Optional[Dict[str, int]] = None,
+) -> bool:
+    """Apply strategies to candidate masks until none of them changes them.
+
+    Unlike `propagate` this works on the masks alone, without a Sudoku.
+
+    Args:
+        candidates: list of the candidate masks of the cells in row-major order,
+            changed in place.
+        strategies: Sequence of strategies applied in order.
+        fired: dict (default=None) if given, the number of times each strategy
+            changed the candidates is added to it, keyed by strategy name.
+
+    Returns:
+        False if a contradiction was found, True otherwise.
+    """
+    while _consistent(candidates):
+        for strategy in strategies:
+            if strategy(candidates):
+                if fired is not None:
+                    name = strategy.__name__
+                    fired[name] = fired.get(name, 0) + 1
+                break
+        else:
+            return True
+    return False
@@ -0,0 +1,163 @@
+"""Difficulty ratings from the techniques a person would need to solve a puzzle.
+
+A puzzle is solved with a ladder of techniques, the propagation strategies of
+`sudoku.propagation` from easiest to hardest. Each step applies the easiest
+technique that makes progress and starts again from the bottom, so a harder
+technique is only used when none of the easier ones help. When the ladder
+runs out the rest is left to search.
+
+The score is the weight of the hardest technique used. A puzzle that needs a
+search scores SEARCH_WEIGHT plus log2 of the number of search nodes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from sudoku import Sudoku
+from sudoku.propagation import STRATEGIES, propagate_masks
+from sudoku.solve import SearchStats, solve
+from typing import *
+import math
+import numpy as np
+
+# The weight of each technique of the ladder, in the order they are tried.
+WEIGHTS: Dict[str, float] = {
+    "naked_singles": 1.0,
+    "hidden_singles": 1.5,
+    "pointing": 2.6,
+    "claiming": 2.8,
+    "naked_pairs": 3.0,
+    "hidden_pairs": 3.4,
+    "naked_triples": 3.6,
+    "hidden_triples": 4.0,
+}
+SEARCH = "search"
+SEARCH_WEIGHT = 10.0
+
+# The techniques and search from easiest to hardest, see `rate_batch`.
+LEVELS: Tuple[str, ...] = tuple(strategy.__name__ for strategy in STRATEGIES) + (
+    SEARCH,
+)
+
+assert set(WEIGHTS) == set(LEVELS[:-1]), "every strategy must have a weight"
+
+
+class Rating:
+    """The difficulty of a puzzle, returned by `rate`.
+
+    Attributes:
+        hardest: the name of the hardest technique needed, SEARCH if the
+            ladder could not solve the puzzle, None if it needed none.
+        steps: the number of steps taken with each technique, keyed by name.
+        nodes: the number of search nodes visited after the ladder ran out,
+            0 if there was no search.
+        score: the difficulty as a number, higher is harder.
+    """
+
+    def __init__(
+        self, hardest: Optional[str], steps: Dict[str, int], nodes: int, score: float
+    ):
+        self.hardest = hardest
+        self.steps = steps
+        self.nodes = nodes
+        self.score = score
+
+    def __repr__(self):
+        return f"Rating({self.as_dict()})"
+
+    @property
+    def level(self) -> int:
+        """The index of hardest in LEVELS, -1 if no technique was needed."""
+        return -1 if self.hardest is None else LEVELS.index(self.hardest)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hardest": self.hardest,
+            "steps": dict(self.steps),
+            "nodes": self.nodes,
+            "score": self.score,
+        }
+
+
+def rate(s: Sudoku) -> Rating:
+    """Rate the difficulty of a Sudoku.
+
+    Args:
+        s: Sudoku, the puzzle to rate. It is not modified.
+
+    Returns:
+        The Rating of s.
+
+    Raises:
+        ValueError: if s has no solution.
+    """
+    if not s.ok:
+        raise ValueError("the puzzle has no solution")
+    candidates = [
+        s.candidate_mask(row, column)
+        for row in range(s.size)
+        for column in range(s.size)
+    ]
+    steps: Dict[str, int] = {}
+    if not propagate_masks(candidates, STRATEGIES, steps):
+        raise ValueError("the puzzle has no solution")
+
+    used = [name for name in LEVELS[:-1] if steps.get(name)]
+    hardest = used[-1] if used else None
+    score = WEIGHTS[hardest] if hardest is not None else 0.0
+
+    nodes = 0
+    popcount = s._layout.popcount
+    if any(popcount[mask] > 1 for mask in candidates):
+        grid = np.array(
+            [mask.bit_length() if popcount[mask] == 1 else 0 for mask in candidates]
+        )
+        stats = SearchStats()
+        if not solve(Sudoku.from_array(grid.reshape(s.size, s.size)), stats=stats):
+            raise ValueError("the puzzle has no solution")
+        nodes = stats.nodes
+        hardest = SEARCH
+        score = SEARCH_WEIGHT + math.log2(nodes)
+    return Rating(hardest, steps, nodes, score)
+
+
+def _rate_chunk(chunk: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    scores = np.full(len(chunk), np.nan)
+    levels = np.full(len(chunk), -2, dtype=np.int8)
+    for index, grid in enumerate(chunk):
+        try:
+            rating = rate(Sudoku.from_array(grid))
+        except ValueError:
+            continue
+        scores[index] = rating.score
+        levels[index] = rating.level
+    return scores, levels
+
+
+def rate_batch(
+    grids: np.ndarray, jobs: int = 1, chunk_size: int = 64
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Rate an [N,9,9] array of puzzles.
+
+    Args:
+        grids: np.ndarray, [N,9,9] puzzles with 0 for an empty cell.
+        jobs: int (default=1) the number of worker processes, none if 1.
+        chunk_size: int (default=64) the number of puzzles sent to a worker at once.
+
+    Returns:
+        An [N] float array of scores, NaN for a puzzle with no solution, and an
+        [N] int8 array of the index in LEVELS of the hardest technique of each
+        puzzle, -1 if it needed none and -2 if it has no solution.
+    """
+    assert jobs > 0, f"jobs '{jobs}' must be positive"
+    assert chunk_size > 0, f"chunk_size '{chunk_size}' must be positive"
+    grids = np.asarray(grids, dtype=np.uint8)
+    chunks = [
+        grids[start : start + chunk_size] for start in range(0, len(grids), chunk_size)
+    ]
+    if jobs == 1:
+        results = [_rate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_rate_chunk, chunks))
+    if not results:
+        return np.zeros(0), np.zeros(0, dtype=np.int8)
+    scores, levels = zip(*results)
+    return np.concatenate(scores), np.concatenate(levels)
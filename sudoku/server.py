@@ -0,0 +1,479 @@
+"""An asyncio solving service in front of a pool of solver processes.
+
+Run with `python -m sudoku.server`. Solving is CPU bound, so the event loop
+only parses requests and hands puzzles to worker processes, in batches of
+whatever requests are waiting when a worker becomes free.
+
+Two protocols are served on the same port, told apart by the first line:
+
+- Lines: each line holds a puzzle in the line format of `sudoku.io`,
+  optionally followed by a space and a timeout in seconds. Each is answered,
+  in order, with a line "solved <solution>", "unsolvable", "timed-out" or
+  "error <message>". Puzzles are solved concurrently, up to a bounded number
+  per connection.
+- HTTP: `POST /solve` with puzzle lines as the body, optionally with a
+  timeout as `/solve?timeout=<seconds>`, answered with the same lines.
+
+The queue of waiting puzzles is bounded, so when it is full reading from
+clients pauses until workers catch up. Each puzzle has a deadline, and a
+search still running when its deadline passes or its client goes away is
+stopped by the worker, which polls for it as it searches.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sudoku import Sudoku
+from sudoku.batch import SOLVED, TIMED_OUT, UNSOLVABLE
+from sudoku.io import format_lines, parse_lines
+from sudoku.parallel import _encode
+from sudoku.solve import solve
+from typing import *
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import multiprocessing
+import numpy as np
+import os
+import sys
+import time
+
+STATUS_NAMES = {SOLVED: "solved", UNSOLVABLE: "unsolvable", TIMED_OUT: "timed-out"}
+
+# Status of a search stopped because its request was cancelled.
+_CANCELLED = 255
+
+_HTTP_METHODS = (b"GET ", b"POST ", b"PUT ", b"DELETE ", b"HEAD ")
+
+# Cancellation flag of each request slot, shared with the workers, see _init_worker.
+_cancelled = None
+
+
+def _init_worker(cancelled):
+    global _cancelled
+    _cancelled = cancelled
+
+
+def _solve_one(
+    grid: np.ndarray, engine: str, slot: int, deadline: Optional[float]
+) -> Tuple[Optional[np.ndarray], int]:
+    # The status of a search stopped early, None while it runs.
+    stopped = None
+
+    def stop() -> bool:
+        nonlocal stopped
+        if _cancelled[slot]:
+            stopped = _CANCELLED
+        elif deadline is not None and time.time() > deadline:
+            stopped = TIMED_OUT
+        return stopped is not None
+
+    if stop():
+        return None, stopped
+    found = solve(Sudoku.from_array(grid), engine=engine, stop=stop)
+    if stopped is not None:
+        return None, stopped
+    if not found:
+        return None, UNSOLVABLE
+    return found[0].grid, SOLVED
+
+
+def _solve_requests(
+    chunk: bytes, engine: str, slots: List[int], deadlines: List[Optional[float]]
+) -> Tuple[bytes, bytes]:
+    grids = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, 9, 9)
+    solutions = np.zeros_like(grids)
+    status = np.zeros(len(grids), dtype=np.uint8)
+    for index, grid in enumerate(grids):
+        solution, status[index] = _solve_one(
+            grid, engine, slots[index], deadlines[index]
+        )
+        if solution is not None:
+            solutions[index] = solution
+    return solutions.tobytes(), status.tobytes()
+
+
+class _Request:
+    __slots__ = ("grid", "deadline", "future", "slot")
+
+    def __init__(self, grid: bytes, deadline: Optional[float], future: asyncio.Future):
+        self.grid = grid
+        self.deadline = deadline
+        self.future = future
+        self.slot: Optional[int] = None
+
+
+class SolverService:
+    """Solves puzzles submitted from coroutines on a pool of worker processes.
+
+    Use it as an async context manager, which starts and stops the workers:
+
+        async with SolverService(jobs=4) as service:
+            solution, status = await service.solve(puzzle, timeout=1.0)
+
+    Args:
+        jobs: int (default=None) the number of worker processes, the number of
+            CPUs when None.
+        engine: str (default="dlx") the `solve` engine run by the workers.
+        queue_size: int (default=1024) the number of puzzles that may wait for
+            a worker. `solve` waits for room when the queue is full.
+        batch_size: int (default=64) the most puzzles sent to a worker at once.
+        timeout: float (default=None) seconds allowed for a puzzle that is
+            submitted without a timeout, unlimited if None.
+    """
+
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        engine: str = "dlx",
+        queue_size: int = 1024,
+        batch_size: int = 64,
+        timeout: Optional[float] = None,
+    ):
+        assert queue_size > 0, f"queue_size '{queue_size}' must be positive"
+        assert batch_size > 0, f"batch_size '{batch_size}' must be positive"
+        self.jobs = jobs or os.cpu_count() or 1
+        self.engine = engine
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.timeout = timeout
+        # The number of batches sent to the workers so far.
+        self.batches = 0
+        self._executor = None
+
+    async def __aenter__(self) -> "SolverService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Start the worker processes and the dispatch of queued puzzles."""
+        # Two batches per worker are in flight, so a worker never waits for
+        # the event loop to send its next batch.
+        in_flight = 2 * self.jobs
+        self._queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._capacity = asyncio.Semaphore(in_flight)
+        self._flags = multiprocessing.Array("b", in_flight * self.batch_size)
+        self._free_slots = deque(range(in_flight * self.batch_size))
+        self._running: Set[asyncio.Task] = set()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=_init_worker, initargs=(self._flags,)
+        )
+        # Forked workers would hold on to the sockets of connections open when
+        # they start, so they are all started before serving any.
+        await asyncio.get_running_loop().run_in_executor(self._executor, int)
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def close(self):
+        """Stop the workers. Puzzles still waiting are cancelled."""
+        if self._executor is None:
+            return
+        self._dispatcher.cancel()
+        for slot in range(len(self._flags)):
+            self._flags[slot] = 1
+        for task in list(self._running):
+            task.cancel()
+        while not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self._executor = None
+
+    async def solve(
+        self, puzzle: Union[Sudoku, np.ndarray], timeout: Optional[float] = None
+    ) -> Tuple[np.ndarray, int]:
+        """Solve a puzzle on the workers.
+
+        Cancelling the calling task stops the search of the puzzle.
+
+        Args:
+            puzzle: Sudoku or 9x9 array, the puzzle to solve.
+            timeout: float (default=None) seconds allowed for the puzzle,
+                including time spent waiting in the queue. The timeout of the
+                service if None.
+
+        Returns:
+            A 9x9 uint8 solution, all zeros if none was found, and a status,
+            one of SOLVED, UNSOLVABLE or TIMED_OUT.
+        """
+        assert self._executor is not None, "the service has not been started"
+        if timeout is None:
+            timeout = self.timeout
+        deadline = None if timeout is None else time.time() + timeout
+        request = _Request(
+            _encode(puzzle), deadline, asyncio.get_running_loop().create_future()
+        )
+        await self._queue.put(request)
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            if request.slot is not None:
+                self._flags[request.slot] = 1
+            raise
+
+    async def _dispatch(self):
+        while True:
+            await self._capacity.acquire()
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            now = time.time()
+            requests = []
+            for request in batch:
+                if request.future.done():
+                    continue
+                if request.deadline is not None and request.deadline <= now:
+                    request.future.set_result(
+                        (np.zeros((9, 9), dtype=np.uint8), TIMED_OUT)
+                    )
+                    continue
+                request.slot = self._free_slots.popleft()
+                self._flags[request.slot] = 0
+                requests.append(request)
+
+            if not requests:
+                self._capacity.release()
+                continue
+            task = asyncio.ensure_future(self._run(requests))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, requests: List[_Request]):
+        try:
+            self.batches += 1
+            solutions, status = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                _solve_requests,
+                b"".join(request.grid for request in requests),
+                self.engine,
+                [request.slot for request in requests],
+                [request.deadline for request in requests],
+            )
+        except BaseException as error:
+            for request in requests:
+                if not request.future.done():
+                    if isinstance(error, asyncio.CancelledError):
+                        request.future.cancel()
+                    else:
+                        request.future.set_exception(error)
+            raise
+        else:
+            solutions = np.frombuffer(solutions, dtype=np.uint8).reshape(-1, 9, 9)
+            for request, solution, code in zip(requests, solutions, status):
+                if request.future.done():
+                    continue
+                if code == _CANCELLED:
+                    request.future.cancel()
+                else:
+                    request.future.set_result((solution, int(code)))
+        finally:
+            # The slot goes to another request, so a late cancellation of this
+            # one must not set its flag.
+            for request in requests:
+                self._free_slots.append(request.slot)
+                request.slot = None
+            self._capacity.release()
+
+    async def answer(self, line: bytes, timeout: Optional[float] = None) -> bytes:
+        """The answer line to a line of the line protocol."""
+        puzzle, _, requested = line.strip().partition(b" ")
+        try:
+            if requested:
+                timeout = float(requested)
+            grids = parse_lines(puzzle)
+            if len(grids) != 1:
+                raise ValueError("a line must hold one puzzle")
+        except ValueError as error:
+            return f"error {error}\n".encode()
+        solution, status = await self.solve(grids[0], timeout)
+        if status != SOLVED:
+            return f"{STATUS_NAMES[status]}\n".encode()
+        return f"{STATUS_NAMES[status]} ".encode() + format_lines(solution)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Serve a connection, for `asyncio.start_server`."""
+        answers: Set[asyncio.Task] = set()
+        try:
+            first = await reader.readline()
+            if first.startswith(_HTTP_METHODS):
+                await self._handle_http(first, reader, writer, answers)
+            else:
+                await self._handle_lines(first, reader, writer, answers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Stop the searches of a client that went away.
+            for task in answers:
+                task.cancel()
+            writer.close()
+
+    def _answer_task(self, line: bytes, timeout: Optional[float], answers: Set):
+        task = asyncio.ensure_future(self.answer(line, timeout))
+        answers.add(task)
+        task.add_done_callback(answers.discard)
+        return task
+
+    async def _handle_lines(
+        self,
+        line: bytes,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        answers: Set[asyncio.Task],
+    ):
+        # Answers are written in order by a separate task, so lines can be read
+        # while earlier ones are solved, up to batch_size at a time.
+        pending: asyncio.Queue = asyncio.Queue(self.batch_size)
+
+        async def write_answers():
+            while True:
+                task = await pending.get()
+                if task is None:
+                    return
+                writer.write(await task)
+                await writer.drain()
+
+        writing = asyncio.ensure_future(write_answers())
+
+        async def put(task: Optional[asyncio.Task]) -> bool:
+            # False if writing stopped, as it does when the client goes away.
+            putting = asyncio.ensure_future(pending.put(task))
+            await asyncio.wait({putting, writing}, return_when=asyncio.FIRST_COMPLETED)
+            if not putting.done():
+                putting.cancel()
+                return False
+            return True
+
+        try:
+            while line:
+                if line.strip() and not await put(
+                    self._answer_task(line, None, answers)
+                ):
+                    break
+                line = await reader.readline()
+            if await put(None):
+                await writing
+            else:
+                # Raises the error that stopped writing.
+                writing.result()
+        finally:
+            writing.cancel()
+
+    async def _handle_http(
+        self,
+        request_line: bytes,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        answers: Set[asyncio.Task],
+    ):
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length < 0:
+                raise ValueError("negative Content-Length")
+        except ValueError:
+            await self._write_http(writer, "400 Bad Request", b"malformed request\n")
+            return
+        body = await reader.readexactly(length)
+
+        url = urlsplit(target)
+        if url.path != "/solve":
+            status, content = "404 Not Found", b"not found\n"
+        elif method != "POST":
+            status, content = "405 Method Not Allowed", b"use POST\n"
+        else:
+            try:
+                timeout = parse_qs(url.query).get("timeout")
+                timeout = float(timeout[0]) if timeout else None
+            except ValueError:
+                status, content = "400 Bad Request", b"timeout must be a number\n"
+            else:
+                tasks = [
+                    self._answer_task(line, timeout, answers)
+                    for line in body.splitlines()
+                    if line.strip()
+                ]
+                status, content = "200 OK", b"".join(await asyncio.gather(*tasks))
+        await self._write_http(writer, status, content)
+
+    async def _write_http(
+        self, writer: asyncio.StreamWriter, status: str, content: bytes
+    ):
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: text/plain\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + content
+        )
+        await writer.drain()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    started: Optional[Callable[[asyncio.AbstractServer], None]] = None,
+    **options,
+):
+    """Serve the line protocol and HTTP until cancelled.
+
+    Args:
+        host: str (default="127.0.0.1") the address to listen on.
+        port: int (default=8765) the port to listen on, any free port if 0.
+        started: (default=None) called with the server once it listens.
+        options: the arguments of `SolverService`.
+    """
+    async with SolverService(**options) as service:
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        async with server:
+            if started is not None:
+                started(server)
+            await server.serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sudoku.server", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--jobs", type=int, help="default: the number of CPUs")
+    parser.add_argument("--engine", choices=("backtrack", "dlx"), default="dlx")
+    parser.add_argument("--queue-size", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument(
+        "--timeout", type=float, help="default seconds allowed per puzzle"
+    )
+    args = parser.parse_args(argv)
+
+    def started(server: asyncio.AbstractServer):
+        for socket in server.sockets:
+            print(f"listening on {socket.getsockname()}", file=sys.stderr)
+
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                started,
+                jobs=args.jobs,
+                engine=args.engine,
+                queue_size=args.queue_size,
+                batch_size=args.batch_size,
+                timeout=args.timeout,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
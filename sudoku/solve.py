@@ -1,68 +1,477 @@
+from itertools import islice
 from sudoku import Sudoku
+from sudoku import dlx
+from sudoku import kernel
+from sudoku.cache import DiskCache
+from sudoku.propagation import STRATEGIES, Strategy, naked_singles, propagate_masks
+from time import perf_counter
 from typing import *
+import json
 import numpy as np
 
-RNG_2_10 = np.array([2, 3, 4, 5, 6, 7, 8, 9])
-RNG_9 = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8])
+ENGINES = ("backtrack", "dlx")
 
 
-def solve(s: Sudoku, exhaustive: bool = False):
-    solutions: List[Sudoku] = []
-    _rsolve(
-        s.clone(), solutions=solutions, explored_branches=set(), exhaustive=exhaustive
-    )
-    return solutions
+class SearchStats:
+    """Counts and timings of the work done by searches, filled in by `solve`.
 
+    A SearchStats can be passed to many calls, which all add to it.
 
-def _complete_unambiguous_cells(s: Sudoku) -> bool:
-    updated = False
-    for row in RNG_9:
-        for column in RNG_9:
-            if s[row, column] != 0:
-                continue
-            possible_entries = s.possible_entries(row, column)
-            if len(possible_entries) == 1:
-                s[row, column] = possible_entries[0]
-                updated = True
-    return updated
+    Attributes:
+        nodes: the number of search states visited.
+        max_depth: the largest number of guesses in force at once.
+        backtracks: the number of guesses undone.
+        solutions: the number of solutions found.
+        clones: the number of Sudoku copied by the search.
+        cache_hits: the number of puzzles answered by a `SolutionCache`.
+        cache_misses: the number of puzzles a `SolutionCache` had to solve.
+        fired: the number of times each propagation strategy changed the
+            candidates, keyed by strategy name.
+        times: seconds spent per phase. "total" covers whole searches,
+            "propagate" and "branch" the propagation and the choice of the
+            branch cell of the backtrack engine.
+
+    Args:
+        on_branch: (default=None) called with the depth and the number of
+            options whenever the search branches.
+        on_backtrack: (default=None) called with the depth of every guess undone.
+        on_solution: (default=None) called with the depth of every solution found.
+    """
+
+    def __init__(
+        self,
+        on_branch: Optional[Callable[[int, int], None]] = None,
+        on_backtrack: Optional[Callable[[int], None]] = None,
+        on_solution: Optional[Callable[[int], None]] = None,
+    ):
+        self.nodes = 0
+        self.max_depth = 0
+        self.backtracks = 0
+        self.solutions = 0
+        self.clones = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.fired: Dict[str, int] = {}
+        self.times: Dict[str, float] = {}
+        self.on_branch = on_branch
+        self.on_backtrack = on_backtrack
+        self.on_solution = on_solution
+
+    def __repr__(self):
+        return f"SearchStats({self.as_dict()})"
+
+    def add_time(self, phase: str, seconds: float):
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+
+    def visit(self, depth: int):
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def branch(self, depth: int, options: int):
+        if self.on_branch is not None:
+            self.on_branch(depth, options)
 
+    def backtrack(self, depth: int):
+        self.backtracks += 1
+        if self.on_backtrack is not None:
+            self.on_backtrack(depth)
 
-def _rsolve(
+    def solution(self, depth: int):
+        self.solutions += 1
+        if self.on_solution is not None:
+            self.on_solution(depth)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The counts and timings as a dict, for exporting as metrics."""
+        return {
+            "nodes": self.nodes,
+            "max_depth": self.max_depth,
+            "backtracks": self.backtracks,
+            "solutions": self.solutions,
+            "clones": self.clones,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "fired": dict(self.fired),
+            "times": dict(self.times),
+        }
+
+
+def solve(
     s: Sudoku,
-    *,
-    solutions: List[Sudoku],
-    explored_branches: Set[Sudoku],
-    exhaustive: bool,
+    exhaustive: bool = False,
+    engine: str = "backtrack",
+    limit: Optional[int] = None,
+    strategies: Sequence[Strategy] = STRATEGIES,
+    fired: Optional[Dict[str, int]] = None,
+    stats: Optional[SearchStats] = None,
+    cache: Optional[DiskCache] = None,
+    stop: Optional[Callable[[], bool]] = None,
 ):
-    # Fill in unambiguous cells
-    while _complete_unambiguous_cells(s):
-        ...
-    if s.completed:
-        solutions.append(s)
-        if not exhaustive:
+    """Solve a Sudoku.
+
+    Args:
+        s: Sudoku, the sudoku to solve. It is not modified.
+        exhaustive: bool (default=False) find every solution, not just the first.
+        engine: str (default="backtrack") one of ENGINES, the search algorithm.
+            The backtrack engine runs in `sudoku.kernel` when numba is
+            installed, with the same results.
+        limit: int (default=None) stop an exhaustive search after this many solutions.
+        strategies: Sequence (default=STRATEGIES) the propagation strategies the
+            backtrack engine applies before each branch.
+        fired: dict (default=None) if given, the number of times each strategy
+            changed the candidates is added to it, keyed by strategy name.
+        stats: SearchStats (default=None) if given, the work done by the search
+            is added to it and its hooks are called. stats.fired is used when
+            fired is None.
+        cache: DiskCache (default=None) if given, puzzles found in it are not
+            searched and puzzles that are searched are added to it.
+        stop: (default=None) called as the search goes, which ends early with
+            the solutions found so far once it returns True. A stopped search
+            is not added to cache.
+
+    Returns:
+        A list of solutions, empty if there are none.
+    """
+    assert engine in ENGINES, f"engine '{engine}' must be one of {ENGINES}"
+    assert limit is None or limit > 0, f"limit '{limit}' must be positive"
+
+    # An exhaustive search stops only when limit solutions have been found.
+    if not exhaustive:
+        limit = 1
+
+    if cache is not None:
+        return _solve_cached(s, cache, engine, limit, strategies, fired, stats, stop)
+
+    if stats is not None:
+        start = perf_counter()
+        if fired is None:
+            fired = stats.fired
+
+    if engine == "dlx":
+        solutions = dlx.solve(s, limit=limit, stats=stats, stop=stop)
+    elif _use_kernel(s, limit, strategies, fired, stats):
+        solutions = [
+            Sudoku.from_array(cells.reshape(9, 9))
+            for cells in kernel.solve_cells(s.grid, limit, stop)
+        ]
+    else:
+        found = _search(s, strategies, fired, stats, stop=stop)
+        solutions = [solution for solution, _ in islice(found, limit)]
+
+    if stats is not None:
+        stats.add_time("total", perf_counter() - start)
+    return solutions
+
+
+def _solve_cached(
+    s: Sudoku,
+    cache: DiskCache,
+    engine: str,
+    limit: Optional[int],
+    strategies: Sequence[Strategy],
+    fired: Optional[Dict[str, int]],
+    stats: Optional[SearchStats],
+    stop: Optional[Callable[[], bool]],
+) -> List[Sudoku]:
+    """Solve like `solve`, answering from cache when it holds enough.
+
+    A miss searches for at least two solutions, so that the cache can record
+    whether the first is unique and answer exhaustive searches of unique
+    puzzles later.
+    """
+    entry = cache.get(s)
+    if entry is not None:
+        solution, unique = entry
+        if solution is None or unique or limit == 1:
+            if stats is not None:
+                stats.cache_hits += 1
+            return [] if solution is None else [Sudoku.from_array(solution)]
+    if stats is not None:
+        stats.cache_misses += 1
+
+    search_limit = None if limit is None else max(limit, 2)
+    found = solve(s, True, engine, search_limit, strategies, fired, stats, stop=stop)
+    if stop is None or not stop():
+        cache.put(s, found[0] if found else None, len(found) == 1)
+    return found[:limit]
+
+
+def _use_kernel(
+    s: Sudoku,
+    limit: Optional[int],
+    strategies: Sequence[Strategy],
+    fired: Optional[Dict[str, int]],
+    stats: Optional[SearchStats],
+) -> bool:
+    """Whether the compiled kernel can stand in for the backtrack search.
+
+    The kernel solves 9x9 grids with the default strategies, stopping at limit
+    solutions, and does not record what the search did.
+    """
+    return (
+        kernel.AVAILABLE
+        and s.size == 9
+        and limit is not None
+        and tuple(strategies) == STRATEGIES
+        and fired is None
+        and stats is None
+    )
+
+
+def count_solutions(s: Sudoku, limit: Optional[int] = 2) -> int:
+    """Count the solutions of a Sudoku, stopping as soon as limit are found.
+
+    Args:
+        s: Sudoku, the sudoku to solve.
+        limit: int (default=2) the count at which to stop, count all if None.
+
+    Returns:
+        The number of solutions, at most limit.
+    """
+    assert limit is None or limit > 0, f"limit '{limit}' must be positive"
+    return dlx.count_solutions(s, limit=limit)
+
+
+def has_unique_solution(s: Sudoku) -> bool:
+    return count_solutions(s, limit=2) == 1
+
+
+def _branch_cell(s: Sudoku) -> Optional[Tuple[int, int, Tuple[int, ...]]]:
+    """The empty cell with the fewest candidates, found in a single pass.
+
+    Returns:
+        The row, column and candidates of the cell, None if the grid is full.
+    """
+    popcount, mask_entries = s._layout.popcount, s._layout.mask_entries
+    best = None
+    best_count = s.size + 1
+    for cell, number in enumerate(s.grid.ravel().tolist()):
+        if number != 0:
+            continue
+        row, column = divmod(cell, s.size)
+        mask = s.candidate_mask(row, column)
+        if popcount[mask] < best_count:
+            best = (row, column, mask_entries[mask])
+            best_count = popcount[mask]
+            if best_count <= 2:
+                break
+    return best
+
+
+def _fewest_candidates(candidates: List[int], popcount: Sequence[int]) -> Optional[int]:
+    """The unsolved cell with the fewest candidates, None if every cell is solved."""
+    best = None
+    best_count = len(candidates)
+    for cell, mask in enumerate(candidates):
+        count = popcount[mask]
+        if 1 < count < best_count:
+            best = cell
+            best_count = count
+            if count == 2:
+                break
+    return best
+
+
+def _search(
+    s: Sudoku,
+    strategies: Sequence[Strategy],
+    fired: Optional[Dict[str, int]],
+    stats: Optional[SearchStats],
+    path: Optional[Sequence[int]] = None,
+    stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[Sudoku, List[int]]]:
+    """Depth-first search with an explicit stack of guesses.
+
+    The search works on the candidate masks of the cells rather than on s,
+    which is not modified. A node starts from the propagated masks of its
+    parent with one guess applied, so the eliminations made higher up the tree
+    are kept instead of being worked out again.
+
+    Args:
+        path: (default=None) the path of a solution found earlier, to resume
+            the search after it.
+        stop: (default=None) called at every node, the search ends once it
+            returns True.
+
+    Yields:
+        Each solution and its path, the number of candidates of the branch cell
+        tried so far at each depth. The search from a path continues after the
+        solution at the end of that path.
+    """
+    if not s.ok:
+        return
+    size, layout = s.size, s._layout
+    candidates = [
+        s.candidate_mask(row, column) for row in range(size) for column in range(size)
+    ]
+
+    # Solved cells must be removed from their peers, as filling them into a
+    # grid would, even when the strategies do not do it themselves.
+    settle = naked_singles not in strategies
+
+    # Guesses still to be replayed to get back to the end of path.
+    replay = list(reversed(path)) if path is not None else None
+
+    # Each frame is the propagated masks of a node, its branch cell, the
+    # candidates of that cell and the index of the next one to try.
+    stack: List[list] = []
+    while True:
+        if stop is not None and stop():
             return
+        depth = len(stack)
+        if stats is not None:
+            stats.visit(depth)
+            start = perf_counter()
+        consistent = propagate_masks(candidates, strategies, fired)
+        if consistent and settle:
+            consistent = propagate_masks(candidates, (naked_singles,))
+        if stats is not None:
+            stats.add_time("propagate", perf_counter() - start)
 
-    # Branch and solve for ambiguous cells
-    for max_branches in RNG_2_10:
-        for row in RNG_9:
-            for column in RNG_9:
-                if s[row, column] != 0:
-                    continue
-                possible_entries = s.possible_entries(row, column)
-                if len(possible_entries) > max_branches:
+        if consistent:
+            if stats is not None:
+                start = perf_counter()
+            cell = _fewest_candidates(candidates, layout.popcount)
+            if stats is not None:
+                stats.add_time("branch", perf_counter() - start)
+
+            if cell is None:
+                if replay is not None:
+                    if replay:
+                        raise ValueError("the path does not lead to a solution")
+                    # The solution the path ends at was found before.
+                    replay = None
+                else:
+                    # Every unit holds each digit exactly once.
+                    grid = np.array([mask.bit_length() for mask in candidates])
+                    if stats is not None:
+                        stats.clones += 1
+                        stats.solution(depth)
+                    yield Sudoku.from_array(grid.reshape(size, size)), [
+                        frame[3] for frame in stack
+                    ]
+            else:
+                # Every solution has one of the candidates of the branch cell,
+                # so the branches are disjoint and need no deduplication.
+                entries = layout.mask_entries[candidates[cell]]
+                if stats is not None:
+                    stats.branch(depth, len(entries))
+                stack.append([candidates, cell, entries, 0])
+                if replay:
+                    index = replay.pop()
+                    if not 0 < index <= len(entries):
+                        raise ValueError("the path does not match the search")
+                    stack[-1][3] = index
+                    candidates = _guess(
+                        candidates, cell, entries[index - 1], layout.peers
+                    )
                     continue
-                for entry in possible_entries:
-                    if solutions and not exhaustive:
-                        return
-                    s2 = s.clone()
-                    s2[row, column] = entry
-                    if s2 in explored_branches:
-                        continue
-                    else:
-                        explored_branches.add(s2)
-                        _rsolve(
-                            s2,
-                            solutions=solutions,
-                            explored_branches=explored_branches,
-                            exhaustive=exhaustive,
-                        )
+        elif replay is not None:
+            raise ValueError("the path does not lead to a solution")
+
+        # Make the next guess of the deepest node with guesses left.
+        while stack:
+            frame = stack[-1]
+            parent, cell, entries, index = frame
+            if index > 0 and stats is not None:
+                stats.backtrack(len(stack))
+            if index == len(entries):
+                stack.pop()
+                continue
+            frame[3] = index + 1
+            candidates = _guess(parent, cell, entries[index], layout.peers)
+            break
+        else:
+            return
+
+
+def _guess(
+    candidates: List[int], cell: int, entry: int, peers: Sequence[Sequence[int]]
+) -> List[int]:
+    """A copy of candidates with entry placed in cell and removed from its peers."""
+    bit = 1 << (entry - 1)
+    candidates = candidates.copy()
+    candidates[cell] = bit
+    for peer in peers[cell]:
+        candidates[peer] &= ~bit
+    return candidates
+
+
+class SolutionIterator:
+    """An iterator over the solutions of a Sudoku that can be resumed later.
+
+    Only the current branch of the search is held in memory, however many
+    solutions there are. `cursor` is a string from which a new iterator
+    continues after the last solution returned, so a long enumeration can be
+    checkpointed, stopped and resumed in another process or on another machine.
+
+    Args:
+        s: Sudoku, the sudoku to solve. It is not modified.
+        limit: int (default=None) stop after this many solutions, all if None.
+        cursor: str (default=None) the cursor of an earlier iterator over the
+            same Sudoku, start from the beginning if None.
+        strategies: Sequence (default=STRATEGIES) the propagation strategies
+            applied before each branch. They must be the same when resuming.
+    """
+
+    def __init__(
+        self,
+        s: Sudoku,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        strategies: Sequence[Strategy] = STRATEGIES,
+    ):
+        assert limit is None or limit > 0, f"limit '{limit}' must be positive"
+        self._puzzle = s.grid.tobytes().hex()
+        self._remaining = limit
+        self._path = None
+        self._done = False
+        if cursor is not None:
+            state = json.loads(cursor)
+            if state["puzzle"] != self._puzzle:
+                raise ValueError("the cursor is for a different puzzle")
+            self._path = state["path"]
+            self._done = state["done"]
+        self._solutions = None
+        if not self._done:
+            self._solutions = _search(s, strategies, None, None, self._path)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Sudoku:
+        if self._done or self._remaining == 0:
+            raise StopIteration
+        try:
+            solution, self._path = next(self._solutions)
+        except StopIteration:
+            self._done = True
+            raise
+        if self._remaining is not None:
+            self._remaining -= 1
+        return solution
+
+    @property
+    def cursor(self) -> str:
+        """Where the search is up to, see the class docstring."""
+        return json.dumps(
+            {"puzzle": self._puzzle, "path": self._path, "done": self._done}
+        )
+
+
+def iter_solutions(
+    s: Sudoku, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> SolutionIterator:
+    """Iterate over the solutions of a Sudoku in constant memory.
+
+    Args:
+        s: Sudoku, the sudoku to solve. It is not modified.
+        limit: int (default=None) stop after this many solutions, all if None.
+        cursor: str (default=None) resume after the solutions returned by the
+            iterator this `SolutionIterator.cursor` came from.
+
+    Returns:
+        A `SolutionIterator`, whose cursor can be saved at any point.
+    """
+    return SolutionIterator(s, limit, cursor)
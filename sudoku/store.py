@@ -0,0 +1,244 @@
+"""A binary on-disk store of puzzles, read through memory maps.
+
+The file starts with a 64 byte header followed by up to three columns:
+
+- puzzles: one record per puzzle, 81 bytes with a cell per byte or 41 bytes
+  with a cell per nibble when packed.
+- solutions: optional, one record per puzzle in the same format, all zeros
+  when no solution is known.
+- status: optional, one byte per puzzle, see `sudoku.batch`.
+
+Opening a store maps the columns with `np.memmap`, so any number of
+processes can share a corpus without parsing it or holding copies in memory.
+"""
+from os import PathLike
+from sudoku import Sudoku
+from sudoku.io import read_chunks, write_puzzles
+from typing import *
+import numpy as np
+
+_MAGIC = b"SUDOKUDB"
+_VERSION = 1
+_HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("packed", "u1"),
+        ("solutions", "u1"),
+        ("status", "u1"),
+        ("reserved", "u1"),
+        ("count", "<u8"),
+    ]
+)
+_HEADER_SIZE = 64
+
+Path = Union[str, PathLike]
+Grids = Union[np.ndarray, Iterable[np.ndarray]]
+
+
+def pack(grids: np.ndarray) -> np.ndarray:
+    """Pack [N,9,9] grids into [N,41] bytes, two cells per byte."""
+    cells = np.zeros((len(grids), 82), dtype=np.uint8)
+    cells[:, :81] = np.asarray(grids, dtype=np.uint8).reshape(-1, 81)
+    return (cells[:, 0::2] << 4) | cells[:, 1::2]
+
+
+def unpack(packed: np.ndarray) -> np.ndarray:
+    """Unpack [N,41] bytes made by `pack` into [N,9,9] grids."""
+    cells = np.stack([packed >> 4, packed & 0xF], axis=-1).reshape(-1, 82)
+    return cells[:, :81].reshape(-1, 9, 9)
+
+
+def _record_size(packed: bool) -> int:
+    return 41 if packed else 81
+
+
+def _chunks(grids: Grids) -> Iterator[np.ndarray]:
+    if isinstance(grids, np.ndarray):
+        grids = [grids]
+    for chunk in grids:
+        yield np.asarray(chunk, dtype=np.uint8).reshape(-1, 9, 9)
+
+
+def _write_column(f: BinaryIO, grids: Grids, packed: bool) -> int:
+    count = 0
+    for chunk in _chunks(grids):
+        f.write((pack(chunk) if packed else chunk).tobytes())
+        count += len(chunk)
+    return count
+
+
+def write_store(
+    path: Path,
+    puzzles: Grids,
+    solutions: Optional[Grids] = None,
+    status: Optional[np.ndarray] = None,
+    packed: bool = False,
+):
+    """Write puzzles, and optionally their solutions and status, to a store.
+
+    Args:
+        path: str or path of the store to create.
+        puzzles: an [N,9,9] array or an iterable of [n,9,9] chunks, such as
+            those of `sudoku.io.read_chunks`.
+        solutions: (default=None) the solutions in the same form as puzzles,
+            no solution column if None.
+        status: np.ndarray (default=None) an [N] array of status codes, no
+            status column if None.
+        packed: bool (default=False) store two cells per byte.
+    """
+    header = np.zeros(1, dtype=_HEADER)
+    header["magic"] = _MAGIC
+    header["version"] = _VERSION
+    header["packed"] = packed
+    header["solutions"] = solutions is not None
+    header["status"] = status is not None
+
+    with open(path, "wb") as f:
+        f.write(bytes(_HEADER_SIZE))
+        count = _write_column(f, puzzles, packed)
+        if solutions is not None:
+            solved = _write_column(f, solutions, packed)
+            assert solved == count, f"{solved} solutions for {count} puzzles"
+        if status is not None:
+            status = np.asarray(status, dtype=np.uint8)
+            assert len(status) == count, f"{len(status)} status for {count} puzzles"
+            f.write(status.tobytes())
+        header["count"] = count
+        f.seek(0)
+        f.write(header.tobytes())
+
+
+class PuzzleStore:
+    """A store written by `write_store`, with its columns memory mapped.
+
+    Slicing an unpacked store returns views of the file without copying.
+    Pickling a store only pickles its path, so it is cheap to send to worker
+    processes, which map the file again.
+
+    Args:
+        path: str or path of the store.
+        writable: bool (default=False) map the file for writing, so results
+            can be stored with `write_results`.
+    """
+
+    def __init__(self, path: Path, writable: bool = False):
+        self.path = path
+        self.writable = writable
+
+        header = np.fromfile(path, dtype=_HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != _MAGIC:
+            raise ValueError(f"'{path}' is not a puzzle store")
+        if header["version"][0] != _VERSION:
+            raise ValueError(
+                f"'{path}' has version {header['version'][0]}, expected {_VERSION}"
+            )
+        self.packed = bool(header["packed"][0])
+        self._count = int(header["count"][0])
+
+        record = _record_size(self.packed)
+        mode = "r+" if writable else "r"
+        offset = _HEADER_SIZE
+
+        def column(shape: Tuple[int, ...]) -> np.ndarray:
+            nonlocal offset
+            if self._count == 0:
+                return np.zeros(shape, dtype=np.uint8)
+            mapped = np.memmap(path, np.uint8, mode, offset, shape)
+            offset += mapped.size
+            return mapped
+
+        self._puzzles = column((self._count, record))
+        self._solutions = None
+        if header["solutions"][0]:
+            self._solutions = column((self._count, record))
+        self.status = column((self._count,)) if header["status"][0] else None
+
+    def __reduce__(self):
+        return PuzzleStore, (self.path, self.writable)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index: int) -> Sudoku:
+        # Counts negative indices from the end and rejects those out of range.
+        index = range(self._count)[index]
+        return Sudoku.from_array(self.puzzles(index, index + 1)[0])
+
+    @property
+    def has_solutions(self) -> bool:
+        return self._solutions is not None
+
+    def _grids(self, column: np.ndarray, start: int, stop: Optional[int]):
+        records = column[start:stop]
+        if self.packed:
+            return unpack(records)
+        return records.reshape(-1, 9, 9)
+
+    def puzzles(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """The [n,9,9] puzzles from start to stop, a view unless packed."""
+        return self._grids(self._puzzles, start, stop)
+
+    def solutions(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """The [n,9,9] solutions from start to stop, a view unless packed."""
+        assert self.has_solutions, f"'{self.path}' has no solution column"
+        return self._grids(self._solutions, start, stop)
+
+    def write_results(
+        self, start: int, solutions: np.ndarray, status: Optional[np.ndarray] = None
+    ):
+        """Store the solutions, and status, of the puzzles from start on.
+
+        Args:
+            start: int, the index of the first puzzle.
+            solutions: np.ndarray, [n,9,9] solutions such as those returned
+                by `solve_batch`.
+            status: np.ndarray (default=None) [n] status codes, left as they are
+                if None.
+        """
+        assert self.writable, f"'{self.path}' was not opened writable"
+        assert self.has_solutions, f"'{self.path}' has no solution column"
+        solutions = np.asarray(solutions, dtype=np.uint8).reshape(-1, 9, 9)
+        stop = start + len(solutions)
+        if self.packed:
+            self._solutions[start:stop] = pack(solutions)
+        else:
+            self._solutions[start:stop] = solutions.reshape(-1, 81)
+        if status is not None:
+            assert self.status is not None, f"'{self.path}' has no status column"
+            self.status[start:stop] = status
+
+    def flush(self):
+        """Write changes made with `write_results` to the file."""
+        for column in (self._solutions, self.status):
+            if isinstance(column, np.memmap):
+                column.flush()
+
+    def to_text(self, file, blank: str = ".", chunk_size: int = 65536):
+        """Write the puzzles to file in the line format of `sudoku.io`."""
+        chunks = (
+            self.puzzles(start, start + chunk_size)
+            for start in range(0, len(self), chunk_size)
+        )
+        write_puzzles(file, chunks, blank)
+
+    @staticmethod
+    def from_text(
+        file, path: Path, packed: bool = False, chunk_size: int = 65536
+    ) -> "PuzzleStore":
+        """Convert a file in the line format of `sudoku.io` to a store at path."""
+        write_store(path, read_chunks(file, chunk_size), packed=packed)
+        return PuzzleStore(path)
+
+    @staticmethod
+    def from_sudokus(
+        sudokus: Iterable[Sudoku], path: Path, packed: bool = False
+    ) -> "PuzzleStore":
+        """Write Sudoku to a store at path."""
+        write_store(path, (s.grid for s in sudokus), packed=packed)
+        return PuzzleStore(path)
+
+    def to_sudokus(self) -> Iterator[Sudoku]:
+        """The puzzles as Sudoku."""
+        for index in range(len(self)):
+            yield self[index]
@@ -1,8 +1,185 @@
+from functools import lru_cache
 from typing import *
 import numpy as np
+import re
 from textwrap import dedent
 
 
+class _MaskEntries:
+    """Digits whose bits are set in a mask, for sizes too large for a table."""
+
+    def __getitem__(self, mask: int) -> Tuple[int, ...]:
+        return tuple(n + 1 for n in range(mask.bit_length()) if mask >> n & 1)
+
+
+class _Popcount:
+    """The number of bits set in a mask, for sizes too large for a table."""
+
+    def __getitem__(self, mask: int) -> int:
+        return bin(mask).count("1")
+
+
+class _Layout:
+    """The units and candidate masks of a grid made of box_size x box_size blocks.
+
+    A grid has size = box_size ** 2 rows, columns, blocks and digits. Cells are
+    numbered row * size + column and bit n-1 of a candidate mask stands for
+    the digit n.
+    """
+
+    def __init__(self, box_size: int):
+        size = box_size * box_size
+        self.box_size = box_size
+        self.size = size
+        self.cells = size * size
+        self.all_candidates = (1 << size) - 1
+        self.bits = tuple(1 << n for n in range(size))
+
+        if size <= 16:
+            # Digits whose bits are set in a mask, indexed by mask.
+            self.mask_entries = tuple(
+                tuple(n + 1 for n in range(size) if mask & (1 << n))
+                for mask in range(1 << size)
+            )
+            self.popcount = tuple(len(entries) for entries in self.mask_entries)
+        else:
+            self.mask_entries = _MaskEntries()
+            self.popcount = _Popcount()
+
+        # Cells of each row, column and block.
+        self.rows = tuple(
+            tuple(row * size + column for column in range(size)) for row in range(size)
+        )
+        self.columns = tuple(
+            tuple(row * size + column for row in range(size)) for column in range(size)
+        )
+        self.blocks = tuple(
+            tuple(
+                (block_row + row) * size + block_column + column
+                for row in range(box_size)
+                for column in range(box_size)
+            )
+            for block_row in range(0, size, box_size)
+            for block_column in range(0, size, box_size)
+        )
+        self.units = self.rows + self.columns + self.blocks
+
+        self.row_of = tuple(cell // size for cell in range(self.cells))
+        self.column_of = tuple(cell % size for cell in range(self.cells))
+        self.block_of = tuple(
+            block_index(cell // size, cell % size, box_size)
+            for cell in range(self.cells)
+        )
+
+        # The other cells that share a row, column or block with each cell.
+        peers = [set() for _ in range(self.cells)]
+        for unit in self.units:
+            for cell in unit:
+                peers[cell].update(unit)
+        self.peers = tuple(
+            tuple(sorted(cell_peers - {cell})) for cell, cell_peers in enumerate(peers)
+        )
+
+
+@lru_cache(maxsize=None)
+def _layout(box_size: int) -> _Layout:
+    assert box_size >= 1, f"box_size '{box_size}' must be positive"
+    return _Layout(box_size)
+
+
+def _box_size(size: int) -> int:
+    """The box size of a grid with size rows."""
+    box_size = int(round(size**0.5))
+    assert box_size * box_size == size, f"grid size '{size}' must be a square"
+    return box_size
+
+
+def _layout_of(candidates: Sequence[int]) -> _Layout:
+    """The layout of a grid from its list of cell candidate masks."""
+    return _layout_of_cells(len(candidates))
+
+
+@lru_cache(maxsize=None)
+def _layout_of_cells(cells: int) -> _Layout:
+    return _layout(_box_size(_box_size(cells)))
+
+
+def block_index(row: int, column: int, box_size: int = 3) -> int:
+    return (row // box_size) * box_size + column // box_size
+
+
+_LAYOUT = _layout(3)
+
+ALL_CANDIDATES = _LAYOUT.all_candidates
+
+# Digits whose bits are set in a 9-bit candidate mask, indexed by mask.
+_MASK_ENTRIES = _LAYOUT.mask_entries
+_POPCOUNT = _LAYOUT.popcount
+
+# Cells, as row * 9 + column, of each row, column and block.
+_ROWS = _LAYOUT.rows
+_COLUMNS = _LAYOUT.columns
+_BLOCKS = _LAYOUT.blocks
+_UNITS = _LAYOUT.units
+
+# The 20 other cells that share a row, column or block with each cell.
+_PEERS = _LAYOUT.peers
+
+
+def completed_grid(box_size: int = 3) -> np.ndarray:
+    """A completed grid of any size, the same as Sudoku.COMPLETED_GRID for 3."""
+    size = box_size * box_size
+    rows, columns = np.indices((size, size))
+    grid = (rows * box_size + rows // box_size + columns) % size + 1
+    return grid.astype(np.uint8)
+
+
+def check_grids(grids: np.ndarray) -> np.ndarray:
+    """Check that no digit is repeated in a row, column or block.
+
+    Args:
+        grids: np.ndarray, a grid or a batch of grids of the same size, such as
+            9x9 or [N,9,9], with 0 for an empty cell.
+
+    Returns:
+        A boolean, or an [N] boolean array for a batch, that is True where a grid
+        is valid. Grids holding numbers greater than their size are not valid.
+    """
+    grids = np.asarray(grids)
+    size = grids.shape[-1]
+    box_size = _box_size(size)
+    batch = grids.reshape(-1, size, size)
+    n = len(batch)
+    blocks = (
+        batch.reshape(n, box_size, box_size, box_size, box_size)
+        .transpose(0, 1, 3, 2, 4)
+        .reshape(n, size, size)
+    )
+    units = np.concatenate([batch, batch.transpose(0, 2, 1), blocks], axis=1)
+
+    # Count every digit of every unit with one bincount over offset values.
+    n_units = 3 * size
+    in_range = (batch <= size).all(axis=(1, 2))
+    values = np.minimum(units, size).astype(np.intp)
+    values += np.arange(n * n_units, dtype=np.intp).reshape(n, n_units, 1) * (size + 1)
+    counts = np.bincount(values.ravel(), minlength=n * n_units * (size + 1))
+    counts = counts.reshape(n, n_units, size + 1)
+    valid = in_range & (counts[:, :, 1:] <= 1).all(axis=(1, 2))
+
+    if grids.ndim == 2:
+        return valid[0]
+    return valid
+
+
+def _cell_text(line: str) -> str:
+    """The cells of one line of a grid string, with a space between the outer
+    "|" separators read as an empty cell and any other whitespace ignored."""
+    if "|" not in line:
+        return line
+    cells = line[line.index("|") + 1 : line.rindex("|")]
+    return cells.replace("|", "").replace(" ", "0")
+
+
 class Sudoku:
     COMPLETED_GRID = dedent(
         """\
@@ -22,18 +199,41 @@ class Sudoku:
         """
     )
 
-    def __init__(self, grid_string=None):
-        self.grid = np.array([[0] * 9] * 9, dtype=np.uint8)
+    def __init__(self, grid_string=None, box_size: int = 3):
+        """A Sudoku made of box_size x box_size blocks, 9x9 for the default of 3.
+
+        Args:
+            grid_string: str (default=None) the grid in the format of repr.
+            box_size: int (default=3) the number of rows and columns of a block.
+        """
+        self._layout = _layout(box_size)
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self.grid = np.zeros((self.size, self.size), dtype=np.uint8)
+        # Bit n-1 of a mask is set when the digit n is present in that unit.
+        self._row_masks = [0] * self.size
+        self._column_masks = [0] * self.size
+        self._block_masks = [0] * self.size
         if grid_string:
             self.set(grid_string)
-        self._bool_buffer = np.array([False] * 10)
-        self._int_buffer = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9])
 
     def __hash__(self):
         return hash(self.grid.tobytes())
 
     def __eq__(self, other):
-        return (self.grid == other.grid).all()
+        return self.grid.shape == other.grid.shape and (self.grid == other.grid).all()
+
+    @staticmethod
+    def from_array(grid: np.ndarray) -> "Sudoku":
+        """Create a Sudoku from a square array of numbers, 0 for an empty cell.
+
+        The box size follows from the shape, 3 for a 9x9 array.
+        """
+        grid = np.asarray(grid)
+        s = Sudoku(box_size=_box_size(grid.shape[-1]))
+        s.grid[:] = grid
+        s._update_masks()
+        return s
 
     def dump_py(self, name="s") -> str:
         dump = ""
@@ -44,36 +244,90 @@ class Sudoku:
         return dump
 
     def set(self, grid_string: str):
-        grid_string.replace(" ", "0")
-        values = [int(c) for c in grid_string if c.isnumeric()]
-        self.grid[:] = np.reshape(values, (9, 9))
+        if self.size > 9:
+            # Numbers take more than one character, so they are separated and
+            # an empty cell is written as ".".
+            numbers = re.findall(r"\d+|\.", grid_string)
+            values = [0 if number == "." else int(number) for number in numbers]
+            self.grid[:] = np.reshape(values, (self.size, self.size))
+        else:
+            characters = np.frombuffer(
+                "".join(_cell_text(line) for line in grid_string.splitlines()).encode(),
+                dtype=np.uint8,
+            )
+            digits = characters[(characters >= ord("0")) & (characters <= ord("9"))]
+            self.grid[:] = (digits - ord("0")).reshape(self.size, self.size)
+        self._update_masks()
 
     def clone(self):
-        s = Sudoku()
+        s = Sudoku(box_size=self.box_size)
         s.grid = self.grid.copy()
+        s._row_masks = self._row_masks.copy()
+        s._column_masks = self._column_masks.copy()
+        s._block_masks = self._block_masks.copy()
         return s
 
+    def _update_masks(self):
+        """Recompute all unit masks from the grid.
+
+        Needed only when `grid` has been written to directly rather than
+        through `__setitem__` or `set`.
+        """
+        self._row_masks = [0] * self.size
+        self._column_masks = [0] * self.size
+        self._block_masks = [0] * self.size
+        for row, line in enumerate(self.grid.tolist()):
+            for column, number in enumerate(line):
+                if number != 0:
+                    bit = 1 << (number - 1)
+                    self._row_masks[row] |= bit
+                    self._column_masks[column] |= bit
+                    self._block_masks[block_index(row, column, self.box_size)] |= bit
+
+    def _update_unit_masks(self, row: int, column: int):
+        block = block_index(row, column, self.box_size)
+        row_mask = column_mask = block_mask = 0
+        for number in self.grid[row, :].tolist():
+            if number != 0:
+                row_mask |= 1 << (number - 1)
+        for number in self.grid[:, column].tolist():
+            if number != 0:
+                column_mask |= 1 << (number - 1)
+        for number in self.block(row, column).ravel().tolist():
+            if number != 0:
+                block_mask |= 1 << (number - 1)
+        self._row_masks[row] = row_mask
+        self._column_masks[column] = column_mask
+        self._block_masks[block] = block_mask
+
     def __repr__(self):
-        line_break = "-------------\n"
+        box_size = self.box_size
+        # Larger grids give each cell a column wide enough for any number.
+        width = 1 if self.size <= 9 else len(str(self.size)) + 1
+        blank = " " if self.size <= 9 else ".".rjust(width)
+        line_break = "-" * (self.size * width + box_size + 1) + "\n"
         repr = ""
-        for row, line in enumerate(self.grid):
-            if row % 3 == 0:
+        for row, line in enumerate(self.grid.tolist()):
+            if row % box_size == 0:
                 repr += line_break
             for column, number in enumerate(line):
-                if column % 3 == 0:
+                if column % box_size == 0:
                     repr += "|"
                 if number == 0:
-                    repr += " "
+                    repr += blank
                 else:
-                    repr += str(number)
+                    repr += str(number).rjust(width)
             repr += "|\n"
         repr += line_break
         return repr
 
     def block(self, row, column):
-        block_row = (row // 3) * 3
-        block_column = (column // 3) * 3
-        return self.grid[block_row : block_row + 3, block_column : block_column + 3]
+        box_size = self.box_size
+        block_row = (row // box_size) * box_size
+        block_column = (column // box_size) * box_size
+        return self.grid[
+            block_row : block_row + box_size, block_column : block_column + box_size
+        ]
 
     def row(self, index):
         return self.grid[index, :]
@@ -81,80 +335,27 @@ class Sudoku:
     def column(self, index):
         return self.grid[:, index]
 
+    def candidate_mask(self, row: int, column: int) -> int:
+        """Mask of the digits that can be placed at (row, column), 9 bits for 9x9.
+
+        Bit n-1 is set when the digit n is a candidate. A filled cell has
+        only the bit for its own value set.
+        """
+        number = int(self.grid[row, column])
+        if number != 0:
+            return 1 << (number - 1)
+        used = (
+            self._row_masks[row]
+            | self._column_masks[column]
+            | self._block_masks[block_index(row, column, self.box_size)]
+        )
+        return self._layout.all_candidates & ~used
+
     def possible_entries(self, row: int, column: int) -> List[int]:
-        if self.grid[row, column] != 0:
-            return [self.grid[row, column]]
-
-        possibilities = self._bool_buffer
-        possibilities[1:] = True
-
-        for element in self.row(row):
-            possibilities[element] = False
-        for element in self.column(column):
-            possibilities[element] = False
-        for element in list(self.block(row, column)):
-            possibilities[element] = False
-
-        rv = np.array(self._int_buffer[possibilities == True])
-        possibilities[1:] = False
-        return rv
-
-    def _check_row(self, row):
-        number_count = np.zeros(10)
-        for number in self.grid[row, 0:]:
-            if number > 0:
-                number_count[number] += 1
-                if number_count[number] > 1:
-                    return False
-        return True
-
-    def _check_rows(self):
-        for row in range(9):
-            if not self._check_row(row):
-                return False
-        return True
-
-    def _check_column(self, column):
-        number_count = np.zeros(10)
-        for number in self.grid[0:, column]:
-            if number > 0:
-                number_count[number] += 1
-                if number_count[number] > 1:
-                    return False
-        return True
-
-    def _check_columns(self):
-        for column in range(9):
-            if not self._check_column(column):
-                return False
-        return True
-
-    def _check_block(self, row_offset, column_offset):
-        number_count = np.zeros(10)
-        for row in [0, 1, 2]:
-            for column in [0, 1, 2]:
-                number: int = self.grid[row_offset + row, column_offset + column]
-                if number > 0:
-                    number_count[number] += 1
-                    if number_count[number] > 1:
-                        return False
-        return True
-
-    def _check_blocks(self):
-        for row_offset in [0, 3, 6]:
-            for column_offset in [0, 3, 6]:
-                if not self._check_block(row_offset, column_offset):
-                    return False
-        return True
+        return list(self._layout.mask_entries[self.candidate_mask(row, column)])
 
     def check(self) -> bool:
-        if not self._check_blocks():
-            return False
-        if not self._check_rows():
-            return False
-        if not self._check_columns():
-            return False
-        return True
+        return bool(check_grids(self.grid))
 
     @property
     def ok(self):
@@ -175,12 +376,22 @@ class Sudoku:
 
     def __getitem__(self, row_column):
         row, column = row_column
-        assert row >= 0 and row < 9
-        assert column >= 0 and column < 9
+        assert row >= 0 and row < self.size
+        assert column >= 0 and column < self.size
         return self.grid[row, column]
 
     def __setitem__(self, row_column, value):
         row, column = row_column
-        assert row >= 0 and row < 9
-        assert column >= 0 and column < 9
+        assert row >= 0 and row < self.size
+        assert column >= 0 and column < self.size
+        previous = int(self.grid[row, column])
         self.grid[row, column] = value
+        if previous != 0:
+            # The old digit may still occur elsewhere in an invalid grid so
+            # its bits cannot simply be cleared.
+            self._update_unit_masks(row, column)
+        elif value != 0:
+            bit = 1 << (int(value) - 1)
+            self._row_masks[row] |= bit
+            self._column_masks[column] |= bit
+            self._block_masks[block_index(row, column, self.box_size)] |= bit
@@ -1,8 +1,147 @@
+from typing import *
 import sudoku
 from sudoku import Sudoku
+from sudoku.sudoku import _box_size
 import numpy as np
 
 
+class Transform:
+    """A map between equivalent Sudoku grids.
+
+    A transform optionally transposes the grid, then reorders its rows and
+    columns, then relabels its digits, so that the transformed grid is
+    digits[g[rows][:, columns]] where g is the grid, transposed if transpose is
+    set. Transforms can be composed and inverted, and apply to a single grid or
+    a batch of grids with one gather.
+
+    The size of the grids, 9 by default, follows from rows, columns or digits
+    when any of them is given.
+
+    Args:
+        rows: Sequence (default=None) the source row of each row, identity if None.
+        columns: Sequence (default=None) the source column of each column,
+            identity if None.
+        digits: Sequence (default=None) of size + 1 labels, the new value of each
+            of 0-9 for 9x9, where 0 must map to 0. Identity if None.
+        transpose: bool (default=False) transpose the grid first.
+        box_size: int (default=None) the box size of the grids when none of
+            rows, columns or digits is given, 3 if None.
+    """
+
+    def __init__(
+        self,
+        rows: Optional[Sequence[int]] = None,
+        columns: Optional[Sequence[int]] = None,
+        digits: Optional[Sequence[int]] = None,
+        transpose: bool = False,
+        box_size: Optional[int] = None,
+    ):
+        if rows is not None:
+            size = len(rows)
+        elif columns is not None:
+            size = len(columns)
+        elif digits is not None:
+            size = len(digits) - 1
+        else:
+            size = (box_size or 3) ** 2
+        _box_size(size)
+
+        self.rows = np.arange(size) if rows is None else np.asarray(rows, dtype=np.intp)
+        self.columns = (
+            np.arange(size) if columns is None else np.asarray(columns, dtype=np.intp)
+        )
+        self.digits = (
+            np.arange(size + 1, dtype=np.uint8)
+            if digits is None
+            else np.asarray(digits, dtype=np.uint8)
+        )
+        self.transpose = transpose
+
+        assert sorted(self.rows) == list(
+            range(size)
+        ), f"rows '{rows}' must permute 0-{size - 1}"
+        assert sorted(self.columns) == list(
+            range(size)
+        ), f"columns '{columns}' must permute 0-{size - 1}"
+        assert (
+            sorted(self.digits) == list(range(size + 1)) and self.digits[0] == 0
+        ), f"digits '{digits}' must permute 1-{size} and map 0 to 0"
+
+        # The source cell of each cell of the transformed grid, row-major.
+        if transpose:
+            self._cells = self.columns[None, :] * size + self.rows[:, None]
+        else:
+            self._cells = self.rows[:, None] * size + self.columns[None, :]
+        self._cells = self._cells.ravel()
+
+    def __eq__(self, other):
+        return (
+            self._cells.shape == other._cells.shape
+            and (self._cells == other._cells).all()
+            and (self.digits == other.digits).all()
+            and self.transpose == other.transpose
+        )
+
+    def __repr__(self):
+        return (
+            f"Transform(rows={self.rows.tolist()}, columns={self.columns.tolist()}, "
+            f"digits={self.digits.tolist()}, transpose={self.transpose})"
+        )
+
+    def apply(self, grids: np.ndarray) -> np.ndarray:
+        """Transform a 9x9 grid or an [N,9,9] batch of grids, or larger sizes."""
+        grids = np.asarray(grids)
+        flat = grids.reshape(grids.shape[:-2] + (len(self._cells),))
+        return self.digits[flat[..., self._cells]].reshape(grids.shape)
+
+    def __call__(self, s: Sudoku) -> Sudoku:
+        return Sudoku.from_array(self.apply(s.grid))
+
+    def then(self, other: "Transform") -> "Transform":
+        """The transform that applies this transform and then other."""
+        if other.transpose:
+            rows, columns = self.columns[other.rows], self.rows[other.columns]
+        else:
+            rows, columns = self.rows[other.rows], self.columns[other.columns]
+        return Transform(
+            rows,
+            columns,
+            other.digits[self.digits],
+            self.transpose != other.transpose,
+        )
+
+    def inverse(self) -> "Transform":
+        rows, columns = np.argsort(self.rows), np.argsort(self.columns)
+        if self.transpose:
+            rows, columns = columns, rows
+        return Transform(rows, columns, np.argsort(self.digits), self.transpose)
+
+
+def _transform(s: Sudoku, transform: Transform, inplace: bool) -> Sudoku:
+    if not inplace:
+        return transform(s)
+    s.grid[:] = transform.apply(s.grid)
+    s._update_masks()
+    return s
+
+
+def _swapped(first: int, second: int, size: int = 9) -> np.ndarray:
+    order = np.arange(size)
+    order[[first, second]] = order[[second, first]]
+    return order
+
+
+def _swapped_blocks(first: int, second: int, box_size: int = 3) -> np.ndarray:
+    order = np.arange(box_size * box_size)
+    order[first * box_size : (first + 1) * box_size] = range(
+        second * box_size, (second + 1) * box_size
+    )
+    order[second * box_size : (second + 1) * box_size] = range(
+        first * box_size, (first + 1) * box_size
+    )
+    return order
+
+
 def switch_rows(
     s: Sudoku, row_block: int, first: int, second: int, inplace: bool = False
 ) -> Sudoku:
@@ -10,40 +149,28 @@ def switch_rows(
 
     Args:
         s: Sudoku, the sudoku to transform
-        row_block: int, the index in [0,1,2] of the block to be transformed.
-        first: int, the index in [0,1,2] within the block of the first row to be switched.
-        second: int, the index in [0,1,2] within the block of the second row to be switched.
+        row_block: int, the index in [0,s.box_size) of the block to be transformed.
+        first: int, the index in [0,s.box_size) within the block of the first row to be switched.
+        second: int, the index in [0,s.box_size) within the block of the second row to be switched.
         inplace: bool (default=False) perform the transformation inplace on the supplied sudoku.
 
     Returns:
         A transformed Sudoku.
     """
 
-    assert row_block in list(
-        range(3)
-    ), f"row_block '{row_block}' must be a block index [0,1,2]"
+    indices = list(range(s.box_size))
+    assert (
+        row_block in indices
+    ), f"row_block '{row_block}' must be a block index {indices}"
 
-    assert first in list(range(3)), f"first '{first}' must be a sub-block index [0,1,2]"
+    assert first in indices, f"first '{first}' must be a sub-block index {indices}"
 
-    assert second in list(
-        range(3)
-    ), f"second '{second}' must be a sub-block index [0,1,2]"
-
-    swap = np.array([0] * 9, dtype=np.uint8)
-
-    if not inplace:
-        s = s.clone()
+    assert second in indices, f"second '{second}' must be a sub-block index {indices}"
 
-    for i in range(9):
-        swap[i] = s[row_block * 3 + first, i]
-
-    for i in range(9):
-        s[row_block * 3 + first, i] = s[row_block * 3 + second, i]
-
-    for i in range(9):
-        s[row_block * 3 + second, i] = swap[i]
-
-    return s
+    rows = _swapped(
+        row_block * s.box_size + first, row_block * s.box_size + second, s.size
+    )
+    return _transform(s, Transform(rows=rows), inplace)
 
 
 def switch_columns(
@@ -53,39 +180,27 @@ def switch_columns(
 
     Args:
         s: Sudoku, the sudoku to transform
-        column_block: int, the index in [0,1,2] of the block to be transformed.
-        first: int, the index in [0,1,2] within the block of the first column to be switched.
-        second: int, the index in [0,1,2] within the block of the second column to be switched.
+        column_block: int, the index in [0,s.box_size) of the block to be transformed.
+        first: int, the index in [0,s.box_size) within the block of the first column to be switched.
+        second: int, the index in [0,s.box_size) within the block of the second column to be switched.
         inplace: bool (default=False) perform the transformation inplace on the supplied sudoku.
 
     Returns:
         A transformed Sudoku.
     """
-    assert column_block in list(
-        range(3)
-    ), f"column_block '{column_block}' must be a block index [0,1,2]"
+    indices = list(range(s.box_size))
+    assert (
+        column_block in indices
+    ), f"column_block '{column_block}' must be a block index {indices}"
 
-    assert first in list(range(3)), f"first '{first}' must be a sub-block index [0,1,2]"
+    assert first in indices, f"first '{first}' must be a sub-block index {indices}"
 
-    assert second in list(
-        range(3)
-    ), f"second '{second}' must be a sub-block index [0,1,2]"
+    assert second in indices, f"second '{second}' must be a sub-block index {indices}"
 
-    if not inplace:
-        s = s.clone()
-
-    swap = np.array([0] * 9, dtype=np.uint8)
-
-    for i in range(9):
-        swap[i] = s[i, column_block * 3 + first]
-
-    for i in range(9):
-        s[i, column_block * 3 + first] = s[i, column_block * 3 + second]
-
-    for i in range(9):
-        s[i, column_block * 3 + second] = swap[i]
-
-    return s
+    columns = _swapped(
+        column_block * s.box_size + first, column_block * s.box_size + second, s.size
+    )
+    return _transform(s, Transform(columns=columns), inplace)
 
 
 def switch_column_blocks(
@@ -95,37 +210,20 @@ def switch_column_blocks(
 
     Args:
         s: Sudoku, the sudoku to transform
-        first: int, the index in [0,1,2] of the first column block to be switched.
-        second: int, the index in [0,1,2] of the second column block to be switched.
+        first: int, the index in [0,s.box_size) of the first column block to be switched.
+        second: int, the index in [0,s.box_size) of the second column block to be switched.
         inplace: bool (default=False) perform the transformation inplace on the supplied sudoku.
 
     Returns:
         A transformed Sudoku.
     """
-    assert first in list(
-        range(3)
-    ), f"first '{first}' must be a block index index [0,1,2]"
+    indices = list(range(s.box_size))
+    assert first in indices, f"first '{first}' must be a block index index {indices}"
 
-    assert second in list(
-        range(3)
-    ), f"second '{second}' must be a block index index [0,1,2]"
+    assert second in indices, f"second '{second}' must be a block index index {indices}"
 
-    if not inplace:
-        s = s.clone()
-
-    swap = np.array([0] * 9, dtype=np.uint8)
-
-    for j in range(3):
-        for i in range(9):
-            swap[i] = s[i, first * 3 + j]
-
-        for i in range(9):
-            s[i, first * 3 + j] = s[i, second * 3 + j]
-
-        for i in range(9):
-            s[i, second * 3 + j] = swap[i]
-
-    return s
+    columns = _swapped_blocks(first, second, s.box_size)
+    return _transform(s, Transform(columns=columns), inplace)
 
 
 def switch_row_blocks(
@@ -135,37 +233,20 @@ def switch_row_blocks(
 
     Args:
         s: Sudoku, the sudoku to transform
-        first: int, the index in [0,1,2] of the first row block to be switched.
-        second: int, the index in [0,1,2] of the second row block to be switched.
+        first: int, the index in [0,s.box_size) of the first row block to be switched.
+        second: int, the index in [0,s.box_size) of the second row block to be switched.
         inplace: bool (default=False) perform the transformation inplace on the supplied sudoku.
 
     Returns:
         A transformed Sudoku.
     """
-    assert first in list(
-        range(3)
-    ), f"first '{first}' must be a block index index [0,1,2]"
-
-    assert second in list(
-        range(3)
-    ), f"second '{second}' must be a block index index [0,1,2]"
-
-    if not inplace:
-        s = s.clone()
+    indices = list(range(s.box_size))
+    assert first in indices, f"first '{first}' must be a block index index {indices}"
 
-    swap = np.array([0] * 9, dtype=np.uint8)
+    assert second in indices, f"second '{second}' must be a block index index {indices}"
 
-    for j in range(3):
-        for i in range(9):
-            swap[i] = s[first * 3 + j, i]
-
-        for i in range(9):
-            s[first * 3 + j, i] = s[second * 3 + j, i]
-
-        for i in range(9):
-            s[second * 3 + j, i] = swap[i]
-
-    return s
+    rows = _swapped_blocks(first, second, s.box_size)
+    return _transform(s, Transform(rows=rows), inplace)
 
 
 def switch_numbers(s: Sudoku, first: int, second: int, inplace: bool = False) -> Sudoku:
@@ -180,28 +261,10 @@ def switch_numbers(s: Sudoku, first: int, second: int, inplace: bool = False) ->
     Returns:
         A transformed Sudoku.
     """
-    assert first in list(
-        range(1, 10)
-    ), f"first '{first}' must be a number in {range(1,10)}"
-    assert second in list(
-        range(1, 10)
-    ), f"second '{second}' must be a number in {range(1,10)}"
+    numbers = range(1, s.size + 1)
+    assert first in list(numbers), f"first '{first}' must be a number in {numbers}"
+    assert second in list(numbers), f"second '{second}' must be a number in {numbers}"
 
-    if not inplace:
-        s = s.clone()
-
-    for i in range(9):
-        for j in range(9):
-            if s[i, j] == first:
-                s[i, j] = 10
-            if s[i, j] == second:
-                s[i, j] = 20
-
-    for i in range(9):
-        for j in range(9):
-            if s[i, j] == 10:
-                s[i, j] = second
-            if s[i, j] == 20:
-                s[i, j] = first
-
-    return s
\ No newline at end of file
+    digits = np.arange(s.size + 1)
+    digits[[first, second]] = digits[[second, first]]
+    return _transform(s, Transform(digits=digits), inplace)
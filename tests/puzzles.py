@@ -0,0 +1,85 @@
+"""Puzzles shared by the tests."""
+from sudoku import Sudoku
+from textwrap import dedent
+
+PUZZLE = dedent(
+    """\
+    -------------
+    |530|070|000|
+    |600|195|000|
+    |098|000|060|
+    -------------
+    |800|060|003|
+    |400|803|001|
+    |700|020|006|
+    -------------
+    |060|000|280|
+    |000|419|005|
+    |000|080|079|
+    -------------
+    """
+)
+
+SOLUTION = dedent(
+    """\
+    -------------
+    |534|678|912|
+    |672|195|348|
+    |198|342|567|
+    -------------
+    |859|761|423|
+    |426|853|791|
+    |713|924|856|
+    -------------
+    |961|537|284|
+    |287|419|635|
+    |345|286|179|
+    -------------
+    """
+)
+
+# Needs a deep search, taking the backtrack engine tens of milliseconds.
+HARD_PUZZLE = dedent(
+    """\
+    -------------
+    |800|000|000|
+    |003|600|000|
+    |070|090|200|
+    -------------
+    |050|007|000|
+    |000|045|700|
+    |000|100|030|
+    -------------
+    |001|000|068|
+    |008|500|010|
+    |090|000|400|
+    -------------
+    """
+)
+
+
+def unsolvable():
+    """PUZZLE with a 5 placed where it clashes with another in its block."""
+    s = Sudoku(PUZZLE)
+    s[0, 2] = 5
+    return s
+
+
+def ones_and_twos_removed():
+    """A completed grid with every 1 and 2 cleared, which can be solved two ways."""
+    s = Sudoku(Sudoku.COMPLETED_GRID)
+    for row in range(9):
+        for column in range(9):
+            if s[row, column] in (1, 2):
+                s[row, column] = 0
+    return s
+
+
+def ones_twos_and_threes_removed():
+    """A completed grid with every 1, 2 and 3 cleared, which has 30 solutions."""
+    s = Sudoku(Sudoku.COMPLETED_GRID)
+    for row in range(9):
+        for column in range(9):
+            if s[row, column] in (1, 2, 3):
+                s[row, column] = 0
+    return s
@@ -0,0 +1,37 @@
+import numpy as np
+from sudoku import Sudoku
+from sudoku.batch import solve_batch, SOLVED, UNSOLVABLE
+from puzzles import PUZZLE, SOLUTION, ones_and_twos_removed, unsolvable
+
+
+def test_solve_batch():
+    grids = np.stack(
+        [
+            Sudoku(PUZZLE).grid,
+            unsolvable().grid,
+            Sudoku().grid,
+            ones_and_twos_removed().grid,
+        ]
+    )
+
+    solutions, status = solve_batch(grids)
+
+    assert list(status) == [SOLVED, UNSOLVABLE, SOLVED, SOLVED]
+    assert (solutions[0] == Sudoku(SOLUTION).grid).all()
+    assert (solutions[1] == 0).all()
+    assert Sudoku.from_array(solutions[2]).completed
+    assert Sudoku.from_array(solutions[3]).completed
+
+
+def test_solve_batch_chunks():
+    grids = np.stack([Sudoku(PUZZLE).grid] * 5)
+    solutions, status = solve_batch(grids, chunk_size=2)
+
+    assert (status == SOLVED).all()
+    assert (solutions == Sudoku(SOLUTION).grid).all()
+
+
+def test_solve_batch_empty():
+    solutions, status = solve_batch(np.zeros((0, 9, 9), dtype=np.uint8))
+    assert solutions.shape == (0, 9, 9)
+    assert status.shape == (0,)
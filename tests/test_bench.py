@@ -0,0 +1,60 @@
+import json
+import pytest
+from sudoku import Sudoku, count_solutions
+from sudoku.bench import CORPORA, compare, load_corpus, main, run
+
+
+@pytest.mark.parametrize("corpus", CORPORA)
+def test_corpora_have_unique_solutions(corpus):
+    grids = load_corpus(corpus)
+
+    assert len(grids) > 0
+    for grid in grids:
+        assert count_solutions(Sudoku.from_array(grid), limit=2) == 1
+
+
+def test_seventeen_clues():
+    assert ((load_corpus("17-clue") != 0).sum(axis=(1, 2)) == 17).all()
+
+
+def test_run():
+    results = run(["17-clue"], ["solve-dlx", "solve-batch"])
+
+    assert [r["benchmark"] for r in results] == ["solve-dlx", "solve-batch"]
+    for result in results:
+        assert result["corpus"] == "17-clue"
+        assert result["puzzles"] == 14
+        assert result["puzzles_per_second"] > 0
+        assert 0 < result["p50_ms"] <= result["p99_ms"]
+
+
+def test_compare():
+    def result(benchmark, puzzles_per_second):
+        return {
+            "corpus": "easy",
+            "benchmark": benchmark,
+            "puzzles_per_second": puzzles_per_second,
+        }
+
+    baseline = [result("solve-dlx", 100.0), result("check", 100.0)]
+    results = [result("solve-dlx", 85.0), result("check", 50.0), result("new", 1.0)]
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("check on easy")
+
+
+def test_main_baseline(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    arguments = ["--corpus", "17-clue", "--benchmark", "check"]
+
+    assert main(arguments + ["--output", str(output)]) == 0
+    assert json.loads(output.read_text())["results"][0]["benchmark"] == "check"
+
+    # Every result is a regression when no drop is tolerated from a faster run.
+    document = json.loads(output.read_text())
+    document["results"][0]["puzzles_per_second"] *= 10
+    output.write_text(json.dumps(document))
+    assert main(arguments + ["--baseline", str(output), "--tolerance", "0"]) == 1
+    assert "regression: check on 17-clue" in capsys.readouterr().out
@@ -0,0 +1,129 @@
+import numpy as np
+import pickle
+import pytest
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from sudoku import SearchStats, Sudoku, solve
+from sudoku.cache import DiskCache
+from puzzles import (
+    HARD_PUZZLE,
+    PUZZLE,
+    SOLUTION,
+    ones_and_twos_removed,
+    unsolvable,
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db")
+    yield cache
+    cache.close()
+
+
+def test_get_put(cache):
+    assert cache.get(Sudoku(PUZZLE)) is None
+    assert len(cache) == 0
+
+    cache.put(Sudoku(PUZZLE), Sudoku(SOLUTION), True)
+    cache.put(unsolvable().grid, None, False)
+
+    solution, unique = cache.get(Sudoku(PUZZLE))
+    assert (solution == Sudoku(SOLUTION).grid).all()
+    assert unique
+    assert cache.get(unsolvable()) == (None, False)
+    assert len(cache) == 2
+
+    cache.put(Sudoku(PUZZLE), Sudoku(SOLUTION), False)
+    assert not cache.get(Sudoku(PUZZLE))[1]
+    assert len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_persists(cache):
+    cache.put(Sudoku(PUZZLE), Sudoku(SOLUTION), True)
+    cache.close()
+
+    reopened = pickle.loads(pickle.dumps(cache))
+    assert reopened.get(Sudoku(PUZZLE))[1]
+    reopened.close()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db", max_entries=2, refresh=0)
+    first, second, third = Sudoku(PUZZLE), unsolvable(), Sudoku(HARD_PUZZLE)
+    cache.put(first, None, False)
+    cache.put(second, None, False)
+    cache.get(first)
+    cache.put(third, None, False)
+
+    assert len(cache) == 2
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
+    assert cache.get(third) is not None
+    cache.close()
+
+
+def test_hits_do_not_wait_for_writers(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db", timeout=0.01)
+    cache.put(Sudoku(PUZZLE), Sudoku(SOLUTION), True)
+
+    # Another connection holds the write lock, which a hit recorded within the
+    # refresh interval does not need.
+    writer = sqlite3.connect(tmp_path / "cache.db", isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    assert cache.get(Sudoku(PUZZLE)) is not None
+    writer.execute("ROLLBACK")
+    writer.close()
+    cache.close()
+
+
+@pytest.mark.parametrize("engine", ["backtrack", "dlx"])
+def test_solve_with_cache(cache, engine):
+    for s in [Sudoku(PUZZLE), unsolvable(), Sudoku(HARD_PUZZLE)]:
+        stats = SearchStats()
+        expected = solve(s, engine=engine)
+
+        assert solve(s, engine=engine, cache=cache, stats=stats) == expected
+        assert solve(s, engine=engine, cache=cache, stats=stats) == expected
+        assert solve(s, exhaustive=True, cache=cache, stats=stats) == expected
+        assert stats.cache_misses == 1
+        assert stats.cache_hits == 2
+
+
+def test_solve_with_cache_multiple_solutions(cache):
+    s = ones_and_twos_removed()
+    stats = SearchStats()
+
+    first = solve(s, cache=cache, stats=stats)
+    assert solve(s, cache=cache, stats=stats) == first
+    assert cache.get(s)[1] is False
+
+    # Only the first solution is cached, so exhaustive searches search.
+    assert len(solve(s, exhaustive=True, cache=cache, stats=stats)) == 2
+    assert stats.cache_hits == 1
+    assert stats.cache_misses == 2
+
+
+def put_puzzles(cache, start):
+    for index in range(start, start + 20):
+        # A different set of cells of the first row is cleared for each index.
+        s = Sudoku(Sudoku.COMPLETED_GRID)
+        s.grid[0] *= np.array(
+            [index >> bit & 1 for bit in range(9)], dtype=s.grid.dtype
+        )
+        cache.put(s, None, False)
+        cache.get(s)
+    return len(cache)
+
+
+def test_shared_by_processes(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db", max_entries=50)
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        sizes = list(executor.map(put_puzzles, [cache] * 8, range(0, 160, 20)))
+
+    assert all(0 < size <= 50 for size in sizes)
+    assert len(cache) == 50
+    cache.close()
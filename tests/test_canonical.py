@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+import sudoku.canonical
+from sudoku import (
+    SearchStats,
+    Sudoku,
+    canonicalize,
+    solve,
+    switch_rows,
+    switch_columns,
+    switch_column_blocks,
+    switch_row_blocks,
+    switch_numbers,
+)
+from sudoku.canonical import (
+    SolutionCache,
+    _LINE_PERMUTATIONS,
+    _allowed_lines,
+    _invariant,
+)
+from sudoku.transformer import Transform
+from puzzles import HARD_PUZZLE, PUZZLE, SOLUTION, unsolvable
+
+
+def shuffle(s: Sudoku) -> Sudoku:
+    s = switch_rows(s, 1, 0, 2)
+    s = switch_row_blocks(s, 0, 2)
+    s = switch_columns(s, 2, 1, 0)
+    s = switch_column_blocks(s, 1, 2)
+    return switch_numbers(s, 3, 5)
+
+
+@pytest.mark.parametrize(
+    "grid",
+    [PUZZLE, HARD_PUZZLE, Sudoku.COMPLETED_GRID, None],
+    ids=["puzzle", "hard", "completed", "empty"],
+)
+def test_canonicalize_equivalent_grids(grid):
+    s = Sudoku(grid)
+    canonical, transform = canonicalize(s)
+
+    assert canonicalize(shuffle(s))[0] == canonical
+    assert canonicalize(Transform(transpose=True)(s))[0] == canonical
+    assert transform(s) == canonical
+    assert transform.inverse()(canonical) == s
+
+
+def smallest_in_signature_order(s: Sudoku) -> bytes:
+    """The smallest grid equivalent to s with its lines in signature order,
+    found by trying every such order of rows and columns."""
+    smallest = None
+    for grid in [s.grid, s.grid.T]:
+        grid = grid.astype(np.intp)
+        rows, columns = [
+            [p for p in _LINE_PERMUTATIONS if _allowed_lines(g)[range(9), p].all()]
+            for g in [grid, grid.T]
+        ]
+        for row_order in rows:
+            for column_order in columns:
+                numbers = grid[np.ix_(row_order, column_order)].ravel().tolist()
+                labels = {0: 0}
+                for number in numbers:
+                    labels.setdefault(number, len(labels))
+                candidate = bytes(labels[number] for number in numbers)
+                if smallest is None or candidate < smallest:
+                    smallest = candidate
+    return smallest
+
+
+@pytest.mark.parametrize("rows", [9, 2], ids=["puzzle", "two-rows"])
+def test_canonicalize_is_minimal(rows):
+    grid = Sudoku(PUZZLE).grid.copy()
+    grid[rows:] = 0
+    s = Sudoku.from_array(grid)
+    canonical, _ = canonicalize(s)
+    for equivalent in [s, shuffle(s), switch_rows(s, 0, 0, 1)]:
+        assert canonical.grid.tobytes() == smallest_in_signature_order(equivalent)
+
+
+def test_canonical_lines_are_in_signature_order():
+    s = Sudoku(PUZZLE)
+    canonical, _ = canonicalize(s)
+    for grid in [canonical.grid, canonical.grid.T]:
+        assert _allowed_lines(grid.astype(np.intp)).diagonal().all()
+    assert not _allowed_lines(s.grid.astype(np.intp)).diagonal().all()
+
+
+@pytest.mark.parametrize("grid", [PUZZLE, HARD_PUZZLE], ids=["puzzle", "hard"])
+def test_search_matches_trying_every_order(grid, monkeypatch):
+    s = Sudoku(grid)
+    canonical, transform = canonicalize(s)
+
+    # With no orders tried one by one, the incremental search is used.
+    monkeypatch.setattr(sudoku.canonical, "_MAX_TRIED", 0)
+    assert canonicalize(s) == (canonical, transform)
+
+
+def test_invariant():
+    s = Sudoku(PUZZLE)
+    assert _invariant(shuffle(s).grid) == _invariant(s.grid)
+    assert _invariant(Transform(transpose=True)(s).grid) == _invariant(s.grid)
+    assert _invariant(Sudoku(HARD_PUZZLE).grid) != _invariant(s.grid)
+
+
+def test_canonical_form_of_sparse_grid():
+    s = Sudoku()
+    s[4, 4] = 7
+    canonical, _ = canonicalize(s)
+
+    expected = Sudoku()
+    expected[8, 8] = 1
+    assert canonical == expected
+
+
+def test_solution_cache():
+    cache = SolutionCache(maxsize=2)
+
+    assert cache.solve(Sudoku(PUZZLE)) == [Sudoku(SOLUTION)]
+    assert cache.solve(shuffle(Sudoku(PUZZLE))) == [shuffle(Sudoku(SOLUTION))]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    assert cache.solve(unsolvable()) == []
+    assert cache.solve(shuffle(unsolvable())) == []
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_solution_cache_evicts_least_recently_used():
+    cache = SolutionCache(maxsize=1)
+    cache.solve(Sudoku(PUZZLE))
+    cache.solve(Sudoku(HARD_PUZZLE))
+    cache.solve(Sudoku(PUZZLE))
+
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_solution_cache_stats():
+    cache = SolutionCache()
+    stats = SearchStats()
+    cache.solve(Sudoku(PUZZLE), stats=stats)
+    cache.solve(Sudoku(PUZZLE), stats=stats)
+
+    assert stats.cache_misses == 1
+    assert stats.cache_hits == 1
+    assert stats.solutions == 1
+
+
+def test_solution_cache_hit_does_not_search():
+    cache = SolutionCache()
+    cache.solve(Sudoku(PUZZLE))
+    cache.solve(Transform(transpose=True)(Sudoku(PUZZLE)))
+
+    for s in [Sudoku(PUZZLE), shuffle(Sudoku(PUZZLE))]:
+        stats = SearchStats()
+        assert cache.solve(s, stats=stats) == solve(s)
+        assert stats.cache_hits == 1
+        assert stats.nodes == 0
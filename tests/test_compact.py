@@ -0,0 +1,64 @@
+import sys
+from sudoku import Sudoku
+from sudoku.compact import CompactSudoku
+from puzzles import PUZZLE
+
+
+def test_round_trip():
+    s = Sudoku(PUZZLE)
+    c = CompactSudoku.from_sudoku(s)
+    assert c.to_sudoku() == s
+    assert bytes(c) == s.grid.tobytes()
+    assert repr(c) == repr(s)
+
+
+def test_set_get_elements():
+    c = CompactSudoku()
+    for row, column, value in zip(range(9), range(9), range(10)):
+        c[row, column] = value
+        assert c[row, column] == value
+
+
+def test_clone():
+    c = CompactSudoku.from_sudoku(Sudoku(PUZZLE))
+    c2 = c.clone()
+    assert c == c2
+    c2[0, 2] = 4
+    assert c != c2
+    assert c[0, 2] == 0
+
+
+def test_not_equal_to_other_types():
+    c = CompactSudoku()
+    assert c != bytes(c)
+    assert c != None
+
+
+def test_possible_entries_match_sudoku():
+    s = Sudoku(PUZZLE)
+    c = CompactSudoku.from_sudoku(s)
+    for row in range(9):
+        for column in range(9):
+            assert c.possible_entries(row, column) == s.possible_entries(row, column)
+
+
+def test_check():
+    assert CompactSudoku().check()
+    assert CompactSudoku.from_sudoku(Sudoku(Sudoku.COMPLETED_GRID)).completed
+
+    for first, second in [((0, 0), (2, 2)), ((0, 0), (0, 5)), ((0, 0), (5, 0))]:
+        c = CompactSudoku()
+        c[first] = 1
+        c[second] = 1
+        assert not c.check()
+
+    c = CompactSudoku()
+    c[0, 0] = 10
+    assert not c.check()
+    assert not c.to_sudoku().check()
+
+
+def test_compact_is_small():
+    c = CompactSudoku()
+    assert sys.getsizeof(c) + sys.getsizeof(c.cells) < 256
+    assert not hasattr(c, "__dict__")
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from sudoku import Sudoku, has_unique_solution, rate
+from sudoku.generate import (
+    DIFFICULTIES,
+    _difficulty,
+    generate,
+    make_puzzle,
+    random_grid,
+)
+from sudoku.rating import SEARCH
+from puzzles import HARD_PUZZLE, PUZZLE
+
+
+def test_random_grid():
+    rng = np.random.default_rng(0)
+    first = random_grid(rng)
+    second = random_grid(rng)
+    assert first.completed
+    assert second.completed
+    assert first != second
+
+
+def test_make_puzzle_keeps_solution_unique():
+    solution = random_grid(np.random.default_rng(1))
+    puzzle = make_puzzle(solution, rng=np.random.default_rng(1))
+
+    assert has_unique_solution(puzzle)
+    given = puzzle.grid != 0
+    assert (puzzle.grid[given] == solution.grid[given]).all()
+
+
+def test_make_puzzle_clues():
+    solution = Sudoku(Sudoku.COMPLETED_GRID)
+    puzzle = make_puzzle(solution, clues=40, rng=np.random.default_rng(2))
+    assert (puzzle.grid != 0).sum() == 40
+    assert has_unique_solution(puzzle)
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_generate_difficulty(difficulty):
+    puzzles = list(generate(2, difficulty=difficulty, seed=3))
+    assert len(puzzles) == 2
+    for puzzle in puzzles:
+        assert has_unique_solution(puzzle)
+        assert _difficulty(puzzle) == difficulty
+
+
+def test_difficulty_follows_rating():
+    assert _difficulty(Sudoku(PUZZLE)) == "easy"
+    assert rate(Sudoku(HARD_PUZZLE)).hardest == SEARCH
+    assert _difficulty(Sudoku(HARD_PUZZLE)) == "hard"
+
+
+def test_generate_is_reproducible_across_jobs():
+    serial = list(generate(4, seed=4, chunk_size=1))
+    parallel = list(generate(4, seed=4, jobs=2, chunk_size=1))
+    assert serial == parallel
+    assert len(set(serial)) == 4
+
+
+def test_generate_impossible_raises():
+    # No hard puzzle has 60 clues, so generation gives up.
+    with pytest.raises(ValueError):
+        next(generate(1, clues=60, difficulty="hard", seed=0))
@@ -0,0 +1,108 @@
+import io
+import numpy as np
+import pytest
+from sudoku import Sudoku
+from sudoku.batch import solve_batch, SOLVED
+from sudoku.io import (
+    format_lines,
+    iter_puzzles,
+    parse_lines,
+    read_chunks,
+    read_puzzles,
+    write_puzzles,
+)
+from sudoku.parallel import solve_stream
+from puzzles import PUZZLE, SOLUTION
+
+
+def line(s: Sudoku, blank: str = ".") -> bytes:
+    return "".join(str(n) if n else blank for n in s.grid.ravel()).encode()
+
+
+def test_parse_lines():
+    puzzle, solution = Sudoku(PUZZLE), Sudoku(SOLUTION)
+    data = line(puzzle) + b"\n" + line(solution) + b"\n" + line(puzzle, "0") + b"\n"
+
+    grids = parse_lines(data)
+
+    assert grids.shape == (3, 9, 9) and grids.dtype == np.uint8
+    assert (grids[0] == puzzle.grid).all()
+    assert (grids[1] == solution.grid).all()
+    assert (grids[2] == puzzle.grid).all()
+
+
+def test_parse_lines_irregular_endings():
+    puzzle = Sudoku(PUZZLE)
+    data = line(puzzle) + b"\r\n\n" + line(puzzle) + b"\r\n\r\n" + line(puzzle)
+
+    grids = parse_lines(data)
+
+    assert grids.shape == (3, 9, 9)
+    assert (grids == puzzle.grid).all()
+
+
+def test_parse_lines_invalid():
+    with pytest.raises(ValueError, match="a line has 3 cells"):
+        parse_lines(b"123\n")
+    with pytest.raises(ValueError, match="line 3 has 3 cells"):
+        parse_lines(b"." * 81 + b"\n\n123\n", first_line=1)
+    with pytest.raises(ValueError, match="a line has a cell"):
+        parse_lines(b"x" * 81 + b"\n")
+    with pytest.raises(ValueError, match="line 12 has a cell"):
+        parse_lines(b"." * 81 + b"\n\n" + b"x" * 81 + b"\n", first_line=10)
+
+
+def test_format_lines():
+    puzzle = Sudoku(PUZZLE)
+    assert format_lines(puzzle) == line(puzzle) + b"\n"
+    assert format_lines(puzzle.grid, blank="0") == line(puzzle, "0") + b"\n"
+    assert (parse_lines(format_lines(np.stack([puzzle.grid] * 2))) == puzzle.grid).all()
+
+
+def test_read_write_round_trip(tmp_path):
+    grids = np.stack([Sudoku(PUZZLE).grid, Sudoku(SOLUTION).grid] * 5)
+    path = tmp_path / "puzzles.txt"
+
+    write_puzzles(path, grids)
+    chunks = list(read_chunks(path, chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert (np.concatenate(chunks) == grids).all()
+    assert (read_puzzles(path) == grids).all()
+
+
+def test_read_chunks_file_object():
+    puzzle = Sudoku(PUZZLE)
+    # Lines of uneven length must not be split between chunks.
+    data = (line(puzzle) + b"\r\n") * 3 + line(puzzle)
+
+    grids = np.concatenate(list(read_chunks(io.BytesIO(data), chunk_size=1)))
+
+    assert grids.shape == (4, 9, 9)
+    assert (grids == puzzle.grid).all()
+
+
+def test_read_chunks_names_malformed_line():
+    data = (line(Sudoku(PUZZLE)) + b"\n") * 5 + b"123\n"
+
+    with pytest.raises(ValueError, match="line 6 has 3 cells"):
+        list(read_chunks(io.BytesIO(data), chunk_size=2))
+
+
+def test_read_puzzles_empty():
+    assert read_puzzles(io.BytesIO(b"")).shape == (0, 9, 9)
+
+
+def test_solve_from_file(tmp_path):
+    path = tmp_path / "puzzles.txt"
+    write_puzzles(path, [Sudoku(PUZZLE)] * 3)
+
+    solutions, status = solve_batch(read_puzzles(path))
+    assert (status == SOLVED).all()
+    assert (solutions == Sudoku(SOLUTION).grid).all()
+
+    out = io.BytesIO()
+    write_puzzles(
+        out, (solution for solution, _ in solve_stream(iter_puzzles(path), jobs=1))
+    )
+    assert (parse_lines(out.getvalue()) == Sudoku(SOLUTION).grid).all()
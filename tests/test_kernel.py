@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from sudoku import Sudoku, kernel, solve
+from sudoku.bench import load_corpus
+from puzzles import (
+    HARD_PUZZLE,
+    PUZZLE,
+    SOLUTION,
+    ones_and_twos_removed,
+    unsolvable,
+)
+
+
+def kernel_solutions(s, limit=1):
+    return [
+        Sudoku.from_array(cells.reshape(9, 9))
+        for cells in kernel.solve_cells(s.grid, limit)
+    ]
+
+
+def test_solve_cells():
+    solutions = kernel.solve_cells(Sudoku(PUZZLE).grid.ravel())
+    assert solutions.dtype == np.uint8
+    assert solutions.shape == (1, 81)
+    assert Sudoku.from_array(solutions[0].reshape(9, 9)) == Sudoku(SOLUTION)
+
+
+@pytest.mark.parametrize(
+    "puzzle", [Sudoku(PUZZLE), Sudoku(HARD_PUZZLE), ones_and_twos_removed()]
+)
+def test_same_as_solve(puzzle):
+    expected = solve(puzzle, exhaustive=True, limit=5)
+    assert kernel_solutions(puzzle, limit=5) == expected
+
+
+def test_same_order_as_solve():
+    # Clearing clues of a hard puzzle leaves many solutions, found in an order
+    # that depends on every strategy and on the choice of branch cell.
+    grid = load_corpus("hard")[0].copy()
+    grid.ravel()[np.flatnonzero(grid)[:6]] = 0
+    s = Sudoku.from_array(grid)
+
+    expected = solve(s, exhaustive=True, limit=20)
+    assert len(expected) == 20
+    assert kernel_solutions(s, limit=20) == expected
+
+
+def test_large_limit():
+    # Room is made for solutions as they are found, not for limit up front.
+    assert kernel_solutions(Sudoku(PUZZLE), limit=10**12) == [Sudoku(SOLUTION)]
+
+    s = Sudoku()
+    expected = solve(s, exhaustive=True, limit=100, engine="backtrack")
+    assert kernel_solutions(s, limit=100) == expected
+
+
+def test_inconsistent():
+    assert kernel.solve_cells(unsolvable().grid).shape == (0, 81)
+
+
+def test_stop():
+    s = Sudoku()
+    calls = []
+
+    def stop():
+        calls.append(None)
+        return len(calls) == 3
+
+    assert len(kernel.solve_cells(s.grid, limit=10**4, stop=stop)) < 10**4
+    assert len(calls) == 3
+
+
+def test_solve_uses_kernel(monkeypatch):
+    calls = []
+    solve_cells = kernel.solve_cells
+
+    def counted(cells, limit=1, stop=None):
+        calls.append(limit)
+        return solve_cells(cells, limit, stop)
+
+    monkeypatch.setattr(kernel, "AVAILABLE", True)
+    monkeypatch.setattr(kernel, "solve_cells", counted)
+
+    assert solve(Sudoku(PUZZLE)) == [Sudoku(SOLUTION)]
+    assert len(solve(ones_and_twos_removed(), exhaustive=True, limit=3)) == 2
+    assert solve(Sudoku(PUZZLE), exhaustive=True, limit=10**8) == [Sudoku(SOLUTION)]
+    assert calls == [1, 3, 10**8]
+
+    # Searches the kernel cannot stand in for use the Python search.
+    solve(ones_and_twos_removed(), exhaustive=True)
+    solve(Sudoku(PUZZLE), strategies=())
+    solve(Sudoku(PUZZLE), fired={})
+    solve(Sudoku(box_size=2))
+    assert calls == [1, 3, 10**8]
+
+    # A stop callback is honoured by the kernel rather than avoiding it.
+    assert solve(Sudoku(PUZZLE), stop=lambda: False) == [Sudoku(SOLUTION)]
+    assert calls == [1, 3, 10**8, 1]
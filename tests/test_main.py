@@ -0,0 +1,54 @@
+import pytest
+from sudoku import Sudoku
+from sudoku.__main__ import main
+from sudoku.io import read_puzzles, write_puzzles
+from puzzles import PUZZLE, SOLUTION, ones_and_twos_removed, unsolvable
+
+
+@pytest.fixture
+def puzzles(tmp_path):
+    path = tmp_path / "puzzles.txt"
+    write_puzzles(path, [Sudoku(PUZZLE), unsolvable(), ones_and_twos_removed()] * 2)
+    return path
+
+
+def test_solve(puzzles, tmp_path, capsys):
+    output = tmp_path / "solutions.txt"
+
+    assert main(["solve", str(puzzles), "-o", str(output), "--jobs", "2"]) == 0
+
+    solutions = read_puzzles(output)
+    assert len(solutions) == 6
+    assert (solutions[0] == Sudoku(SOLUTION).grid).all()
+    assert (solutions[1] == 0).all()
+    assert Sudoku.from_array(solutions[2]).completed
+    assert (solutions[3:] == solutions[:3]).all()
+    summary = capsys.readouterr().err
+    assert "6 puzzles" in summary
+    assert "solved: 2, unsolvable: 2, multiple solutions: 2, timed out: 0" in summary
+
+
+def test_solve_limit_and_engine(puzzles, capsys):
+    args = ["solve", str(puzzles), "--jobs", "1", "--limit", "1", "-q"]
+
+    assert main(args + ["--engine", "backtrack"]) == 0
+
+    out, err = capsys.readouterr()
+    assert len(out.splitlines()) == 6
+    assert "solved: 4, unsolvable: 2, multiple solutions: 0" in err
+
+
+def test_bad_arguments(puzzles, tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["solve", str(tmp_path / "missing.txt")])
+    with pytest.raises(SystemExit):
+        main(["solve", str(puzzles), "--limit", "0"])
+
+
+def test_malformed_input(tmp_path, capsys):
+    path = tmp_path / "puzzles.txt"
+    path.write_bytes(b"." * 81 + b"\n\n123\n")
+
+    assert main(["solve", str(path), "--jobs", "1", "-q"]) == 1
+
+    assert f"{path}: line 3 has 3 cells, expected 81" in capsys.readouterr().err
@@ -0,0 +1,111 @@
+import itertools
+import multiprocessing
+import numpy as np
+import pytest
+import threading
+from sudoku import Sudoku, solve
+from sudoku import parallel
+from sudoku.batch import MULTIPLE_SOLUTIONS, SOLVED, TIMED_OUT, UNSOLVABLE
+from sudoku.parallel import solve_parallel, solve_split, solve_stream
+from puzzles import (
+    HARD_PUZZLE,
+    PUZZLE,
+    SOLUTION,
+    ones_and_twos_removed,
+    ones_twos_and_threes_removed,
+    unsolvable,
+)
+
+
+def test_solve_stream_preserves_order():
+    puzzles = [Sudoku(PUZZLE), unsolvable(), Sudoku(HARD_PUZZLE)] * 3
+
+    results = list(solve_stream(puzzles, jobs=2, chunk_size=2))
+
+    assert [status for _, status in results] == [SOLVED, UNSOLVABLE, SOLVED] * 3
+    for index, (solution, status) in enumerate(results):
+        if index % 3 == 0:
+            assert (solution == Sudoku(SOLUTION).grid).all()
+        elif index % 3 == 1:
+            assert (solution == 0).all()
+        else:
+            assert Sudoku.from_array(solution).completed
+
+
+def test_solve_stream_timeout():
+    # Finding a million solutions of the empty grid takes far longer than the
+    # timeout on any machine.
+    results = list(solve_stream([Sudoku()], jobs=1, timeout=0.05, limit=10**6))
+    assert [status for _, status in results] == [TIMED_OUT]
+
+    puzzles = [Sudoku(HARD_PUZZLE), Sudoku(PUZZLE)]
+    results = list(solve_stream(puzzles, jobs=1, timeout=10, engine="backtrack"))
+    assert [status for _, status in results] == [SOLVED, SOLVED]
+
+
+@pytest.mark.parametrize("engine", ["backtrack", "dlx"])
+def test_timeout_checked_during_search(engine, monkeypatch):
+    # The deadline is checked by the search itself, the compiled kernel too.
+    clock = itertools.count()
+    monkeypatch.setattr(parallel, "perf_counter", lambda: next(clock))
+    solution, status = parallel._solve_one(Sudoku().grid, engine, 0.5, limit=1000)
+    assert status == TIMED_OUT
+    assert solution is None
+
+
+def test_solve_parallel():
+    grids = np.stack([Sudoku(PUZZLE).grid] * 10)
+    solutions, status = solve_parallel(grids, jobs=2, chunk_size=3)
+
+    assert (status == SOLVED).all()
+    assert (solutions == Sudoku(SOLUTION).grid).all()
+
+
+def test_solve_stream_limit():
+    puzzles = [Sudoku(PUZZLE), ones_and_twos_removed()]
+
+    results = list(solve_stream(puzzles, jobs=1, limit=2))
+    assert [status for _, status in results] == [SOLVED, MULTIPLE_SOLUTIONS]
+    assert Sudoku.from_array(results[1][0]).completed
+
+    results = list(solve_stream(puzzles, jobs=1))
+    assert [status for _, status in results] == [SOLVED, SOLVED]
+
+
+@pytest.mark.parametrize("depth", [0, 1, 3])
+def test_solve_split(depth):
+    s = ones_twos_and_threes_removed()
+    solutions = solve_split(s, depth=depth, jobs=2)
+
+    assert len(set(solutions)) == len(solutions) == 30
+    assert set(solutions) == set(solve(s, exhaustive=True, engine="dlx"))
+
+
+def test_solve_split_limit():
+    solutions = solve_split(ones_twos_and_threes_removed(), limit=4, jobs=2)
+    assert len(solutions) == 4
+    for solution in solutions:
+        assert solution.completed
+
+
+def test_solve_split_unsolvable():
+    assert solve_split(unsolvable(), jobs=2) == []
+
+
+@pytest.mark.parametrize("engine", ["backtrack", "dlx"])
+def test_solve_subproblem_stops_in_flight(engine, monkeypatch):
+    # Another worker reaching the limit stops a search that has already begun.
+    limit = 10**6
+    found_solutions = multiprocessing.Value("i", 0)
+    monkeypatch.setattr(parallel, "_found_solutions", found_solutions)
+
+    def other_worker_finishes():
+        with found_solutions.get_lock():
+            found_solutions.value += limit
+
+    timer = threading.Timer(0.2, other_worker_finishes)
+    timer.start()
+    grid = np.zeros((9, 9), dtype=np.uint8).tobytes()
+    solutions = parallel._solve_subproblem(grid, engine, limit)
+    timer.join()
+    assert len(solutions) < limit
@@ -0,0 +1,105 @@
+from sudoku import Sudoku, solve
+from sudoku.propagation import (
+    claiming,
+    hidden_pairs,
+    hidden_singles,
+    naked_pairs,
+    naked_singles,
+    pointing,
+    propagate,
+)
+from puzzles import PUZZLE, SOLUTION, unsolvable
+
+ALL = 0b111111111
+ONE = 0b000000001
+ONE_TWO = 0b000000011
+
+
+def test_naked_singles():
+    candidates = [ALL] * 81
+    candidates[0] = ONE
+    assert naked_singles(candidates)
+
+    assert candidates[0] == ONE
+    for cell in [1, 8, 9, 20, 72]:
+        assert candidates[cell] == ALL & ~ONE
+    assert candidates[30] == ALL
+    assert not naked_singles(candidates)
+
+
+def test_hidden_singles():
+    candidates = [ALL] * 81
+    for cell in range(9):
+        if cell != 3:
+            candidates[cell] &= ~ONE
+    assert hidden_singles(candidates)
+
+    assert candidates[3] == ONE
+    assert candidates[4] == ALL & ~ONE
+
+
+def test_naked_pairs():
+    candidates = [ALL] * 81
+    candidates[0] = candidates[1] = ONE_TWO
+    assert naked_pairs(candidates)
+
+    assert candidates[0] == candidates[1] == ONE_TWO
+    for cell in [2, 8, 9, 20]:
+        assert candidates[cell] == ALL & ~ONE_TWO
+    assert candidates[27] == ALL
+
+
+def test_hidden_pairs():
+    candidates = [ALL] * 81
+    for cell in range(2, 9):
+        candidates[cell] &= ~ONE_TWO
+    assert hidden_pairs(candidates)
+
+    assert candidates[0] == candidates[1] == ONE_TWO
+    assert candidates[9] == ALL
+
+
+def test_pointing():
+    candidates = [ALL] * 81
+    for cell in [9, 10, 11, 18, 19, 20]:
+        candidates[cell] &= ~ONE
+    assert pointing(candidates)
+
+    for cell in range(3, 9):
+        assert candidates[cell] == ALL & ~ONE
+    assert candidates[0] == ALL
+    assert candidates[12] == ALL
+
+
+def test_claiming():
+    candidates = [ALL] * 81
+    for cell in range(3, 9):
+        candidates[cell] &= ~ONE
+    assert claiming(candidates)
+
+    for cell in [9, 10, 11, 18, 19, 20]:
+        assert candidates[cell] == ALL & ~ONE
+    assert candidates[0] == ALL
+    assert candidates[12] == ALL
+
+
+def test_propagate_reports_fired_strategies():
+    s = Sudoku(PUZZLE)
+    fired = {}
+    assert propagate(s, fired=fired)
+    assert s == Sudoku(SOLUTION)
+    assert fired["naked_singles"] > 0
+
+
+def test_propagate_finds_contradiction():
+    assert not propagate(unsolvable())
+
+    s = Sudoku()
+    for column in range(8):
+        s[0, column] = column + 1
+    s[1, 8] = 9
+    assert not propagate(s)
+
+
+def test_solve_without_strategies():
+    assert solve(Sudoku(PUZZLE), strategies=()) == [Sudoku(SOLUTION)]
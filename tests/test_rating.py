@@ -0,0 +1,70 @@
+import math
+import numpy as np
+import pytest
+from sudoku import Sudoku, rate
+from sudoku.bench import load_corpus
+from sudoku.rating import LEVELS, SEARCH, SEARCH_WEIGHT, WEIGHTS, rate_batch
+from puzzles import HARD_PUZZLE, PUZZLE, unsolvable
+
+
+def test_rate_completed():
+    rating = rate(Sudoku(Sudoku.COMPLETED_GRID))
+    assert rating.hardest is None
+    assert rating.level == -1
+    assert rating.score == 0
+    assert rating.nodes == 0
+
+
+def test_rate_singles():
+    s = Sudoku(PUZZLE)
+    rating = rate(s)
+
+    assert rating.hardest in ("naked_singles", "hidden_singles")
+    assert rating.score == WEIGHTS[rating.hardest]
+    assert rating.steps["naked_singles"] > 0
+    assert rating.nodes == 0
+    assert s == Sudoku(PUZZLE)
+
+
+def test_rate_search():
+    rating = rate(Sudoku(HARD_PUZZLE))
+
+    assert rating.hardest == SEARCH
+    assert rating.level == len(LEVELS) - 1
+    assert rating.nodes > 1
+    assert rating.score == SEARCH_WEIGHT + math.log2(rating.nodes)
+    assert rating.as_dict()["hardest"] == SEARCH
+
+
+def test_rate_orders_corpora():
+    easy = [rate(Sudoku.from_array(grid)).score for grid in load_corpus("easy")[:10]]
+    hard = [rate(Sudoku.from_array(grid)).score for grid in load_corpus("hard")[:3]]
+    assert max(easy) < min(hard)
+
+
+def test_rate_unsolvable():
+    with pytest.raises(ValueError):
+        rate(unsolvable())
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_rate_batch(jobs):
+    grids = np.stack(
+        [Sudoku(PUZZLE).grid, unsolvable().grid, Sudoku(HARD_PUZZLE).grid] * 3
+    )
+
+    scores, levels = rate_batch(grids, jobs=jobs, chunk_size=2)
+
+    expected = [rate(Sudoku(PUZZLE)), None, rate(Sudoku(HARD_PUZZLE))] * 3
+    for score, level, rating in zip(scores, levels, expected):
+        if rating is None:
+            assert math.isnan(score)
+            assert level == -2
+        else:
+            assert score == rating.score
+            assert level == rating.level
+
+
+def test_rate_batch_empty():
+    scores, levels = rate_batch(np.zeros((0, 9, 9), dtype=np.uint8))
+    assert len(scores) == len(levels) == 0
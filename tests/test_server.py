@@ -0,0 +1,228 @@
+import asyncio
+import multiprocessing
+import numpy as np
+import pytest
+from sudoku import Sudoku, server
+from sudoku.batch import SOLVED, TIMED_OUT, UNSOLVABLE
+from sudoku.io import format_lines
+from sudoku.server import SolverService, serve
+from puzzles import HARD_PUZZLE, PUZZLE, SOLUTION, unsolvable
+
+solve = server.solve
+
+
+def endless_on_empty_grid(s, engine, stop):
+    """Solve, except search an empty grid until stopped."""
+    if s.grid.any():
+        return solve(s, engine=engine, stop=stop)
+    while not stop():
+        pass
+    return []
+
+
+def test_solve():
+    async def main():
+        async with SolverService(jobs=1) as service:
+            return await asyncio.gather(
+                service.solve(Sudoku(PUZZLE)),
+                service.solve(unsolvable()),
+                service.solve(Sudoku(HARD_PUZZLE).grid),
+            )
+
+    results = asyncio.run(main())
+
+    assert [status for _, status in results] == [SOLVED, UNSOLVABLE, SOLVED]
+    assert (results[0][0] == Sudoku(SOLUTION).grid).all()
+    assert (results[1][0] == 0).all()
+    assert Sudoku.from_array(results[2][0]).completed
+
+
+def test_requests_are_batched():
+    async def main():
+        async with SolverService(jobs=1, batch_size=8) as service:
+            results = await asyncio.gather(
+                *[service.solve(Sudoku(PUZZLE)) for _ in range(40)]
+            )
+            return results, service.batches
+
+    results, batches = asyncio.run(main())
+
+    assert [status for _, status in results] == [SOLVED] * 40
+    assert 5 <= batches < 40
+
+
+def test_queue_is_bounded():
+    async def main():
+        async with SolverService(jobs=1, queue_size=2, batch_size=1) as service:
+            service._dispatcher.cancel()
+            tasks = [asyncio.ensure_future(service.solve(Sudoku(PUZZLE)))]
+            tasks += [asyncio.ensure_future(service.solve(Sudoku(PUZZLE)))]
+            tasks += [asyncio.ensure_future(service.solve(Sudoku(PUZZLE)))]
+            await asyncio.sleep(0.05)
+            queued = service._queue.qsize()
+            for task in tasks:
+                task.cancel()
+            return queued
+
+    assert asyncio.run(main()) == 2
+
+
+def test_deadline_in_queue():
+    async def main():
+        async with SolverService(jobs=1) as service:
+            return await service.solve(Sudoku(PUZZLE), timeout=0)
+
+    assert asyncio.run(main())[1] == TIMED_OUT
+
+
+def test_deadline_during_search(monkeypatch):
+    monkeypatch.setattr(server, "solve", endless_on_empty_grid)
+
+    async def main():
+        async with SolverService(jobs=1, timeout=0.1) as service:
+            return await asyncio.wait_for(service.solve(Sudoku()), 5)
+
+    solution, status = asyncio.run(main())
+    assert status == TIMED_OUT
+    assert (solution == 0).all()
+
+
+def test_cancel_stops_search(monkeypatch):
+    monkeypatch.setattr(server, "solve", endless_on_empty_grid)
+
+    async def main():
+        async with SolverService(jobs=1, batch_size=1) as service:
+            endless = asyncio.ensure_future(service.solve(Sudoku()))
+            await asyncio.sleep(0.1)
+            endless.cancel()
+            # The only worker is free again once the endless search stopped.
+            return await asyncio.wait_for(service.solve(Sudoku(PUZZLE)), 5)
+
+    assert asyncio.run(main())[1] == SOLVED
+
+
+def test_requests_give_up_their_slots(monkeypatch):
+    requests = []
+
+    class Recorded(server._Request):
+        __slots__ = ()
+
+        def __init__(self, *args):
+            super().__init__(*args)
+            requests.append(self)
+
+    monkeypatch.setattr(server, "_Request", Recorded)
+
+    async def main():
+        async with SolverService(jobs=1, batch_size=1) as service:
+            return await service.solve(Sudoku(PUZZLE))
+
+    assert asyncio.run(main())[1] == SOLVED
+    # A late cancellation cannot flag a slot now used by another request.
+    assert requests[0].slot is None
+
+
+def test_cancelled_in_worker(monkeypatch):
+    monkeypatch.setattr(server, "_solve_one", lambda *args: (None, server._CANCELLED))
+
+    async def main():
+        async with SolverService(jobs=1) as service:
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(service.solve(Sudoku(PUZZLE)), 5)
+
+    asyncio.run(main())
+
+
+def test_worker_checks_flags_and_deadlines(monkeypatch):
+    flags = multiprocessing.Array("b", 2)
+    monkeypatch.setattr(server, "_cancelled", flags)
+    chunk = Sudoku(HARD_PUZZLE).grid.astype(np.uint8).tobytes() * 2
+    flags[1] = 1
+
+    _, status = server._solve_requests(chunk, "dlx", [0, 1], [None, None])
+    assert list(status) == [SOLVED, server._CANCELLED]
+
+    _, status = server._solve_requests(chunk, "dlx", [0, 0], [0.0, None])
+    assert list(status) == [TIMED_OUT, SOLVED]
+
+
+async def serving(client):
+    """Run client with the port of a server running on a free port."""
+    listening = asyncio.get_running_loop().create_future()
+    serving = asyncio.ensure_future(
+        serve(
+            port=0,
+            started=lambda s: listening.set_result(s.sockets[0].getsockname()[1]),
+            jobs=1,
+        )
+    )
+    try:
+        return await asyncio.wait_for(client(await listening), 10)
+    finally:
+        serving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await serving
+
+
+def test_line_protocol():
+    async def client(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            format_lines(Sudoku(PUZZLE))
+            + b"123\n"
+            + format_lines(unsolvable())
+            + format_lines(Sudoku(HARD_PUZZLE)).rstrip()
+            + b" 0\n"
+        )
+        writer.write_eof()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    assert asyncio.run(serving(client)).decode().splitlines() == [
+        "solved " + format_lines(Sudoku(SOLUTION)).decode().strip(),
+        "error a line has 3 cells, expected 81",
+        "unsolvable",
+        "timed-out",
+    ]
+
+
+def test_http():
+    async def request(port, head, body=b""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(head + b"Content-Length: %d\r\n\r\n" % len(body) + body)
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def raw_request(port, data):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(data)
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def client(port):
+        body = format_lines(Sudoku(PUZZLE)) * 2
+        return (
+            await request(port, b"POST /solve?timeout=5 HTTP/1.1\r\n", body),
+            await request(port, b"GET /solve HTTP/1.1\r\n"),
+            await request(port, b"POST /other HTTP/1.1\r\n"),
+            await raw_request(port, b"POST /solve\r\n\r\n"),
+            await raw_request(
+                port, b"POST /solve HTTP/1.1\r\nContent-Length: ten\r\n\r\n"
+            ),
+        )
+
+    solved, get, other, no_version, bad_length = asyncio.run(serving(client))
+
+    head, body = solved.split(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert (
+        body.decode().splitlines()
+        == ["solved " + format_lines(Sudoku(SOLUTION)).decode().strip()] * 2
+    )
+    assert get.startswith(b"HTTP/1.1 405")
+    assert other.startswith(b"HTTP/1.1 404")
+    assert no_version.startswith(b"HTTP/1.1 400")
+    assert bad_length.startswith(b"HTTP/1.1 400")
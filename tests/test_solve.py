@@ -0,0 +1,268 @@
+import inspect
+import numpy as np
+import pytest
+import sys
+from puzzles import (
+    HARD_PUZZLE,
+    PUZZLE,
+    SOLUTION,
+    ones_and_twos_removed,
+    unsolvable,
+)
+from sudoku.sudoku import completed_grid
+from sudoku import (
+    Sudoku,
+    SearchStats,
+    count_solutions,
+    has_unique_solution,
+    iter_solutions,
+    solve,
+)
+
+ENGINES = ["backtrack", "dlx"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_puzzle(engine):
+    solutions = solve(Sudoku(PUZZLE), engine=engine)
+    assert solutions == [Sudoku(SOLUTION)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_hard_puzzle(engine):
+    solutions = solve(Sudoku(HARD_PUZZLE), engine=engine)
+    assert len(solutions) == 1
+    assert solutions[0].completed
+    for row in range(9):
+        for column in range(9):
+            if Sudoku(HARD_PUZZLE)[row, column] != 0:
+                assert solutions[0][row, column] == Sudoku(HARD_PUZZLE)[row, column]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_does_not_modify_puzzle(engine):
+    s = Sudoku(PUZZLE)
+    solve(s, engine=engine)
+    assert s == Sudoku(PUZZLE)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_completed(engine):
+    solutions = solve(Sudoku(Sudoku.COMPLETED_GRID), engine=engine)
+    assert solutions == [Sudoku(Sudoku.COMPLETED_GRID)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_inconsistent(engine):
+    assert solve(unsolvable(), engine=engine) == []
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_exhaustive(engine):
+    s = ones_and_twos_removed()
+    solutions = solve(s, exhaustive=True, engine=engine)
+
+    assert Sudoku(Sudoku.COMPLETED_GRID) in solutions
+    assert len(solutions) == len(set(solutions)) == 2
+    for solution in solutions:
+        assert solution.completed
+
+
+def test_dlx_solves_sparse_puzzle():
+    s = Sudoku()
+    s[0, 0] = 1
+    solutions = solve(s, engine="dlx")
+    assert len(solutions) == 1
+    assert solutions[0].completed
+    assert solutions[0][0, 0] == 1
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_limit(engine):
+    s = ones_and_twos_removed()
+    assert len(solve(s, exhaustive=True, engine=engine, limit=1)) == 1
+    assert len(solve(s, exhaustive=True, engine=engine, limit=3)) == 2
+
+
+def test_count_solutions():
+    s = ones_and_twos_removed()
+    assert count_solutions(s) == 2
+    assert count_solutions(s, limit=1) == 1
+    assert count_solutions(s, limit=None) == 2
+    assert count_solutions(Sudoku(PUZZLE)) == 1
+
+
+def test_count_solutions_stops_at_limit():
+    assert count_solutions(Sudoku(), limit=5) == 5
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_stop(engine):
+    calls = 0
+
+    def stop():
+        nonlocal calls
+        calls += 1
+        return calls > 200
+
+    solutions = solve(Sudoku(), exhaustive=True, engine=engine, stop=stop)
+    assert calls == 201
+    assert 0 < len(solutions) < 200
+    for solution in solutions:
+        assert solution.completed
+
+
+def test_count_solutions_inconsistent():
+    assert count_solutions(unsolvable()) == 0
+
+
+def test_has_unique_solution():
+    assert has_unique_solution(Sudoku(PUZZLE))
+    assert not has_unique_solution(ones_and_twos_removed())
+    assert not has_unique_solution(Sudoku())
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_search_stats(engine):
+    stats = SearchStats()
+    solve(Sudoku(HARD_PUZZLE), engine=engine, stats=stats)
+
+    assert stats.nodes > 1
+    assert stats.max_depth > 0
+    assert stats.backtracks > 0
+    assert stats.solutions == 1
+    assert stats.times["total"] > 0
+    if engine == "backtrack":
+        assert stats.fired["naked_singles"] > 0
+        assert stats.times["propagate"] > 0
+        assert stats.times["branch"] > 0
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_search_stats_hooks(engine):
+    events = []
+    stats = SearchStats(
+        on_branch=lambda depth, options: events.append(("branch", depth)),
+        on_backtrack=lambda depth: events.append(("backtrack", depth)),
+        on_solution=lambda depth: events.append(("solution", depth)),
+    )
+    solve(ones_and_twos_removed(), exhaustive=True, engine=engine, stats=stats)
+
+    solutions = [depth for event, depth in events if event == "solution"]
+    backtracks = [depth for event, depth in events if event == "backtrack"]
+    assert events[0] == ("branch", 0)
+    assert len(solutions) == 2 and all(depth > 0 for depth in solutions)
+    assert len(backtracks) == stats.backtracks > 0
+
+
+def test_search_stats_accumulate():
+    stats = SearchStats()
+    solve(Sudoku(PUZZLE), stats=stats)
+    nodes = stats.nodes
+    solve(Sudoku(PUZZLE), stats=stats)
+
+    assert stats.nodes == 2 * nodes
+    assert stats.solutions == 2
+    assert stats.as_dict()["solutions"] == 2
+
+
+def test_backtrack_search_does_not_recurse():
+    # Without propagation the empty grid is solved by a chain of over 40
+    # guesses, deeper than the recursion limit allows.
+    stats = SearchStats()
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 20)
+    try:
+        solutions = solve(Sudoku(), strategies=(), stats=stats)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert len(solutions) == 1 and solutions[0].completed
+    assert stats.max_depth > 40
+
+
+def test_iter_solutions():
+    s = ones_and_twos_removed()
+
+    solutions = list(iter_solutions(s))
+
+    assert solutions == solve(s, exhaustive=True)
+    assert len(solutions) == 2
+    assert list(iter_solutions(Sudoku(PUZZLE))) == [Sudoku(SOLUTION)]
+
+
+def test_iter_solutions_limit():
+    assert len(list(iter_solutions(Sudoku(), limit=20))) == 20
+    assert len(list(iter_solutions(ones_and_twos_removed(), limit=5))) == 2
+
+
+def test_iter_solutions_resume():
+    s = Sudoku()
+    expected = list(iter_solutions(s, limit=12))
+    assert len(set(expected)) == 12
+
+    first = iter_solutions(s, limit=5)
+    solutions = list(first)
+    second = iter_solutions(s, limit=7, cursor=first.cursor)
+    solutions += list(second)
+
+    assert solutions == expected
+    assert next(iter_solutions(s, cursor=second.cursor)) == (
+        list(iter_solutions(s, limit=13))[-1]
+    )
+
+
+def test_iter_solutions_resume_when_done():
+    s = ones_and_twos_removed()
+    solutions = iter_solutions(s)
+    assert len(list(solutions)) == 2
+
+    assert list(iter_solutions(s, cursor=solutions.cursor)) == []
+
+
+def test_iter_solutions_cursor_before_first_solution():
+    s = ones_and_twos_removed()
+    solutions = iter_solutions(s)
+
+    assert list(iter_solutions(s, cursor=solutions.cursor)) == list(solutions)
+
+
+def test_iter_solutions_cursor_other_puzzle():
+    cursor = iter_solutions(Sudoku()).cursor
+    with pytest.raises(ValueError):
+        iter_solutions(Sudoku(PUZZLE), cursor=cursor)
+
+
+def puzzle_of_size(box_size: int, blanks: int) -> Sudoku:
+    """A completed grid of the box size with blanks cells cleared at random."""
+    rng = np.random.default_rng(box_size)
+    size = box_size * box_size
+    digits = np.concatenate([[0], rng.permutation(size) + 1])
+    grid = digits[completed_grid(box_size)].ravel()
+    grid[rng.permutation(size * size)[:blanks]] = 0
+    return Sudoku.from_array(grid.reshape(size, size))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("box_size, blanks", [(2, 12), (4, 160), (5, 300)])
+def test_solve_other_sizes(engine, box_size, blanks):
+    s = puzzle_of_size(box_size, blanks)
+
+    solutions = solve(s, engine=engine)
+
+    assert len(solutions) == 1
+    assert solutions[0].completed
+    assert solutions[0].box_size == box_size
+    clues = s.grid != 0
+    assert (solutions[0].grid[clues] == s.grid[clues]).all()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_empty_16x16(engine):
+    solutions = solve(Sudoku(box_size=4), engine=engine)
+    assert solutions[0].completed
+
+
+def test_count_solutions_4x4():
+    # The 288 completed 4x4 grids.
+    assert count_solutions(Sudoku(box_size=2), limit=None) == 288
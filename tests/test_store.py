@@ -0,0 +1,133 @@
+import io
+import pickle
+import numpy as np
+import pytest
+from sudoku import Sudoku
+from sudoku.batch import solve_batch, SOLVED, UNSOLVABLE
+from sudoku.io import format_lines, parse_lines
+from sudoku.store import PuzzleStore, pack, unpack, write_store
+from puzzles import PUZZLE, SOLUTION
+
+
+def grids(n: int = 5) -> np.ndarray:
+    return np.stack([Sudoku(PUZZLE).grid, Sudoku(SOLUTION).grid] * n)
+
+
+def test_pack_unpack():
+    packed = pack(grids())
+
+    assert packed.shape == (10, 41)
+    assert (unpack(packed) == grids()).all()
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_write_and_open(tmp_path, packed):
+    path = tmp_path / "puzzles.sdb"
+    write_store(path, grids(), packed=packed)
+
+    store = PuzzleStore(path)
+
+    assert len(store) == 10
+    assert store.packed == packed
+    assert not store.has_solutions and store.status is None
+    assert (store.puzzles() == grids()).all()
+    assert (store.puzzles(3, 7) == grids()[3:7]).all()
+    assert store[1] == Sudoku(SOLUTION)
+    assert store[-1] == store[9] == Sudoku.from_array(grids()[-1])
+    with pytest.raises(IndexError):
+        store[10]
+    with pytest.raises(IndexError):
+        store[-11]
+
+
+def test_file_sizes(tmp_path):
+    write_store(tmp_path / "plain", grids())
+    write_store(tmp_path / "packed", grids(), packed=True)
+
+    assert (tmp_path / "plain").stat().st_size == 64 + 10 * 81
+    assert (tmp_path / "packed").stat().st_size == 64 + 10 * 41
+
+
+def test_slices_are_views(tmp_path):
+    path = tmp_path / "puzzles.sdb"
+    write_store(path, grids())
+
+    puzzles = PuzzleStore(path).puzzles(2, 4)
+
+    assert isinstance(puzzles.base, np.memmap) or isinstance(puzzles, np.memmap)
+    assert not puzzles.flags.writeable
+
+
+def test_chunked_write(tmp_path):
+    path = tmp_path / "puzzles.sdb"
+    write_store(path, (chunk for chunk in np.split(grids(), 5)), packed=True)
+
+    assert (PuzzleStore(path).puzzles() == grids()).all()
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_results(tmp_path, packed):
+    puzzles = np.stack([Sudoku(PUZZLE).grid] * 3)
+    path = tmp_path / "puzzles.sdb"
+    write_store(
+        path,
+        puzzles,
+        solutions=np.zeros_like(puzzles),
+        status=np.zeros(3, dtype=np.uint8),
+        packed=packed,
+    )
+
+    store = PuzzleStore(path, writable=True)
+    solutions, status = solve_batch(store.puzzles(1, 3))
+    store.write_results(1, solutions, status)
+    store.flush()
+
+    store = PuzzleStore(path)
+    assert list(store.status) == [UNSOLVABLE, SOLVED, SOLVED]
+    assert (store.solutions(0, 1) == 0).all()
+    assert (store.solutions(1) == Sudoku(SOLUTION).grid).all()
+
+
+def test_text_round_trip(tmp_path):
+    text = io.BytesIO(format_lines(grids()))
+    store = PuzzleStore.from_text(text, tmp_path / "puzzles.sdb", packed=True)
+
+    out = io.BytesIO()
+    store.to_text(out, chunk_size=3)
+
+    assert out.getvalue() == format_lines(grids())
+    assert (parse_lines(out.getvalue()) == grids()).all()
+
+
+def test_sudoku_round_trip(tmp_path):
+    sudokus = [Sudoku(PUZZLE), Sudoku(SOLUTION)]
+    store = PuzzleStore.from_sudokus(sudokus, tmp_path / "puzzles.sdb")
+
+    assert list(store.to_sudokus()) == sudokus
+
+
+def test_pickle_reopens(tmp_path):
+    path = tmp_path / "puzzles.sdb"
+    write_store(path, grids())
+
+    store = pickle.loads(pickle.dumps(PuzzleStore(path)))
+
+    assert len(pickle.dumps(PuzzleStore(path))) < 200
+    assert (store.puzzles() == grids()).all()
+
+
+def test_empty_store(tmp_path):
+    path = tmp_path / "puzzles.sdb"
+    write_store(path, np.zeros((0, 9, 9), dtype=np.uint8))
+
+    store = PuzzleStore(path)
+    assert len(store) == 0
+    assert store.puzzles().shape == (0, 9, 9)
+
+
+def test_not_a_store(tmp_path):
+    path = tmp_path / "puzzles.txt"
+    path.write_bytes(format_lines(grids()))
+
+    with pytest.raises(ValueError):
+        PuzzleStore(path)
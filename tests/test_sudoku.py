@@ -1,6 +1,8 @@
 import pytest
 from textwrap import dedent
-from sudoku import Sudoku
+from sudoku import Sudoku, check_grids
+from sudoku.sudoku import completed_grid
+import numpy as np
 
 
 def test_empty_sudoku_repr():
@@ -165,3 +167,145 @@ def test_possibilities_when_incomplete():
     assert s.possible_entries(2, 0) == [1, 2, 7]
     assert s.possible_entries(2, 1) == [1, 2, 8]
     assert s.possible_entries(2, 2) == [1, 2, 9]
+
+
+def test_candidate_mask_when_empty():
+    s = Sudoku()
+    assert s.candidate_mask(4, 4) == 0b111111111
+
+
+def test_candidate_mask_tracks_set_elements():
+    s = Sudoku()
+    s[0, 0] = 1
+    s[0, 8] = 2
+    s[8, 1] = 3
+    s[1, 1] = 4
+
+    assert s.candidate_mask(0, 1) == 0b111110000
+    assert s.possible_entries(0, 1) == [5, 6, 7, 8, 9]
+
+
+def test_candidate_mask_after_overwrite():
+    s = Sudoku()
+    s[0, 0] = 1
+    s[0, 1] = 1
+    s[0, 0] = 0
+    assert 1 not in s.possible_entries(0, 2)
+
+    s[0, 1] = 2
+    assert s.possible_entries(0, 2) == [1, 3, 4, 5, 6, 7, 8, 9]
+
+
+def test_clone_copies_candidates():
+    s = Sudoku()
+    s[0, 0] = 1
+    s2 = s.clone()
+    s2[0, 1] = 2
+
+    assert s.possible_entries(0, 2) == [2, 3, 4, 5, 6, 7, 8, 9]
+    assert s2.possible_entries(0, 2) == [3, 4, 5, 6, 7, 8, 9]
+
+
+def test_check_grids():
+    bad_block = Sudoku()
+    bad_block[0, 0] = 1
+    bad_block[2, 2] = 1
+    bad_row = Sudoku()
+    bad_row[8, 0] = 9
+    bad_row[8, 8] = 9
+    bad_column = Sudoku()
+    bad_column[0, 8] = 5
+    bad_column[7, 8] = 5
+    out_of_range = Sudoku()
+    out_of_range[4, 4] = 10
+    grids = np.stack(
+        [
+            Sudoku().grid,
+            Sudoku(Sudoku.COMPLETED_GRID).grid,
+            bad_block.grid,
+            bad_row.grid,
+            bad_column.grid,
+            out_of_range.grid,
+        ]
+    )
+
+    assert list(check_grids(grids)) == [True, True, False, False, False, False]
+    assert check_grids(grids[1])
+    assert not check_grids(grids[2])
+
+
+def test_set_spaces_as_blanks():
+    s = Sudoku()
+    s[0, 0] = 5
+    s[4, 7] = 3
+
+    t = Sudoku()
+    t.set(repr(s))
+
+    assert t == s
+    assert t.candidate_mask(0, 1) == s.candidate_mask(0, 1)
+
+
+def test_set_indented_grid():
+    s = Sudoku()
+    s[0, 0] = 5
+    s[4, 7] = 3
+
+    t = Sudoku(
+        """
+            -------------
+            |5  |   |   |
+            |   |   |   |
+            |   |   |   |
+            -------------
+            |   |   |   |
+            |   |   | 3 |
+            |   |   |   |
+            -------------
+            |   |   |   |
+            |   |   |   |
+            |   |   |   |
+            -------------
+        """
+    )
+
+    assert t == s
+
+
+def test_completed_grid():
+    assert Sudoku.from_array(completed_grid()) == Sudoku(Sudoku.COMPLETED_GRID)
+
+
+@pytest.mark.parametrize("box_size", [2, 4, 5])
+def test_other_sizes(box_size):
+    size = box_size * box_size
+    s = Sudoku(box_size=box_size)
+
+    assert s.grid.shape == (size, size)
+    assert s.possible_entries(0, 0) == list(range(1, size + 1))
+
+    s[0, 0] = size
+    assert size not in s.possible_entries(0, size - 1)
+    assert size not in s.possible_entries(box_size - 1, box_size - 1)
+    assert size in s.possible_entries(box_size, box_size)
+    assert s.ok
+
+    s[0, 1] = size
+    assert not s.ok
+
+
+@pytest.mark.parametrize("box_size", [2, 4])
+def test_other_sizes_repr_round_trip(box_size):
+    s = Sudoku.from_array(completed_grid(box_size))
+    s[0, 0] = 0
+
+    assert Sudoku(repr(s), box_size=box_size) == s
+    assert Sudoku.from_array(s.grid).box_size == box_size
+
+
+def test_check_grids_other_sizes():
+    grids = np.stack([completed_grid(4)] * 2)
+    grids[1, 0, 0] = grids[1, 0, 1]
+
+    assert list(check_grids(grids)) == [True, False]
+    assert not check_grids(np.full((4, 4), 5))
@@ -11,6 +11,7 @@ from sudoku import (
 )
 
 import numpy as np
+from sudoku.sudoku import completed_grid
 
 
 def test_switch_numbers():
@@ -147,3 +148,94 @@ def test_switch_column_blocks_inplace():
         for row in range(9):
             assert old_s[row, column + 3] == new_s[row, column]
             assert old_s[row, column] == new_s[row, column + 3]
+
+
+def test_transform_identity():
+    s = Sudoku(Sudoku.COMPLETED_GRID)
+    assert transformer.Transform()(s) == s
+
+
+def test_transform_transpose():
+    s = Sudoku(Sudoku.COMPLETED_GRID)
+    new_s = transformer.Transform(transpose=True)(s)
+    assert (new_s.grid == s.grid.T).all()
+
+
+def test_transform_matches_switches():
+    s = Sudoku(Sudoku.COMPLETED_GRID)
+    rows = [1, 0, 2, 3, 4, 5, 6, 7, 8]
+    columns = [3, 4, 5, 0, 1, 2, 6, 7, 8]
+    digits = [0, 7, 2, 3, 4, 5, 6, 1, 8, 9]
+    new_s = transformer.Transform(rows, columns, digits)(s)
+
+    expected = switch_numbers(switch_column_blocks(switch_rows(s, 0, 0, 1), 0, 1), 1, 7)
+    assert new_s == expected
+
+
+def test_transform_then_and_inverse():
+    s = Sudoku(Sudoku.COMPLETED_GRID)
+    s[4, 4] = 0
+    first = transformer.Transform(
+        rows=[2, 0, 1, 6, 7, 8, 3, 4, 5],
+        digits=[0, 2, 3, 1, 4, 5, 6, 7, 8, 9],
+        transpose=True,
+    )
+    second = transformer.Transform(
+        columns=[0, 2, 1, 3, 4, 5, 8, 7, 6],
+        digits=[0, 9, 8, 7, 6, 5, 4, 3, 2, 1],
+        transpose=True,
+    )
+
+    assert first.then(second)(s) == second(first(s))
+    assert second.then(first)(s) == first(second(s))
+    assert first.inverse()(first(s)) == s
+    assert first.then(second).inverse()(second(first(s))) == s
+    assert first.then(first.inverse()) == transformer.Transform()
+
+
+def test_transform_batch():
+    s = Sudoku(Sudoku.COMPLETED_GRID)
+    t = transformer.Transform(rows=[0, 2, 1, 3, 4, 5, 6, 7, 8], transpose=True)
+    grids = np.stack([s.grid, switch_numbers(s, 1, 2).grid])
+
+    transformed = t.apply(grids)
+
+    assert transformed.shape == (2, 9, 9)
+    assert (transformed[0] == t(s).grid).all()
+    assert (transformed[1] == t(switch_numbers(s, 1, 2)).grid).all()
+
+
+def test_switch_inplace_updates_candidates():
+    s = Sudoku()
+    s[0, 0] = 1
+    switch_rows(s, 0, 0, 1, inplace=True)
+    assert s.possible_entries(0, 5) == list(range(1, 10))
+    assert 1 not in s.possible_entries(1, 5)
+
+
+@pytest.mark.parametrize("box_size", [2, 4])
+def test_switch_other_sizes(box_size):
+    s = Sudoku.from_array(completed_grid(box_size))
+    last = box_size - 1
+
+    for switched in [
+        switch_rows(s, last, 0, last),
+        switch_columns(s, last, 0, last),
+        switch_row_blocks(s, 0, last),
+        switch_column_blocks(s, 0, last),
+        switch_numbers(s, 1, s.size),
+    ]:
+        assert switched.completed
+        assert switched != s
+
+    with pytest.raises(AssertionError):
+        switch_rows(s, box_size, 0, 1)
+
+
+def test_transform_other_size():
+    s = Sudoku.from_array(completed_grid(4))
+    t = transformer.Transform(rows=np.roll(np.arange(16), 4), transpose=True)
+
+    assert t(s).completed
+    assert t.inverse()(t(s)) == s
+    assert transformer.Transform(box_size=4).apply(s.grid).shape == (16, 16)